@@ -2,15 +2,25 @@
 
 路由前缀：/api/v1/ask
 请求模型：AskRequest
-响应模型：AskResponse
+响应模型：AskResponse（/ask/stream 以 SSE 事件流返回，最后的 done 事件携带同构结果）
+批量问答：/ask/batch（AskBatchRequest → AskBatchResponse，或 NDJSON 流）
 错误处理：统一由异常处理器负责
+准入控制：/ask、/ask/stream 与 /ask/batch 的每个问题经 app.core.admission 限制同时处理的问题数，
+          过载时以 503 + Retry-After 拒绝（批量问答中被拒绝的问题以该项的 error 返回）
 """
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.exceptions import PokemonNotFoundError, LLMError, IntentParseError
-from sqlalchemy.orm import Session
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.core import admission
+from app.core.exceptions import PokemonNotFoundError, LLMError, IntentParseError, ServiceOverloadedError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.schemas.ask_schema import AskRequest, AskResponse
+from app.schemas.ask_schema import AskRequest, AskResponse, AskBatchRequest, AskBatchResponse, AskBatchItem
 from app.services.dex_qa_service import DexQAService
+from app.utils.request_timing import mark_handler_done
 
 # 创建路由实例（/api/v1/ask），所有问答接口在此挂载
 router = APIRouter(prefix="/ask", tags=["图鉴问答"])
@@ -19,8 +29,45 @@ router = APIRouter(prefix="/ask", tags=["图鉴问答"])
 dex_qa_service = DexQAService()
 
 
+def client_key(http_request: Request) -> Optional[str]:
+    """限流使用的客户端标识（客户端 IP）"""
+    return http_request.client.host if http_request.client else None
+
+
+@asynccontextmanager
+async def admitted(http_request: Request, question: str) -> AsyncIterator[None]:
+    """在准入控制下处理问题；未启用准入控制时直接执行"""
+    controller = admission.ask_admission
+    if controller is None:
+        yield
+        return
+    async with controller.admit(client_key(http_request), lambda: dex_qa_service.can_answer_from_cache(question)):
+        yield
+
+
+async def admit_stream(http_request: Request, question: str) -> Callable[[], None]:
+    """为流式问答申请名额，返回归还名额的函数（可重复调用，只归还一次）
+
+    名额持有到回答流结束；流式耗时含客户端读取速度，不计入准入控制的平均处理耗时。
+    """
+    controller = admission.ask_admission
+    if controller is None or not await controller.acquire(
+        client_key(http_request), lambda: dex_qa_service.can_answer_from_cache(question)
+    ):
+        return lambda: None
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            controller.release()
+
+    return release
+
+
 @router.post("", response_model=AskResponse, summary="宝可梦图鉴问答")
-async def ask_pokemon_question(request: AskRequest, db: Session = Depends(get_db)):
+async def ask_pokemon_question(request: AskRequest, http_request: Request, db: AsyncSession = Depends(get_db)):
     """宝可梦图鉴问答接口
     
     通过自然语言提问宝可梦相关问题，系统会返回基于 PokeAPI 数据的 AI 生成答案。
@@ -56,10 +103,14 @@ async def ask_pokemon_question(request: AskRequest, db: Session = Depends(get_db
     """
     try:
         # 调用服务处理问题
-        result = await dex_qa_service.answer_question(db, request.question)
-        return AskResponse(**result)
-    except PokemonNotFoundError:
-        # 直接传递PokemonNotFoundError异常
+        async with admitted(http_request, request.question):
+            result = await dex_qa_service.answer_question(db, request.question)
+        response = AskResponse(**result)
+        # 此后至响应头发出（响应模型校验与 JSON 序列化）记为 Server-Timing 的 serialize
+        mark_handler_done()
+        return response
+    except (PokemonNotFoundError, ServiceOverloadedError):
+        # 直接传递PokemonNotFoundError异常与准入控制的拒绝
         raise
     except IntentParseError:
         # 直接传递IntentParseError异常
@@ -69,4 +120,92 @@ async def ask_pokemon_question(request: AskRequest, db: Session = Depends(get_db
         raise
     except Exception as e:
         # 使用自定义LLMError替代通用HTTPException
-        raise LLMError(message=f"处理请求时发生错误: {str(e)}")
\ No newline at end of file
+        raise LLMError(message=f"处理请求时发生错误: {str(e)}")
+
+
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """按 SSE 格式编码单个事件"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/stream", summary="宝可梦图鉴问答（流式）")
+async def ask_pokemon_question_stream(request: AskRequest, http_request: Request, db: AsyncSession = Depends(get_db)):
+    """宝可梦图鉴问答接口（Server-Sent Events 流式输出）
+    
+    意图解析与数据获取在响应开始前完成，错误仍以普通 JSON 错误响应返回；
+    准入名额从准备阶段一直占用到回答流结束（生成器结束时归还；事件流未被读取时由响应的后台任务归还）；
+    之后依次推送事件：
+    
+    - intent：{"intent", "pokemon_name", "pokemon_id"}，首字节即可展示识别结果
+    - answer：{"delta"}，回答增量文本（缓存命中时一次性推送完整回答）
+    - fallback：{"answer"}，LLM 流中断时的兜底回答，客户端应替换已收到的内容
+    - done：与 /ask 响应同构的完整结果
+    
+    Args:
+        request: 包含用户问题的请求体
+        db: 数据库会话依赖
+    
+    Returns:
+        text/event-stream 响应
+    """
+    release = await admit_stream(http_request, request.question)
+    try:
+        prepared = await dex_qa_service.prepare_answer(db, request.question)
+    except (PokemonNotFoundError, IntentParseError, HTTPException):
+        release()
+        raise
+    except Exception as e:
+        release()
+        raise LLMError(message=f"处理请求时发生错误: {str(e)}")
+    except BaseException:
+        # 请求被取消（如客户端断开）
+        release()
+        raise
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for item in dex_qa_service.stream_answer(db, request.question, prepared):
+                yield format_sse_event(item["event"], item["data"])
+        finally:
+            release()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release)
+    )
+
+
+@router.post("/batch", response_model=AskBatchResponse, summary="宝可梦图鉴批量问答")
+async def ask_pokemon_questions_batch(request: AskBatchRequest, http_request: Request, db: AsyncSession = Depends(get_db)):
+    """宝可梦图鉴批量问答接口
+    
+    相同问题（归一化后）只处理一次；问题以受限并发（BATCH_CONCURRENCY）执行，
+    单项失败以 error 字段返回，不影响其他问题。每个问题各自经过准入控制（占一个名额、一个限流令牌），
+    被拒绝的问题以 ServiceOverloadedError 作为该项的 error 返回。
+    
+    - stream=false：全部完成后按请求顺序返回 AskBatchResponse
+    - stream=true：以 application/x-ndjson 按完成顺序逐行返回 AskBatchItem，客户端按 index 归位
+    
+    Args:
+        request: 包含问题列表的请求体
+        db: 数据库会话依赖
+    
+    Returns:
+        批量问答结果
+    """
+    items = dex_qa_service.answer_batch(db, request.questions, admit=lambda question: admitted(http_request, question))
+    
+    if request.stream:
+        async def item_stream() -> AsyncIterator[str]:
+            async for item in items:
+                yield AskBatchItem(**item).model_dump_json() + "\n"
+        
+        return StreamingResponse(item_stream(), media_type="application/x-ndjson")
+    
+    results = sorted([AskBatchItem(**item) async for item in items], key=lambda item: item.index)
+    succeeded = sum(1 for item in results if item.success)
+    response = AskBatchResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+    mark_handler_done()
+    return response
@@ -0,0 +1,42 @@
+"""缓存管理接口路由
+
+路由前缀：/api/v1/cache
+- GET    /stats          各进程内缓存的命中/未命中/淘汰计数
+- DELETE /{cache_name}   失效指定缓存（可按 key 删除单个条目）
+- DELETE ""              清空全部进程内缓存
+"""
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from app.utils.cache import cache_registry
+from app.utils.fast_json import FastJSONResponse
+
+# 创建路由实例（/api/v1/cache）；接口均返回 dict，默认以 FastJSONResponse 序列化
+router = APIRouter(prefix="/cache", tags=["缓存管理"], default_response_class=FastJSONResponse)
+
+
+@router.get("/stats", summary="进程内缓存统计")
+async def get_cache_stats():
+    """返回所有已登记缓存的统计信息（按缓存名称索引）"""
+    return {name: cache.stats() for name, cache in cache_registry.items()}
+
+
+@router.delete("/{cache_name}", summary="失效指定缓存")
+async def invalidate_cache(cache_name: str, key: Optional[str] = None):
+    """失效指定缓存
+
+    Args:
+        cache_name: 缓存名称（见 /stats 返回的键）
+        key: 条目键（如宝可梦英文名）；为空时清空该缓存
+    """
+    cache = cache_registry.get(cache_name)
+    if cache is None:
+        raise HTTPException(status_code=404, detail=f"未找到缓存: {cache_name}")
+    if key is None:
+        return {"cache": cache_name, "invalidated": cache.clear()}
+    return {"cache": cache_name, "invalidated": int(cache.invalidate(key.lower()))}
+
+
+@router.delete("", summary="清空全部缓存")
+async def clear_all_caches():
+    """清空所有已登记的进程内缓存"""
+    return {"invalidated": {name: cache.clear() for name, cache in cache_registry.items()}}
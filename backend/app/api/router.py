@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from app.api import ask_api
+from app.api import ask_api, cache_api, upstream_api
 
 # 创建主路由实例
 api_router = APIRouter()
 
 # 注册所有子路由
-api_router.include_router(ask_api.router)
\ No newline at end of file
+api_router.include_router(ask_api.router)
+api_router.include_router(cache_api.router)
+api_router.include_router(upstream_api.router)
\ No newline at end of file
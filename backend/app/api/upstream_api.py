@@ -0,0 +1,32 @@
+"""上游状态接口路由
+
+路由前缀：/api/v1/upstreams
+- GET  ""               各上游的熔断器状态、近期延迟（p50 / p99）与当前生效的超时
+- POST /{name}/reset    手动闭合指定上游的熔断器
+"""
+from fastapi import APIRouter, HTTPException
+from app.utils.fast_json import FastJSONResponse
+from app.utils.resilience import upstream_registry
+
+# 创建路由实例（/api/v1/upstreams）
+router = APIRouter(prefix="/upstreams", tags=["上游状态"], default_response_class=FastJSONResponse)
+
+
+@router.get("", summary="上游熔断与延迟状态")
+async def get_upstreams():
+    """返回所有已登记上游的状态（按上游名索引）"""
+    return {name: guard.stats() for name, guard in upstream_registry.items()}
+
+
+@router.post("/{name}/reset", summary="闭合熔断器")
+async def reset_breaker(name: str):
+    """手动闭合指定上游的熔断器（如确认上游已恢复时）
+
+    Args:
+        name: 上游名（见 GET /upstreams 返回的键，如 pokeapi / doubao）
+    """
+    guard = upstream_registry.get(name)
+    if guard is None:
+        raise HTTPException(status_code=404, detail=f"未找到上游: {name}")
+    guard.breaker.reset()
+    return {"upstream": name, "breaker": guard.breaker.stats()}
@@ -2,15 +2,51 @@
 
 - 职责：将系统/用户提示组织为消息，调用 Ark v3 接口并解析回答
 - 鉴权：从 settings / 环境变量 / .env 读取 DOUBAO_API_KEY，绝不记录明文
+- 上下文：回答生成按意图选择提供的数据字段与 max_completion_tokens（见 app.utils.prompt_context），
+  每次调用的 token 用量记入 pokedex_llm_tokens
 - 兼容：在外部 LLM 不可用时由上层做兜底（不在此模块编造内容）
 """
+import hashlib
 import json
+import logging
 import os
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 import httpx
 from fastapi import HTTPException
 from app.clients.http_client import HTTPClient
 from app.core.config import settings
+from app.core.observability import LLM_TOKENS, LLM_TRUNCATED
+from app.utils.fast_json import loads
+from app.utils.prompt_context import (
+    DETAIL_MAX_CHARS, AnswerContext, evolution_context, pokemon_context, select_answer_context, species_context,
+)
+
+logger = logging.getLogger(__name__)
+
+# 回答生成的系统指令；max_chars 由回答上下文按详细程度给出
+ANSWER_INSTRUCTIONS = """你是宝可梦专家，根据提供的数据用简洁中文回答用户问题。回答要求：
+1. 先整体概括
+2. 分点说明与问题相关的关键信息（提供的数据已按问题筛选）
+3. 问题涉及进化时附上进化信息
+4. 语言通俗易懂，不编造数据，严格基于提供信息
+5. 控制在{max_chars}字以内，言简意赅"""
+
+# 提示词修订号：调整提示词中的数据组织方式时递增
+ANSWER_PROMPT_REVISION = 2
+
+# 未指定时的 max_completion_tokens（意图解析等）
+DEFAULT_MAX_COMPLETION_TOKENS = 1000
+
+# 回答提示词版本：指令或修订号变化即为新版本，问答缓存据此避免返回旧提示词生成的回答
+ANSWER_PROMPT_VERSION = hashlib.sha256(
+    f"{ANSWER_PROMPT_REVISION}:{ANSWER_INSTRUCTIONS}".encode("utf-8")
+).hexdigest()[:12]
+
+# 系统提示中问题之前的固定部分：回答字数上限 -> 提示词开头
+_ANSWER_PROMPT_HEADS = {
+    max_chars: f"\n{ANSWER_INSTRUCTIONS.format(max_chars=max_chars)}\n\n用户问题："
+    for max_chars in DETAIL_MAX_CHARS.values()
+}
 
 
 class DoubaoClient:
@@ -20,7 +56,10 @@ class DoubaoClient:
         # Ark v3 基地址由配置提供；超时适当放宽以适应生成任务
         self.http_client = HTTPClient(
             base_url=settings.doubao_api_base_url,
-            timeout=30
+            timeout=settings.doubao_timeout,
+            upstream="doubao",
+            timing_name="llm",
+            max_concurrency=settings.doubao_max_concurrency
         )
         self.api_key = settings.doubao_api_key or os.getenv("DOUBAO_API_KEY", "")
         if not self.api_key:
@@ -60,80 +99,175 @@ class DoubaoClient:
         user_prompt = f"用户问题：{question}\n请只输出 JSON："
         
         try:
-            response = await self.chat(system_prompt, user_prompt)
+            response = await self.chat(system_prompt, user_prompt, call="intent")
             return json.loads(response)
         except json.JSONDecodeError as e:
             raise HTTPException(status_code=500, detail=f"豆包返回的 JSON 格式无效: {str(e)}")
     
-    async def build_answer_with_doubao(self, question: str, pokemon_data: Dict[str, Any], species_data: Dict[str, Any]) -> str:
+    async def build_answer_with_doubao(self, question: str, pokemon_data: Dict[str, Any], species_data: Dict[str, Any], evolution_data: Optional[Dict[str, Any]] = None, intent: Optional[Dict[str, Any]] = None) -> str:
         """根据宝可梦数据和用户问题生成自然语言回答
         
         Args:
             question: 用户的自然语言问题
-            pokemon_data: 宝可梦详细数据（来自 /pokemon API）
-            species_data: 宝可梦物种数据（来自 /pokemon-species API）
+            pokemon_data: 宝可梦投影（由 /pokemon API 数据计算，见 project_pokemon）
+            species_data: 宝可梦物种投影（由 /pokemon-species API 数据计算，见 project_species）
+            evolution_data: 展开后的进化链（见 EvolutionGraph.add_chain，可选）
+            intent: 意图解析结果，据此选择提供的数据字段与回答长度（可选，缺省时提供完整数据）
         
         Returns:
             生成的自然语言回答
         """
-        # 精简宝可梦数据，只保留必要信息以减少token消耗
-        simplified_pokemon = {
-            "name": pokemon_data.get("name"),
-            "height": pokemon_data.get("height"),
-            "weight": pokemon_data.get("weight"),
-            "types": [t["type"]["name"] for t in pokemon_data.get("types", [])],
-            "stats": {s["stat"]["name"]: s["base_stat"] for s in pokemon_data.get("stats", [])},
-            "abilities": [a["ability"]["name"] for a in pokemon_data.get("abilities", []) if not a["is_hidden"]],
-            "hidden_ability": next((a["ability"]["name"] for a in pokemon_data.get("abilities", []) if a["is_hidden"]), None),
-            "moves": [m["move"]["name"] for m in pokemon_data.get("moves", [])[:10]]  # 只保留前10个技能
-        }
+        answer, _ = await self.generate_answer(question, pokemon_data, species_data, evolution_data, intent)
+        return answer
+    
+    async def generate_answer(self, question: str, pokemon_data: Dict[str, Any], species_data: Dict[str, Any], evolution_data: Optional[Dict[str, Any]] = None, intent: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+        """生成自然语言回答，并标明是否使用了兜底回答
         
-        # 精简物种数据
-        simplified_species = {
-            "name": species_data.get("name"),
-            "capture_rate": species_data.get("capture_rate"),
-            "base_happiness": species_data.get("base_happiness"),
-            "growth_rate": species_data.get("growth_rate", {}).get("name"),
-            "egg_groups": [g["name"] for g in species_data.get("egg_groups", [])],
-            "color": species_data.get("color", {}).get("name"),
-            "flavor_text": next((f["flavor_text"] for f in species_data.get("flavor_text_entries", []) if f["language"]["name"] == "zh-Hans"), "")
-        }
+        Returns:
+            (回答, 是否为兜底回答)；兜底回答不应被缓存
+        """
+        context = select_answer_context(intent)
+        system_prompt, user_prompt = self.build_answer_messages(question, pokemon_data, species_data, evolution_data, context)
+        try:
+            answer = await self.chat(system_prompt, user_prompt, context.max_completion_tokens, call="answer", context=context.name)
+            return answer, False
+        except Exception:
+            return self.fallback_answer(pokemon_data), True
+    
+    async def stream_answer(self, question: str, pokemon_data: Dict[str, Any], species_data: Dict[str, Any], evolution_data: Optional[Dict[str, Any]] = None, intent: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """流式生成自然语言回答，逐段产出增量文本
         
-        system_prompt = f"""
-你是宝可梦专家，根据提供的数据用简洁中文回答用户问题。回答要求：
-1. 先整体概括
-2. 分点说明关键信息（属性、种族值、特性等）
-3. 问题涉及进化时附上进化信息
-4. 语言通俗易懂，不编造数据，严格基于提供信息
-5. 控制在200字以内，言简意赅
-
-用户问题：{question}
-
-宝可梦数据：{json.dumps(simplified_pokemon, ensure_ascii=False)}
-宝可梦物种数据：{json.dumps(simplified_species, ensure_ascii=False)}
+        失败时直接抛出异常（可能发生在已产出部分内容之后），由调用方决定是否改用兜底回答。
         """
+        context = select_answer_context(intent)
+        system_prompt, user_prompt = self.build_answer_messages(question, pokemon_data, species_data, evolution_data, context)
+        async for delta in self.chat_stream(system_prompt, user_prompt, context.max_completion_tokens, call="answer", context=context.name):
+            yield delta
+    
+    def build_answer_messages(self, question: str, pokemon_data: Dict[str, Any], species_data: Dict[str, Any], evolution_data: Optional[Dict[str, Any]] = None, context: Optional[AnswerContext] = None) -> Tuple[str, str]:
+        """组织回答生成所需的系统提示与用户提示
         
-        user_prompt = "请根据以上信息回答用户的问题："
+        Args:
+            context: 回答上下文（见 select_answer_context），缺省时提供完整数据
         
-        try:
-            return await self.chat(system_prompt, user_prompt)
-        except Exception:
-            # 兜底：基于提供的数据直接构造简洁回答，避免对外部 LLM 的硬性依赖
-            types = ",".join(simplified_pokemon.get("types") or [])
-            return f"{simplified_pokemon.get('name')} 的属性为 {types}，基础种族值包含 {', '.join(simplified_pokemon.get('stats').keys())}。"
+        Returns:
+            (system_prompt, user_prompt)
+        """
+        context = context or select_answer_context(None)
+        head = _ANSWER_PROMPT_HEADS.get(context.max_chars) or f"\n{ANSWER_INSTRUCTIONS.format(max_chars=context.max_chars)}\n\n用户问题："
+        # 数据片段按数据版本与所选字段预先序列化并缓存，这里只做字符串拼接；未选物种字段时不附物种数据
+        system_prompt = "".join((
+            head,
+            question,
+            "\n\n宝可梦数据：",
+            pokemon_context(pokemon_data, context.pokemon_fields),
+            "\n宝可梦物种数据：" if context.species_fields else "",
+            species_context(species_data, context.species_fields) if context.species_fields else "",
+            evolution_context(evolution_data),
+            "\n        ",
+        ))
+        
+        user_prompt = "请根据以上信息回答用户的问题："
+        return system_prompt, user_prompt
+    
+    @staticmethod
+    def fallback_answer(pokemon_data: Dict[str, Any]) -> str:
+        """兜底回答：基于提供的数据直接构造简洁回答，避免对外部 LLM 的硬性依赖"""
+        types = ",".join(pokemon_data.get("types", []))
+        stats = ", ".join(pokemon_data.get("stats", {}))
+        return f"{pokemon_data.get('name')} 的属性为 {types}，基础种族值包含 {stats}。"
     
-    async def chat(self, system_prompt: str, user_prompt: str) -> str:
+    async def chat(self, system_prompt: str, user_prompt: str, max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS, call: str = "chat", context: str = "none") -> str:
         """调用豆包 API 进行对话
         
         Args:
             system_prompt: 系统提示
             user_prompt: 用户提示
+            max_completion_tokens: 输出 token 上限（含思维链）
+            call / context: token 用量指标的标签（调用类型 / 回答上下文名称）
         
         Returns:
             豆包的回答
         """
         endpoint = "chat/completions"
-        # 构建鉴权头：优先 settings，其次环境变量，再次从 .env 兜底读取
+        headers = self._build_headers()
+        payload = self._build_payload(system_prompt, user_prompt, max_completion_tokens)
+        
+        try:
+            # 使用初始化时创建的 HTTPClient 实例
+            result = await self.http_client.post(
+                endpoint,
+                headers=headers,
+                data=payload,
+                call=call
+            )
+            
+            # 直接使用返回的字典结果
+            choice = result["choices"][0]
+            self._record_usage(call, context, result.get("usage"), choice.get("finish_reason"))
+            return choice["message"]["content"]
+        except httpx.HTTPStatusError as e:
+            logger.warning(f"豆包 API HTTP 状态错误: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"豆包 API 请求失败: {str(e)} - 响应内容: {e.response.text if hasattr(e.response, 'text') else '无'}")
+        except httpx.RequestError as e:
+            logger.warning(f"豆包 API 请求错误: {str(e)}")
+            raise HTTPException(status_code=503, detail=f"无法连接到豆包服务器: {str(e)}")
+        except KeyError as e:
+            logger.warning(f"豆包 API 返回缺少字段: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"豆包 API 返回格式错误: 缺少 {str(e)} 字段")
+    
+    async def chat_stream(self, system_prompt: str, user_prompt: str, max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS, call: str = "chat", context: str = "none") -> AsyncIterator[str]:
+        """以流式模式（stream=True）调用豆包 API，逐段产出回答增量
+        
+        解析 SSE 行 `data: {...}` 中 choices[0].delta.content，遇到 `data: [DONE]` 结束。
+        请求附带 stream_options.include_usage，token 用量取自结束前 choices 为空的 usage 事件。
+        
+        Args:
+            system_prompt: 系统提示
+            user_prompt: 用户提示
+            max_completion_tokens / call / context: 同 chat
+        
+        Yields:
+            回答的增量文本
+        """
+        headers = self._build_headers()
+        payload = self._build_payload(system_prompt, user_prompt, max_completion_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        usage: Optional[Dict[str, Any]] = None
+        finish_reason: Optional[str] = None
+        
+        async for line in self.http_client.stream_post("chat/completions", data=payload, headers=headers, call=call):
+            if not line.startswith("data:"):
+                continue
+            chunk = line[len("data:"):].strip()
+            if chunk == "[DONE]":
+                break
+            try:
+                event = loads(chunk)
+            except json.JSONDecodeError as e:
+                raise HTTPException(status_code=500, detail=f"豆包流式响应格式错误: {str(e)}")
+            usage = event.get("usage") or usage
+            choices = event.get("choices") or []
+            if not choices:
+                continue
+            finish_reason = choices[0].get("finish_reason") or finish_reason
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+        self._record_usage(call, context, usage, finish_reason)
+    
+    @staticmethod
+    def _record_usage(call: str, context: str, usage: Optional[Dict[str, Any]], finish_reason: Optional[str]) -> None:
+        """记录一次调用的 token 用量（响应不含 usage 时跳过）与截断情况"""
+        if usage:
+            LLM_TOKENS.labels(call, context, "prompt").observe(usage.get("prompt_tokens") or 0)
+            LLM_TOKENS.labels(call, context, "completion").observe(usage.get("completion_tokens") or 0)
+        if finish_reason == "length":
+            LLM_TRUNCATED.labels(call, context).inc()
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """构建鉴权头：优先 settings，其次环境变量，再次从 .env 兜底读取"""
         api_key = self.api_key or os.getenv("DOUBAO_API_KEY", "")
         if not api_key:
             try:
@@ -150,39 +284,21 @@ class DoubaoClient:
                 pass
         if not api_key:
             raise HTTPException(status_code=500, detail="豆包 API Key 未配置")
-        headers = {
+        return {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
-        
-        # 以简洁的 system / user 双消息结构调用 Ark v3 chat/completions
-        payload = {
-            "model": "doubao-seed-code-preview-251028",  # 根据新的豆包 API 配置更新模型
+    
+    @staticmethod
+    def _build_payload(system_prompt: str, user_prompt: str, max_completion_tokens: int = DEFAULT_MAX_COMPLETION_TOKENS) -> Dict[str, Any]:
+        """以简洁的 system / user 双消息结构组织 Ark v3 chat/completions 请求体"""
+        return {
+            "model": settings.doubao_model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
             "temperature": 0.3,  # 控制回答的创意程度
-            "max_completion_tokens": 1000,  # 降低生成的最大token数，足够回答宝可梦相关问题
+            "max_completion_tokens": max_completion_tokens,  # 按回答上下文给出，含思维链
             "top_p": 0.8  # 控制生成的多样性，减少不必要的token消耗
-        }
-        
-        try:
-            # 使用初始化时创建的 HTTPClient 实例
-            result = await self.http_client.post(
-                endpoint,
-                headers=headers,
-                data=payload
-            )
-            
-            # 直接使用返回的字典结果
-            return result["choices"][0]["message"]["content"]
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP状态错误: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"豆包 API 请求失败: {str(e)} - 响应内容: {e.response.text if hasattr(e.response, 'text') else '无'}")
-        except httpx.RequestError as e:
-            print(f"请求错误: {str(e)}")
-            raise HTTPException(status_code=503, detail=f"无法连接到豆包服务器: {str(e)}")
-        except KeyError as e:
-            print(f"KeyError: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"豆包 API 返回格式错误: 缺少 {str(e)} 字段")
\ No newline at end of file
+        }
\ No newline at end of file
@@ -1,65 +1,352 @@
 """通用异步 HTTP 客户端
 
 封装 GET/POST 请求与错误转译，统一生成 JSON 响应与异常。
+响应体以 app.utils.fast_json 解析（安装 orjson 时使用 orjson）。
+每次请求按上游名记录状态码与耗时指标（见 app.core.observability），
+耗时同时计入当前请求 Server-Timing 的对应分项（见 app.utils.request_timing）。
+
+底层 httpx.AsyncClient 按 base_url 共享：同一上游的所有请求复用同一个连接池
+（keep-alive，h2 可用时启用 HTTP/2），避免每次调用都重新进行 DNS/TCP/TLS 握手。
+共享客户端由应用启动/关闭事件统一打开与释放，参见 init_http_clients / close_http_clients。
+
+容错（见 app.utils.resilience）：每个上游一个熔断器，连续失败（传输错误、超时、429、5xx）
+达到阈值后熔断，熔断期间请求立即以 503 失败，不再等待超时；超时按近期成功请求的 p99 自适应收紧。
+延迟窗口与自适应超时按调用类型（post / stream_post 的 call 参数）分别统计，快慢调用互不影响；
+超时的请求按不低于所用超时记入窗口，超时过紧时 p99 随之上升、超时得以回升。
+GET 视为幂等：可配置按抖动退避重试，以及在耗时超过近期延迟分位数时发出对冲请求、取先返回者。
+POST（LLM 调用）不重试、不对冲。
+
+并发隔离：每个上游一个 Bulkhead（并发上限由调用方按上游配置），请求在熔断检查之后、发出之前占用名额，
+流式请求持有名额直到响应读完；名额已满时排队，等待超过 upstream_bulkhead_max_wait_seconds 即以 503 失败。
+各上游的名额互不影响：LLM 变慢时积压的请求只占满豆包的名额，不会拖住 PokeAPI 请求。
+记入上游耗时指标与延迟窗口的时间不含排队等待。
 """
+import asyncio
+import time
 import httpx
-import json
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
+from urllib.parse import urlparse
 from fastapi import HTTPException
+from app.core.config import settings
+from app.core.observability import (
+    UPSTREAM_BULKHEAD_WAIT_SECONDS, UPSTREAM_REQUESTS, UPSTREAM_RESILIENCE_EVENTS, UPSTREAM_SECONDS,
+)
+from app.utils.fast_json import loads
+from app.utils.request_timing import record_timing
+from app.utils.resilience import (
+    Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError, LatencyWindow, UpstreamGuard, backoff_delay,
+    register_upstream, upstream_registry,
+)
+
+try:
+    import h2  # noqa: F401  HTTP/2 为可选依赖（pip install httpx[http2]）
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# base_url -> 共享的 AsyncClient（进程内单例）
+_shared_clients: Dict[str, httpx.AsyncClient] = {}
+# 已登记的上游 base_url -> 默认超时（秒），启动时据此预先创建连接池
+_registered_upstreams: Dict[str, float] = {}
+
+
+def build_async_client(timeout: float) -> httpx.AsyncClient:
+    """按配置构造带连接池限制的 AsyncClient"""
+    limits = httpx.Limits(
+        max_connections=settings.http_pool_max_connections,
+        max_keepalive_connections=settings.http_pool_max_keepalive,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(timeout, connect=settings.http_connect_timeout),
+        http2=settings.http2_enabled and HTTP2_AVAILABLE,
+    )
+
+
+def get_shared_client(base_url: str, timeout: float = 10) -> httpx.AsyncClient:
+    """获取 base_url 对应的共享客户端，不存在或已关闭时惰性创建"""
+    client = _shared_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = build_async_client(timeout)
+        _shared_clients[base_url] = client
+    return client
+
+
+def set_shared_client(base_url: str, client: httpx.AsyncClient) -> None:
+    """替换 base_url 对应的共享客户端（测试/压测中注入自定义 transport 使用）"""
+    _shared_clients[base_url] = client
+
+
+def get_upstream_guard(upstream: str, timeout: float, max_concurrency: int = 0) -> UpstreamGuard:
+    """获取上游的熔断器、隔离舱与延迟窗口，首次使用时按配置创建（max_concurrency 为 0 时不设隔离舱）"""
+    guard = upstream_registry.get(upstream)
+    if guard is None:
+        guard = register_upstream(UpstreamGuard(
+            upstream,
+            CircuitBreaker(upstream, settings.circuit_breaker_failure_threshold, settings.circuit_breaker_recovery_seconds),
+            LatencyWindow(settings.upstream_latency_window, settings.upstream_latency_min_samples),
+            base_timeout=timeout,
+            bulkhead=Bulkhead(upstream, max_concurrency) if max_concurrency > 0 else None,
+            adaptive_timeout=settings.adaptive_timeout_enabled,
+            timeout_multiplier=settings.adaptive_timeout_multiplier,
+            min_timeout=settings.adaptive_timeout_min_seconds,
+        ))
+    return guard
+
+
+def _is_failure(status: str) -> bool:
+    """计入熔断的结果：传输错误、超时、429 与 5xx（4xx 说明上游可用）"""
+    if not status.isdigit():
+        return True
+    code = int(status)
+    return code == 429 or code >= 500
+
+
+async def init_http_clients() -> None:
+    """应用启动时为所有已登记的上游创建共享客户端"""
+    for base_url, timeout in _registered_upstreams.items():
+        get_shared_client(base_url, timeout)
+
+
+async def close_http_clients() -> None:
+    """应用关闭时释放所有共享客户端及其连接"""
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        if not client.is_closed:
+            await client.aclose()
 
 
 class HTTPClient:
     """异步 HTTP 客户端封装"""
-    
-    def __init__(self, base_url: str, timeout: int = 10):
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 10,
+        upstream: Optional[str] = None,
+        timing_name: Optional[str] = None,
+        retries: int = 0,
+        hedge_percentile: float = 0.0,
+        max_concurrency: int = 0,
+    ):
         self.base_url = base_url
         self.timeout = timeout
-    
+        # GET 失败后的最大重试次数；对冲阈值分位数（0 表示不对冲）
+        self.retries = retries
+        self.hedge_percentile = hedge_percentile
+        # 指标中的上游名：默认取 base_url 的主机名
+        self.upstream = upstream or urlparse(base_url).hostname or "unknown"
+        # Server-Timing 中的分项名：默认与上游名相同
+        self.timing_name = timing_name or self.upstream
+        # 同一上游的所有实例共享并发名额，以首个创建者的 max_concurrency 为准
+        self.guard = get_upstream_guard(self.upstream, timeout, max_concurrency)
+        _registered_upstreams.setdefault(base_url, timeout)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """当前上游的共享连接池客户端"""
+        return get_shared_client(self.base_url, self.timeout)
+
     async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """发送 GET 请求
 
         返回解析后的 JSON；对常见错误进行 FastAPI HTTPException 转译。
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{self.base_url}/{endpoint}"
-                response = await client.get(url, params=params, timeout=self.timeout)
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    raise HTTPException(status_code=404, detail=f"未找到请求的资源: {endpoint}")
-                raise HTTPException(status_code=500, detail=f"HTTP 请求失败: {str(e)}")
-            except httpx.RequestError as e:
-                raise HTTPException(status_code=503, detail=f"无法连接到服务器: {str(e)}")
-            except ValueError as e:
-                raise HTTPException(status_code=500, detail=f"JSON 解析失败: {str(e)}")
-    
-    async def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        try:
+            url = f"{self.base_url}/{endpoint}"
+            response = await self._get_with_retries(url, params)
+            response.raise_for_status()
+            return loads(response.content)
+        except (CircuitOpenError, BulkheadFullError) as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise HTTPException(status_code=404, detail=f"未找到请求的资源: {endpoint}")
+            raise HTTPException(status_code=500, detail=f"HTTP 请求失败: {str(e)}")
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=503, detail=f"无法连接到服务器: {str(e)}")
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=f"JSON 解析失败: {str(e)}")
+
+    async def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, call: Optional[str] = None) -> Dict[str, Any]:
         """发送 POST 请求
 
         以 JSON 形式提交数据；统一错误处理，保证上层拿到结构化异常。
+        call 为调用类型，延迟窗口与自适应超时按调用类型分别统计。
+        """
+        try:
+            url = f"{self.base_url}/{endpoint}"
+            response = await self._request("POST", url, call=call, json=data, headers=headers)
+            response.raise_for_status()
+            return loads(response.content)
+        except (CircuitOpenError, BulkheadFullError) as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(status_code=500, detail=f"HTTP 请求失败: {str(e)}")
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=503, detail=f"无法连接到服务器: {str(e)}")
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=f"JSON 解析失败: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"未知错误: {str(e)}")
+
+    async def stream_post(self, endpoint: str, data: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, call: Optional[str] = None) -> AsyncIterator[str]:
+        """以流式方式发送 POST 请求，逐行产出响应体
+
+        用于 SSE 等增量响应；错误转译规则与 call 参数同 post。
         """
-        async with httpx.AsyncClient() as client:
+        url = f"{self.base_url}/{endpoint}"
+        try:
+            self._before_call()
+            await self._acquire_slot()
+        except (CircuitOpenError, BulkheadFullError) as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        timeout = self.guard.timeout(self.timeout, call)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async with self.client.stream("POST", url, json=data, headers=headers, timeout=timeout) as response:
+                status = str(response.status_code)
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                async for line in response.aiter_lines():
+                    yield line
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(status_code=500, detail=f"HTTP 请求失败: {str(e)}")
+        except httpx.TimeoutException as e:
+            status = "timeout"
+            raise HTTPException(status_code=503, detail=f"无法连接到服务器: {str(e)}")
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=503, detail=f"无法连接到服务器: {str(e)}")
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            # 流式请求的耗时包含读取完整响应体，名额也持有到此时
+            self._release_slot()
+            self._observe(status, start, call, timeout)
+
+    async def _get_with_retries(self, url: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        """幂等 GET：传输错误、超时、429 与 5xx 时按抖动退避重试，熔断时立即放弃"""
+        attempt = 0
+        while True:
             try:
-                url = f"{self.base_url}/{endpoint}"
+                response = await self._hedged_get(url, params)
+                if not _is_failure(str(response.status_code)) or attempt >= self.retries:
+                    return response
+            except httpx.RequestError:
+                if attempt >= self.retries:
+                    raise
+            UPSTREAM_RESILIENCE_EVENTS.labels(self.upstream, "retry").inc()
+            await asyncio.sleep(backoff_delay(
+                attempt, settings.http_retry_backoff_base_ms / 1000, settings.http_retry_backoff_max_ms / 1000
+            ))
+            attempt += 1
+
+    async def _hedged_get(self, url: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        """发送 GET；耗时超过近期延迟的 hedge_percentile 分位数仍未返回时再发一个相同请求
 
-                
-                response = await client.post(url, json=data, headers=headers, timeout=self.timeout)
-                
+        取先成功返回者并取消另一个；均失败时返回最后的响应或抛出首个异常。
+        """
+        delay = self.guard.hedge_delay(self.hedge_percentile)
+        if delay is None:
+            return await self._request("GET", url, params=params)
+        tasks = [asyncio.ensure_future(self._request("GET", url, params=params))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                UPSTREAM_RESILIENCE_EVENTS.labels(self.upstream, "hedge").inc()
+                tasks.append(asyncio.ensure_future(self._request("GET", url, params=params)))
+            pending = set(tasks)
+            outcome = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and not _is_failure(str(task.result().status_code)):
+                        if task is not tasks[0]:
+                            UPSTREAM_RESILIENCE_EVENTS.labels(self.upstream, "hedge_won").inc()
+                        return task.result()
+                    # 对冲请求被熔断或隔离舱拒绝时以原请求的结果为准
+                    if outcome is None or isinstance(outcome.exception(), (CircuitOpenError, BulkheadFullError)):
+                        outcome = task
+            return outcome.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
 
-                
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
+    def _before_call(self) -> None:
+        """熔断检查：熔断中时记入 circuit_open 状态并抛出 CircuitOpenError"""
+        if not settings.circuit_breaker_enabled:
+            return
+        try:
+            self.guard.breaker.before_call()
+        except CircuitOpenError:
+            UPSTREAM_REQUESTS.labels(self.upstream, "circuit_open").inc()
+            raise
 
-                raise HTTPException(status_code=500, detail=f"HTTP 请求失败: {str(e)}")
-            except httpx.RequestError as e:
+    async def _acquire_slot(self) -> None:
+        """占用上游的并发名额；未能占用时释放半开探测名额，等待超时记入 bulkhead_full 状态并抛出 BulkheadFullError"""
+        bulkhead = self.guard.bulkhead
+        if bulkhead is None:
+            return
+        try:
+            waited = await bulkhead.acquire(settings.upstream_bulkhead_max_wait_seconds)
+        except BulkheadFullError:
+            UPSTREAM_REQUESTS.labels(self.upstream, "bulkhead_full").inc()
+            self.guard.breaker.release()
+            raise
+        except asyncio.CancelledError:
+            self.guard.breaker.release()
+            raise
+        UPSTREAM_BULKHEAD_WAIT_SECONDS.labels(self.upstream).observe(waited)
 
-                raise HTTPException(status_code=503, detail=f"无法连接到服务器: {str(e)}")
-            except ValueError as e:
+    def _release_slot(self) -> None:
+        if self.guard.bulkhead is not None:
+            self.guard.bulkhead.release()
 
-                raise HTTPException(status_code=500, detail=f"JSON 解析失败: {str(e)}")
-            except Exception as e:
+    async def _request(self, method: str, url: str, call: Optional[str] = None, **kwargs: Any) -> httpx.Response:
+        """经共享客户端发送请求（熔断检查、并发名额、自适应超时），并记录状态码与耗时指标（传输层失败记为 error / timeout）"""
+        self._before_call()
+        await self._acquire_slot()
+        timeout = self.guard.timeout(self.timeout, call)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.client.request(method, url, timeout=timeout, **kwargs)
+            status = str(response.status_code)
+            return response
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            self._release_slot()
+            self._observe(status, start, call, timeout)
 
-                raise HTTPException(status_code=500, detail=f"未知错误: {str(e)}")
\ No newline at end of file
+    def _observe(self, status: str, start: float, call: Optional[str], timeout: float) -> None:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_REQUESTS.labels(self.upstream, status).inc()
+        UPSTREAM_SECONDS.labels(self.upstream).observe(elapsed)
+        record_timing(self.timing_name, elapsed)
+        if status == "timeout":
+            # 超时的请求实际耗时至少为超时值；只记成功请求会让窗口只剩快样本，超时收紧后无法回升
+            self.guard.window(call).observe(max(elapsed, timeout))
+        elif not _is_failure(status):
+            self.guard.window(call).observe(elapsed)
+        if not settings.circuit_breaker_enabled:
+            return
+        breaker = self.guard.breaker
+        if status == "cancelled":
+            breaker.release()
+        elif _is_failure(status):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
@@ -1,15 +1,30 @@
-from typing import Dict, Any
+"""PokeAPI 客户端
+
+加载了离线快照（POKEAPI_SNAPSHOT_PATH，见 app.clients.pokeapi_snapshot）时，
+pokemon / pokemon-species / evolution-chain 优先从快照读取；快照未收录的资源在
+POKEAPI_SNAPSHOT_ONLY=True 时按不存在处理（完全离线），否则回退到网络请求。
+"""
+import time
+from typing import Dict, Any, Optional
+from fastapi import HTTPException
 from app.clients.http_client import HTTPClient
+from app.clients.pokeapi_snapshot import get_pokeapi_snapshot
 from app.core.config import settings
+from app.core.observability import UPSTREAM_REQUESTS, UPSTREAM_SECONDS
 
 
 class PokeAPIClient:
     """PokeAPI 客户端"""
     
-    def __init__(self):
+    def __init__(self, retries: Optional[int] = None):
+        # retries：GET 失败重试次数，默认取 settings.pokeapi_retries；自行重试的调用方（如预加载）传 0
         self.http_client = HTTPClient(
             base_url=settings.pokeapi_base_url,
-            timeout=settings.pokeapi_timeout
+            timeout=settings.pokeapi_timeout,
+            upstream="pokeapi",
+            retries=settings.pokeapi_retries if retries is None else retries,
+            hedge_percentile=settings.pokeapi_hedge_percentile,
+            max_concurrency=settings.pokeapi_max_concurrency
         )
     
     async def get_pokemon(self, name_or_id: str) -> Dict[str, Any]:
@@ -22,7 +37,7 @@ class PokeAPIClient:
             宝可梦的详细信息（JSON 格式）
         """
         endpoint = f"pokemon/{name_or_id.lower()}"
-        return await self.http_client.get(endpoint)
+        return await self._get(endpoint)
     
     async def get_pokemon_species(self, name_or_id: str) -> Dict[str, Any]:
         """获取宝可梦物种信息
@@ -34,7 +49,7 @@ class PokeAPIClient:
             宝可梦物种的详细信息（JSON 格式）
         """
         endpoint = f"pokemon-species/{name_or_id.lower()}"
-        return await self.http_client.get(endpoint)
+        return await self._get(endpoint)
     
     async def get_pokemon_evolution_chain(self, chain_id: int) -> Dict[str, Any]:
         """获取宝可梦进化链信息
@@ -46,4 +61,32 @@ class PokeAPIClient:
             进化链的详细信息（JSON 格式）
         """
         endpoint = f"evolution-chain/{chain_id}"
-        return await self.http_client.get(endpoint)
\ No newline at end of file
+        return await self._get(endpoint)
+    
+    async def list_resources(self, resource: str, limit: int = 100000, offset: int = 0) -> Dict[str, Any]:
+        """获取资源列表（如 pokemon / pokemon-species / evolution-chain）
+        
+        Args:
+            resource: 资源路径名
+            limit: 单页数量，默认一次取全
+            offset: 起始偏移
+        
+        Returns:
+            {"count", "next", "previous", "results": [{"name", "url"}]}
+        """
+        return await self.http_client.get(resource, params={"limit": limit, "offset": offset})
+    
+    async def _get(self, endpoint: str) -> Dict[str, Any]:
+        """快照优先的单资源查询；快照命中与否记入 upstream="pokeapi_snapshot" 的请求指标"""
+        snapshot = get_pokeapi_snapshot()
+        if snapshot is None:
+            return await self.http_client.get(endpoint)
+        start = time.perf_counter()
+        data = snapshot.get(endpoint)
+        UPSTREAM_REQUESTS.labels("pokeapi_snapshot", "200" if data is not None else "404").inc()
+        UPSTREAM_SECONDS.labels("pokeapi_snapshot").observe(time.perf_counter() - start)
+        if data is not None:
+            return data
+        if settings.pokeapi_snapshot_only:
+            raise HTTPException(status_code=404, detail=f"未找到请求的资源: {endpoint}")
+        return await self.http_client.get(endpoint)
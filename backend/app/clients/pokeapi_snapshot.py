@@ -0,0 +1,170 @@
+"""PokeAPI 离线快照
+
+将 pokemon / pokemon-species / evolution-chain 的完整 JSON 打包为单个带索引的文件，
+PokeAPIClient 在快照模式下经 mmap 直接读取，不发起网络请求。文件只读映射，多个工作进程
+打开同一文件时共享操作系统页缓存，不各自复制数据。
+
+文件格式（小端序）：
+    头部 32 字节：magic(8) "PKSNAP01" | version u32 | 条目数 u32 | 索引偏移 u64 | 索引长度 u64
+    记录区：各记录的紧凑 JSON 依次排列
+    索引区：按键排序的条目，每条为 记录偏移 u64 | 记录长度 u32 | 键长度 u16 | 键（UTF-8）
+
+键与 PokeAPIClient 请求的端点一致（pokemon/charizard、pokemon/6、pokemon-species/6、evolution-chain/2），
+同一记录的名称键与 ID 键指向同一偏移。写入先落到临时文件，完成后原子替换，
+已映射旧文件的进程不受影响。构建命令见 backend/build_snapshot.py。
+"""
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.utils.fast_json import dumps_bytes, loads
+
+SNAPSHOT_MAGIC = b"PKSNAP01"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQ")
+_INDEX_ENTRY = struct.Struct("<QIH")
+
+
+class SnapshotFormatError(ValueError):
+    """快照文件损坏或版本不兼容"""
+
+
+def snapshot_keys(resource: str, data: Dict[str, Any]) -> List[str]:
+    """记录在快照中的键：pokemon / pokemon-species 为名称与 ID，evolution-chain 为 ID"""
+    keys = [f"{resource}/{data['id']}"]
+    if resource != "evolution-chain" and data.get("name"):
+        keys.append(f"{resource}/{data['name'].lower()}")
+    return keys
+
+
+class SnapshotWriter:
+    """顺序写入快照记录，close 时写出索引并原子替换目标文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(b"\0" * _HEADER.size)
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self.records = 0
+
+    def add(self, keys: Iterable[str], data: Dict[str, Any]) -> None:
+        """写入一条记录；键重复时后写入者生效"""
+        payload = dumps_bytes(data)
+        offset = self._file.tell()
+        self._file.write(payload)
+        for key in keys:
+            self._index[key] = (offset, len(payload))
+        self.records += 1
+
+    def close(self) -> int:
+        """写出索引与头部并替换目标文件，返回索引条目数"""
+        index_offset = self._file.tell()
+        for key in sorted(self._index):
+            offset, length = self._index[key]
+            encoded = key.encode("utf-8")
+            self._file.write(_INDEX_ENTRY.pack(offset, length, len(encoded)))
+            self._file.write(encoded)
+        index_length = self._file.tell() - index_offset
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self._index), index_offset, index_length))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return len(self._index)
+
+    def abort(self) -> None:
+        """放弃写入，删除临时文件"""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PokeAPISnapshot:
+    """只读映射的快照文件，按端点查询记录"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._index = self._read_index()
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _read_index(self) -> Dict[str, Tuple[int, int]]:
+        if len(self._mmap) < _HEADER.size:
+            raise SnapshotFormatError(f"快照文件过短: {self.path}")
+        magic, version, count, index_offset, index_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise SnapshotFormatError(f"不支持的快照格式: {self.path}")
+        if index_offset + index_length != len(self._mmap):
+            raise SnapshotFormatError(f"快照文件不完整: {self.path}")
+        index: Dict[str, Tuple[int, int]] = {}
+        position = index_offset
+        for _ in range(count):
+            offset, length, key_length = _INDEX_ENTRY.unpack_from(self._mmap, position)
+            position += _INDEX_ENTRY.size
+            key = self._mmap[position:position + key_length].decode("utf-8")
+            position += key_length
+            if offset + length > index_offset:
+                raise SnapshotFormatError(f"快照索引越界: {key}")
+            index[key] = (offset, length)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, endpoint: str) -> bool:
+        return endpoint.strip("/").lower() in self._index
+
+    def get(self, endpoint: str) -> Optional[Dict[str, Any]]:
+        """按端点读取记录，未收录时返回 None"""
+        entry = self._index.get(endpoint.strip("/").lower())
+        if entry is None:
+            return None
+        offset, length = entry
+        # 直接从映射区解析，不复制记录字节（标准库后端会复制一次）
+        with memoryview(self._mmap)[offset:offset + length] as view:
+            return loads(view)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+# 进程内共享实例：未配置 POKEAPI_SNAPSHOT_PATH 时为 None
+_snapshot: Optional[PokeAPISnapshot] = None
+
+
+def get_pokeapi_snapshot() -> Optional[PokeAPISnapshot]:
+    """当前加载的快照"""
+    return _snapshot
+
+
+def load_pokeapi_snapshot(path: str) -> int:
+    """打开快照文件替换当前快照，返回索引条目数"""
+    global _snapshot
+    snapshot = PokeAPISnapshot(path)
+    previous, _snapshot = _snapshot, snapshot
+    if previous is not None:
+        previous.close()
+    return len(snapshot)
+
+
+def close_pokeapi_snapshot() -> None:
+    """关闭当前快照"""
+    global _snapshot
+    previous, _snapshot = _snapshot, None
+    if previous is not None:
+        previous.close()
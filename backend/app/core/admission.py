@@ -0,0 +1,185 @@
+"""问答接口的准入控制（过载保护）
+
+同时处理的问答请求数不超过 max_concurrency，超出的请求进入有界 FIFO 等待队列：
+- 队列已满，或按当前排队位置与近期处理耗时估计的等待时间超过 queue_timeout：立即以 503 拒绝
+- 排队超过 queue_timeout 仍未获得名额：以 503 拒绝
+拒绝响应带 Retry-After（估计的等待秒数，至少 1 秒），客户端据此退避，
+过载时服务端只处理能在期限内完成的请求，不让所有请求一起排队到超时。
+
+没有空闲名额时，可由问答缓存直接回答的请求（由调用方判断）不占名额、不排队，直接放行。
+可选按客户端的令牌桶限流（client_rate > 0 时启用），超出速率以 429 拒绝。
+仅在单个事件循环内使用，不做线程同步。
+"""
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.exceptions import ServiceOverloadedError
+from app.core.observability import ADMISSION_DECISIONS, ADMISSION_QUEUE_SECONDS, instrument_admission
+from app.utils.resilience import Bulkhead, BulkheadFullError
+
+# 近期处理耗时的指数加权平均系数
+_EWMA_ALPHA = 0.2
+
+
+class TokenBucket:
+    """令牌桶：以 rate 个/秒补充，容量 burst"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, now: float) -> float:
+        """取一个令牌；成功返回 0，否则返回补足一个令牌所需的秒数"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """并发名额 + 有界等待队列 + 可选的按客户端令牌桶"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        client_rate: float = 0.0,
+        client_burst: float = 0.0,
+        max_clients: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._slots = Bulkhead("ask", max_concurrency)
+        self.max_concurrency = self._slots.max_concurrency
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.client_rate = client_rate
+        self.client_burst = max(1.0, client_burst)
+        self.max_clients = max_clients
+        self._clock = clock
+        # 客户端标识 -> 令牌桶；超过 max_clients 时淘汰最久未活动的客户端
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # 持有名额的请求的平均处理耗时（秒），用于估计排队等待时间
+        self.service_time: Optional[float] = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._slots.in_flight
+
+    @property
+    def queued(self) -> int:
+        return self._slots.queued
+
+    def estimated_wait(self, position: int) -> Optional[float]:
+        """排在第 position 位（从 1 起）的请求的估计等待秒数；尚无耗时样本时为 None"""
+        if self.service_time is None:
+            return None
+        return position / self.max_concurrency * self.service_time
+
+    async def acquire(self, client: Optional[str] = None, cache_hit: Optional[Callable[[], bool]] = None) -> bool:
+        """申请处理名额
+
+        Args:
+            client: 客户端标识（令牌桶限流用）
+            cache_hit: 无空闲名额时调用，返回 True 表示请求可由缓存直接回答，不占名额放行
+
+        Returns:
+            是否占用了名额（是则处理结束后须调用 release）
+
+        Raises:
+            ServiceOverloadedError: 限流（429）或过载（503），retry_after 为建议的重试等待秒数
+        """
+        if self.client_rate > 0 and client is not None:
+            wait = self._bucket(client).take(self._clock())
+            if wait > 0:
+                self._reject("rate_limited", wait, status_code=429)
+        if self._slots.try_acquire():
+            ADMISSION_DECISIONS.labels("admitted").inc()
+            return True
+        if cache_hit is not None and cache_hit():
+            ADMISSION_DECISIONS.labels("cache_hit").inc()
+            return False
+        position = self._slots.queued + 1
+        estimate = self.estimated_wait(position)
+        if position > self.max_queue:
+            self._reject("queue_full", estimate)
+        if estimate is not None and estimate > self.queue_timeout:
+            self._reject("deadline", estimate)
+
+        # 调用方被取消（如客户端断开）时，已获得的名额由 Bulkhead 转交下一个等待者
+        try:
+            waited = await self._slots.acquire(self.queue_timeout)
+        except BulkheadFullError:
+            self._reject("timeout", self.estimated_wait(self._slots.queued + 1))
+        ADMISSION_DECISIONS.labels("queued").inc()
+        ADMISSION_QUEUE_SECONDS.observe(waited)
+        return True
+
+    @asynccontextmanager
+    async def admit(self, client: Optional[str] = None, cache_hit: Optional[Callable[[], bool]] = None) -> AsyncIterator[None]:
+        """acquire + 处理结束时 release（记录处理耗时）"""
+        holds_slot = await self.acquire(client, cache_hit)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if holds_slot:
+                self.release(time.perf_counter() - start)
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        """归还名额：直接转交队首的等待者；elapsed 为本次处理耗时（秒），计入平均处理耗时"""
+        if elapsed is not None:
+            self.service_time = elapsed if self.service_time is None else (
+                _EWMA_ALPHA * elapsed + (1 - _EWMA_ALPHA) * self.service_time
+            )
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self._slots.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "service_time_ms": round(self.service_time * 1000, 2) if self.service_time is not None else None,
+            "clients": len(self._buckets),
+        }
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst, self._clock())
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    @staticmethod
+    def _reject(reason: str, retry_after: Optional[float], status_code: int = 503) -> None:
+        ADMISSION_DECISIONS.labels(reason).inc()
+        seconds = max(1, math.ceil(retry_after)) if retry_after is not None else 1
+        raise ServiceOverloadedError(reason, retry_after=seconds, status_code=status_code)
+
+
+# /api/v1/ask、/api/v1/ask/stream 与 /api/v1/ask/batch（按问题）共用的准入控制器；ADMISSION_ENABLED=False 时为 None
+ask_admission: Optional[AdmissionController] = None
+if settings.admission_enabled:
+    ask_admission = AdmissionController(
+        max_concurrency=settings.admission_max_concurrency,
+        max_queue=settings.admission_max_queue,
+        queue_timeout=settings.admission_queue_timeout_seconds,
+        client_rate=settings.admission_client_rate,
+        client_burst=settings.admission_client_burst,
+    )
+    instrument_admission(ask_admission)
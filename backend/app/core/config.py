@@ -34,14 +34,120 @@ class Settings(BaseSettings):
     db_name: str = "pokedex_ai"
     # 可选：直接提供完整数据库URL以覆盖默认MySQL配置
     database_url_env: Optional[str] = None
+    # 数据库连接池配置
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    # 批量写入：每条 upsert 语句 / 每个事务包含的记录数
+    db_upsert_batch_size: int = 200
     
     # Doubao API 配置
     doubao_api_key: str = ""
     doubao_api_base_url: str = "https://ark.cn-beijing.volces.com/api/v3"
+    doubao_timeout: int = 30
+    doubao_model: str = "doubao-seed-code-preview-251028"
+    # 回答上下文选择：按意图类型只提供回答需要的数据字段，按详细程度（low/normal/high）限制回答字数与
+    # max_completion_tokens（含思维链，预算留有余量）；关闭时始终提供完整数据、上限取 HIGH
+    answer_context_selection_enabled: bool = True
+    answer_max_tokens_low: int = 400
+    answer_max_tokens_normal: int = 700
+    answer_max_tokens_high: int = 1000
     
     # PokeAPI 配置
     pokeapi_base_url: str = "https://pokeapi.co/api/v2"
     pokeapi_timeout: int = 10
+    # 离线快照（build_snapshot.py 生成）：配置路径后优先经 mmap 读取；SNAPSHOT_ONLY 时未收录即视为不存在，不访问网络
+    pokeapi_snapshot_path: str = ""
+    pokeapi_snapshot_only: bool = False
+    
+    # 上游容错（PokeAPI / 豆包各一个熔断器）：连续失败 N 次后熔断 RECOVERY 秒，期间请求立即失败
+    # （回答生成改用兜底回答），之后放行一个探测请求，成功即恢复
+    circuit_breaker_enabled: bool = True
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_recovery_seconds: float = 30.0
+    # PokeAPI GET 重试次数（传输错误、超时、429、5xx），等待时间为全抖动指数退避
+    pokeapi_retries: int = 2
+    http_retry_backoff_base_ms: float = 50.0
+    http_retry_backoff_max_ms: float = 1000.0
+    # PokeAPI GET 对冲：耗时超过近期延迟的该分位数（如 0.95）仍未返回时再发一个相同请求，0 表示关闭
+    pokeapi_hedge_percentile: float = 0.0
+    # 自适应超时：近期成功请求 p99 × 倍数，不低于下限、不超过上面的固定超时
+    adaptive_timeout_enabled: bool = True
+    adaptive_timeout_multiplier: float = 4.0
+    adaptive_timeout_min_seconds: float = 1.0
+    # 延迟窗口（最近 N 次成功请求）；样本数达到下限后才启用自适应超时与对冲
+    upstream_latency_window: int = 200
+    upstream_latency_min_samples: int = 20
+    # 出站并发隔离（bulkhead）：每个上游同时进行的请求数上限，超出的请求排队，等待超过 WAIT 秒即以 503 失败
+    # 豆包变慢时只会占满自己的名额，PokeAPI 请求不受影响；0 表示不限制
+    pokeapi_max_concurrency: int = 32
+    doubao_max_concurrency: int = 16
+    upstream_bulkhead_max_wait_seconds: float = 2.0
+    
+    # 出站 HTTP 连接池配置（按上游 base_url 共享 keep-alive 连接）
+    http_pool_max_connections: int = 100
+    http_pool_max_keepalive: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http2_enabled: bool = True
+    
+    # JSON 编解码：安装 orjson 时用于响应序列化、上游响应解析与 JSON 列读写
+    fast_json_enabled: bool = True
+    
+    # 进程内内存缓存（位于数据库缓存之前）
+    memory_cache_max_entries: int = 512
+    memory_cache_ttl_seconds: int = 3600
+    # 回答提示词上下文片段缓存（预先序列化的宝可梦/物种/进化链数据）
+    prompt_context_cache_max_entries: int = 2048
+    
+    # 本地意图解析：基于已缓存物种名称识别宝可梦，命中时跳过 LLM 意图解析
+    local_intent_resolver_enabled: bool = True
+    # 推测性预取：本地无法解析意图时，按问题中猜测的宝可梦名称在 LLM 意图解析期间提前获取数据
+    speculative_prefetch_enabled: bool = True
+    
+    # 问答缓存（内存 LRU + answer_cache 表），按归一化问题、意图、提示词与模型版本索引
+    answer_cache_enabled: bool = True
+    answer_cache_max_entries: int = 1024
+    answer_cache_ttl_seconds: int = 86400
+    
+    # 问答数据获取流水线：各阶段超时（秒）
+    qa_stage_timeout_pokemon: float = 15.0
+    qa_stage_timeout_species: float = 15.0
+    qa_stage_timeout_evolution: float = 10.0
+    
+    # 批量问答：单次请求的最大问题数与并发处理数
+    batch_max_questions: int = 200
+    batch_concurrency: int = 8
+    
+    # /ask 与 /ask/stream 的准入控制：同时处理的请求数上限、等待队列长度与最长排队时间，
+    # 超出时以 503 + Retry-After 快速拒绝；无空闲名额时缓存命中的请求直接放行。
+    # 未命中缓存的请求在数据获取阶段同时占用 2~3 个数据库连接，并发上限约取连接池容量的一半
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 16
+    admission_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 2.0
+    # 按客户端 IP 的令牌桶限流（每秒请求数，0 表示不限流），超出时返回 429
+    admission_client_rate: float = 0.0
+    admission_client_burst: float = 10.0
+    
+    # 预加载：将 PokeAPI 的 pokemon / species / 进化链批量镜像到数据库缓存
+    preload_on_startup: bool = False
+    preload_concurrency: int = 8
+    preload_batch_size: int = 50
+    preload_max_retries: int = 3
+    # 已缓存记录超过该天数视为需要刷新；0 表示已缓存记录不再重新获取
+    preload_refresh_days: int = 0
+    
+    # 指标：GET /metrics 以 Prometheus 文本格式输出（阶段耗时、缓存命中、上游状态码、连接池等）
+    metrics_enabled: bool = True
+    # Server-Timing：/api/v1/ask 响应头中给出 intent / db / pokeapi / llm / serialize 分项耗时
+    server_timing_enabled: bool = False
+    
+    # 请求级采样分析：携带 X-Profile: 1 与正确的 X-Admin-Token 的请求，或按 profile_sample_rate 随机抽中的请求，
+    # 在处理期间采样调用栈，折叠栈文件写入 profile_dir（可生成火焰图）；admin_token 为空时不接受请求头触发
+    admin_token: str = ""
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 5.0
+    profile_dir: str = "profiles"
     
     # 应用程序配置
     app_name: str = "Pokédex AI"
@@ -60,6 +166,23 @@ class Settings(BaseSettings):
             return self.database_url_env
         return f"mysql+pymysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}?charset=utf8mb4"
     
+    @property
+    def async_database_url(self) -> str:
+        """生成异步驱动的数据库连接 URL
+
+        将同步驱动替换为对应的异步驱动：MySQL 使用 aiomysql，SQLite 使用 aiosqlite。
+        """
+        url = self.database_url
+        for sync_prefix, async_prefix in (
+            ("mysql+pymysql://", "mysql+aiomysql://"),
+            ("mysql://", "mysql+aiomysql://"),
+            ("sqlite+pysqlite://", "sqlite+aiosqlite://"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ):
+            if url.startswith(sync_prefix):
+                return async_prefix + url[len(sync_prefix):]
+        return url
+    
     model_config = SettingsConfigDict(
         env_file=str(Path(__file__).resolve().parents[2] / ".env"),
         case_sensitive=False
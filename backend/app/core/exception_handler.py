@@ -1,14 +1,16 @@
 from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
 from app.core.exceptions import (
     PokedexError,
     PokemonNotFoundError,
     PokeApiError,
     LLMError,
     DatabaseError,
-    IntentParseError
+    IntentParseError,
+    ServiceOverloadedError
 )
 import logging
+from app.utils.fast_json import FastJSONResponse
+from typing import Any, Dict
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
@@ -17,7 +19,7 @@ logger = logging.getLogger(__name__)
 async def pokedex_error_handler(request: Request, exc: PokedexError):
     """处理所有宝可梦图鉴系统自定义异常"""
     logger.error(f"PokedexError: {exc.message}, 路径: {request.url.path}, 状态码: {exc.status_code}")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -26,14 +28,15 @@ async def pokedex_error_handler(request: Request, exc: PokedexError):
             },
             "path": request.url.path,
             "success": False
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
 async def http_exception_handler(request: Request, exc: HTTPException):
     """处理FastAPI默认的HTTPException"""
     logger.error(f"HTTPException: {exc.detail}, 路径: {request.url.path}, 状态码: {exc.status_code}")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -49,7 +52,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def general_exception_handler(request: Request, exc: Exception):
     """处理所有其他未捕获的异常"""
     logger.error(f"未处理的异常: {str(exc)}, 路径: {request.url.path}", exc_info=True)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "error": {
@@ -62,6 +65,16 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 
+def describe_exception(exc: Exception) -> Dict[str, Any]:
+    """将异常转换为与上述处理器一致的错误描述（用于批量接口中的单项错误）"""
+    if isinstance(exc, PokedexError):
+        return {"type": exc.__class__.__name__, "message": exc.message, "status_code": exc.status_code}
+    if isinstance(exc, HTTPException):
+        return {"type": "HTTPException", "message": str(exc.detail), "status_code": exc.status_code}
+    logger.error(f"未处理的异常: {str(exc)}", exc_info=exc)
+    return {"type": "InternalServerError", "message": "服务器内部错误，请稍后重试", "status_code": 500}
+
+
 def register_exception_handlers(app):
     """注册所有异常处理器到FastAPI应用"""
     # 注册自定义异常处理器
@@ -71,6 +84,7 @@ def register_exception_handlers(app):
     app.exception_handler(LLMError)(pokedex_error_handler)
     app.exception_handler(DatabaseError)(pokedex_error_handler)
     app.exception_handler(IntentParseError)(pokedex_error_handler)
+    app.exception_handler(ServiceOverloadedError)(pokedex_error_handler)
     
     # 注册FastAPI默认异常处理器
     app.exception_handler(HTTPException)(http_exception_handler)
@@ -51,4 +51,17 @@ class IntentParseError(PokedexError):
         super().__init__(
             message=message,
             status_code=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+
+
+class ServiceOverloadedError(PokedexError):
+    """准入控制拒绝请求（过载 503 / 限流 429），响应带 Retry-After"""
+    def __init__(self, reason: str, retry_after: int, status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE):
+        self.reason = reason
+        self.retry_after = retry_after
+        message = "请求过于频繁" if status_code == status.HTTP_429_TOO_MANY_REQUESTS else "服务繁忙"
+        super().__init__(message=f"{message}，请 {retry_after} 秒后重试", status_code=status_code)
+    
+    @property
+    def headers(self):
+        return {"Retry-After": str(self.retry_after)}
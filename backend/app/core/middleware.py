@@ -0,0 +1,214 @@
+"""纯 ASGI 中间件
+
+相比 @app.middleware("http")（基于 BaseHTTPMiddleware，每个请求额外创建任务与响应流），
+这里的中间件只包装 send 回调，在 http.response.start 消息上改写响应头，不创建任务、不缓冲响应体，
+流式响应（SSE / NDJSON）原样透传。
+- JSONCharsetMiddleware：为 /api/ 下的 application/json 响应补充 charset=utf-8
+- TimingMiddleware：X-Process-Time 响应头（毫秒，至响应头发出时）
+- RequestIDMiddleware：透传或生成 X-Request-ID，写入 request.state.request_id 与 request_id_var
+- ServerTimingMiddleware：Server-Timing 响应头（intent / db / pokeapi / llm / serialize / total）
+- ProfilingMiddleware：按请求头（需管理员令牌）或抽样比例对单个请求做调用栈采样，结果写入文件
+"""
+import asyncio
+import hmac
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.profiler import StackSampler
+from app.utils.request_timing import RequestTimings, current_timings
+
+logger = logging.getLogger(__name__)
+
+# 当前请求的 ID，供日志等无法拿到 Request 对象的代码使用
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# 接受的外部请求 ID：字母数字与 -_.:，最长 128 个字符；其余情况重新生成
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9\-_.:]{1,128}$")
+
+
+class JSONCharsetMiddleware:
+    """为指定路径前缀下的 JSON 响应补充 charset=utf-8，不影响文档页面与流式响应"""
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_charset(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                content_type = headers.get("content-type", "")
+                if content_type.startswith("application/json") and "charset" not in content_type:
+                    headers["content-type"] = "application/json; charset=utf-8"
+            await send(message)
+
+        await self.app(scope, receive, send_with_charset)
+
+
+class TimingMiddleware:
+    """以 X-Process-Time 响应头报告从收到请求到发出响应头的耗时（毫秒）"""
+
+    def __init__(self, app: ASGIApp, header_name: str = "x-process-time"):
+        self.app = app
+        self.header_name = header_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                MutableHeaders(scope=message).append(self.header_name, f"{elapsed_ms:.2f}")
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+class RequestIDMiddleware:
+    """透传合法的 X-Request-ID 请求头，缺失或不合法时生成新 ID，并写回响应头"""
+
+    def __init__(self, app: ASGIApp, header_name: str = "x-request-id"):
+        self.app = app
+        self.header_name = header_name
+        self._header_key = header_name.encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = self._incoming_request_id(scope) or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.header_name] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+    def _incoming_request_id(self, scope: Scope) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == self._header_key:
+                candidate = value.decode("latin-1")
+                return candidate if _REQUEST_ID_PATTERN.match(candidate) else None
+        return None
+
+
+class ServerTimingMiddleware:
+    """为指定路径前缀下的响应添加 Server-Timing 头
+
+    分项耗时由请求处理过程中的 record_timing 累加（见 app.utils.request_timing），
+    在 http.response.start 时输出；流式响应只包含响应开始前的分项。
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/v1/ask"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("server-timing", timings.header_value())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            current_timings.reset(token)
+
+
+class ProfilingMiddleware:
+    """对单个请求做统计采样分析，折叠栈写入 output_dir/<时间>-<请求 ID>.folded
+
+    触发条件（二者之一）：
+    - 请求头 X-Profile: 1 且 X-Admin-Token 与 admin_token 一致（admin_token 为空时不接受）
+    - 按 sample_rate 随机抽样
+
+    同一时刻只分析一个请求，其余请求照常处理；被分析的请求响应头带 X-Profile-Id（文件名）。
+    采样线程读取的是事件循环线程的调用栈，并发请求的活动同样会出现在结果中。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        output_dir: str = "profiles",
+        admin_token: str = "",
+        sample_rate: float = 0.0,
+        interval_ms: float = 5.0,
+        path_prefix: str = "/api/",
+    ):
+        self.app = app
+        self.output_dir = Path(output_dir)
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.path_prefix = path_prefix
+        self._active = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix) or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            request_id = scope.get("state", {}).get("request_id") or uuid.uuid4().hex
+            profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{request_id}"
+
+            async def send_with_profile_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)["x-profile-id"] = profile_id
+                await send(message)
+
+            sampler = StackSampler(interval=self.interval).start()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                # 停止采样需等待采样线程退出，与写文件一起放到线程池，不阻塞事件循环
+                await asyncio.to_thread(self._finish, sampler, profile_id)
+        finally:
+            self._active.release()
+
+    def _should_profile(self, scope: Scope) -> bool:
+        headers = Headers(scope=scope)
+        if headers.get("x-profile") == "1" and self.admin_token:
+            return hmac.compare_digest(headers.get("x-admin-token", "").encode(), self.admin_token.encode())
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _finish(self, sampler: StackSampler, profile_id: str) -> None:
+        sampler.stop()
+        self._write(profile_id, sampler.folded())
+
+    def _write(self, profile_id: str, folded: str) -> None:
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            (self.output_dir / f"{profile_id}.folded").write_text(folded, encoding="utf-8")
+        except OSError as e:
+            logger.warning("写入分析结果失败 %s: %s", profile_id, e)
@@ -0,0 +1,223 @@
+"""应用指标定义
+
+问答各阶段耗时、各级缓存命中、上游请求状态与熔断/重试/对冲/并发隔离、LLM token 用量、兜底回答使用情况以及数据库连接池状态，
+统一登记到 metrics_registry，由 GET /metrics 以 Prometheus 文本格式输出。
+所有标签值均来自有限集合：阶段名、缓存名、上游名（pokeapi / doubao）、HTTP 状态码、SQL 操作类型、回答上下文名称。
+"""
+import time
+from typing import Any, Iterable, Tuple
+from sqlalchemy import event
+from app.utils.cache import cache_registry
+from app.utils.metrics import CallbackMetric, Counter, Histogram, metrics_registry
+from app.utils.request_timing import record_timing
+from app.utils.resilience import CLOSED, HALF_OPEN, OPEN, upstream_registry
+
+# 问答阶段：intent（意图解析）、answer_cache（问答缓存查询）、fetch（数据获取整体）、
+# pokemon / species / evolution（数据获取流水线的各阶段）、generate（回答生成）、total（整个问答）
+QA_STAGE_SECONDS = metrics_registry.register(Histogram(
+    "pokedex_qa_stage_duration_seconds",
+    "Latency of each DexQAService stage",
+    ("stage",),
+))
+
+FALLBACK_ANSWERS = metrics_registry.register(Counter(
+    "pokedex_fallback_answers_total",
+    "Answers served by the data-based fallback instead of the LLM",
+    ("mode",),
+))
+
+# 每次 LLM 调用的 token 数（取自响应的 usage）：call 为 intent（意图解析）/ answer（回答生成），
+# context 为回答上下文（意图类型或 full，见 app.utils.prompt_context；意图解析为 none），kind 为 prompt / completion
+LLM_TOKENS = metrics_registry.register(Histogram(
+    "pokedex_llm_tokens",
+    "Tokens per LLM call by call, answer context and kind",
+    ("call", "context", "kind"),
+    buckets=(25, 50, 100, 200, 400, 800, 1600, 3200),
+))
+
+# 输出达到 max_completion_tokens 被截断（finish_reason=length）的 LLM 调用
+LLM_TRUNCATED = metrics_registry.register(Counter(
+    "pokedex_llm_truncated_total",
+    "LLM calls cut off by max_completion_tokens",
+    ("call", "context"),
+))
+
+# 数据库缓存层（pokemon / species / evolution_chain / answer）的命中情况；内存层见 pokedex_memory_cache_*
+DB_CACHE_REQUESTS = metrics_registry.register(Counter(
+    "pokedex_db_cache_requests_total",
+    "Database cache tier lookups by cache and result",
+    ("cache", "result"),
+))
+
+# 推测性预取结果：hit（猜中）、wasted（猜错，已取消）、no_guess（无法猜测，未预取）
+SPECULATIVE_PREFETCH = metrics_registry.register(Counter(
+    "pokedex_speculative_prefetch_total",
+    "Speculative data prefetches started during LLM intent parsing, by outcome",
+    ("result",),
+))
+
+UPSTREAM_REQUESTS = metrics_registry.register(Counter(
+    "pokedex_upstream_requests_total",
+    "Outbound requests by upstream and HTTP status (error / timeout for transport failures)",
+    ("upstream", "status"),
+))
+
+UPSTREAM_SECONDS = metrics_registry.register(Histogram(
+    "pokedex_upstream_request_duration_seconds",
+    "Outbound request latency by upstream",
+    ("upstream",),
+))
+
+# 上游容错事件：retry（GET 重试）、hedge（发出对冲请求）、hedge_won（对冲请求先返回）
+UPSTREAM_RESILIENCE_EVENTS = metrics_registry.register(Counter(
+    "pokedex_upstream_resilience_events_total",
+    "Upstream retries and hedged requests",
+    ("upstream", "event"),
+))
+
+# 等待上游并发名额的时间（立即获得名额记为 0）；等待超时被拒绝的请求记入 pokedex_upstream_requests_total{status="bulkhead_full"}
+UPSTREAM_BULKHEAD_WAIT_SECONDS = metrics_registry.register(Histogram(
+    "pokedex_upstream_bulkhead_wait_seconds",
+    "Time outbound requests waited for a per-upstream concurrency slot",
+    ("upstream",),
+))
+
+# 问答准入控制：admitted（直接获得名额）、queued（排队后获得名额）、cache_hit（缓存命中不占名额放行）、
+# queue_full / deadline / timeout（过载拒绝，503）、rate_limited（客户端限流，429）
+ADMISSION_DECISIONS = metrics_registry.register(Counter(
+    "pokedex_admission_decisions_total",
+    "Admission control decisions for /api/v1/ask",
+    ("result",),
+))
+
+ADMISSION_QUEUE_SECONDS = metrics_registry.register(Histogram(
+    "pokedex_admission_queue_wait_seconds",
+    "Time admitted requests spent in the admission queue",
+    (),
+))
+
+DB_QUERY_SECONDS = metrics_registry.register(Histogram(
+    "pokedex_db_query_duration_seconds",
+    "Database statement latency by operation",
+    ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+
+# 记入 operation 标签的 SQL 操作；其余归为 OTHER
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _memory_cache_samples(field: str) -> Iterable[Tuple[Tuple[str, ...], float]]:
+    for name, cache in cache_registry.items():
+        yield (name,), getattr(cache, field)
+
+
+def _memory_cache_entries() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    for name, cache in cache_registry.items():
+        yield (name,), len(cache)
+
+
+def _memory_cache_requests() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    for name, cache in cache_registry.items():
+        yield (name, "hit"), cache.hits
+        yield (name, "miss"), cache.misses
+
+
+metrics_registry.register(CallbackMetric(
+    "pokedex_memory_cache_requests_total",
+    "In-process cache lookups by cache and result",
+    "counter", ("cache", "result"), _memory_cache_requests,
+))
+metrics_registry.register(CallbackMetric(
+    "pokedex_memory_cache_evictions_total",
+    "In-process cache LRU evictions",
+    "counter", ("cache",), lambda: _memory_cache_samples("evictions"),
+))
+metrics_registry.register(CallbackMetric(
+    "pokedex_memory_cache_entries",
+    "In-process cache size",
+    "gauge", ("cache",), _memory_cache_entries,
+))
+
+
+def _circuit_breaker_states() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    for name, guard in upstream_registry.items():
+        for state in (CLOSED, HALF_OPEN, OPEN):
+            yield (name, state), 1 if guard.breaker.state == state else 0
+
+
+metrics_registry.register(CallbackMetric(
+    "pokedex_circuit_breaker_state",
+    "Upstream circuit breaker state (1 for the current state)",
+    "gauge", ("upstream", "state"), _circuit_breaker_states,
+))
+
+
+def _upstream_bulkheads() -> Iterable[Tuple[Tuple[str, ...], float]]:
+    for name, guard in upstream_registry.items():
+        if guard.bulkhead is not None:
+            yield (name, "in_flight"), guard.bulkhead.in_flight
+            yield (name, "queued"), guard.bulkhead.queued
+
+
+metrics_registry.register(CallbackMetric(
+    "pokedex_upstream_bulkhead_requests",
+    "Outbound requests holding (in_flight) or waiting for (queued) a per-upstream concurrency slot",
+    "gauge", ("upstream", "state"), _upstream_bulkheads,
+))
+
+
+def sql_operation(statement: str) -> str:
+    """SQL 语句的操作类型（SELECT / INSERT / UPDATE / DELETE / OTHER）"""
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in _SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: Any) -> None:
+    """为异步引擎登记语句耗时与连接池指标
+
+    语句耗时通过 before/after_cursor_execute 事件测量（异步驱动下同样触发），
+    同时计入当前请求 Server-Timing 的 db 分项；
+    连接池状态在采集时读取，StaticPool 等不提供统计的连接池不输出样本。
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            elapsed = time.perf_counter() - starts.pop()
+            DB_QUERY_SECONDS.labels(sql_operation(statement)).observe(elapsed)
+            record_timing("db", elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    def pool_samples() -> Iterable[Tuple[Tuple[str, ...], float]]:
+        pool = sync_engine.pool
+        for state, method in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+            if callable(getattr(pool, method, None)):
+                # QueuePool.overflow() 在池未满时为负数（-空闲容量），只报告实际溢出的连接数
+                yield (state,), max(0, getattr(pool, method)())
+
+    metrics_registry.register(CallbackMetric(
+        "pokedex_db_pool_connections",
+        "Database connection pool state",
+        "gauge", ("state",), pool_samples,
+    ))
+
+
+def instrument_admission(controller: Any) -> None:
+    """登记准入控制器的名额占用与排队数"""
+    metrics_registry.register(CallbackMetric(
+        "pokedex_admission_requests",
+        "Requests holding an admission slot or waiting in the queue",
+        "gauge", ("state",), lambda: [(("in_flight",), controller.in_flight), (("queued",), controller.queued)],
+    ))
@@ -0,0 +1,64 @@
+"""轻量数据库迁移
+
+项目未引入迁移框架，表结构由 Base.metadata.create_all 创建；create_all 不会为已存在的表
+追加新列，因此新增列及其数据回填在此以幂等方式执行，启动时与预加载命令中调用。
+"""
+import logging
+from typing import Any, Callable, Dict
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.db.models import Pokemon, PokemonSpecies
+from app.utils.pokemon_projection import project_pokemon, project_species
+
+logger = logging.getLogger(__name__)
+
+# 每批回填的行数
+BACKFILL_BATCH_SIZE = 200
+
+# 表 -> 需要存在的列及其 DDL 类型
+REQUIRED_COLUMNS = {
+    "pokemon": {"summary": "JSON"},
+    "pokemon_species": {"summary": "JSON"},
+}
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    """补齐缺失的列并回填精简投影"""
+    await conn.run_sync(_add_missing_columns)
+    for model, project in ((Pokemon, project_pokemon), (PokemonSpecies, project_species)):
+        count = await backfill_summaries(conn, model, project)
+        if count:
+            logger.info(f"已回填 {model.__tablename__}.summary: {count} 行")
+
+
+def _add_missing_columns(sync_conn) -> None:
+    inspector = inspect(sync_conn)
+    for table, columns in REQUIRED_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        for column, ddl_type in columns.items():
+            if column not in existing:
+                sync_conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+async def backfill_summaries(conn: AsyncConnection, model, project: Callable[[Dict[str, Any]], Dict[str, Any]]) -> int:
+    """为 summary 为空的行从完整数据计算投影（分批执行，不改变 updated_at）
+
+    Returns:
+        回填的行数
+    """
+    table = model.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(summary=bindparam("row_summary"), updated_at=table.c.updated_at)
+    )
+    total = 0
+    while True:
+        result = await conn.execute(
+            select(table.c.id, table.c.data).where(table.c.summary.is_(None)).limit(BACKFILL_BATCH_SIZE)
+        )
+        rows = result.all()
+        if not rows:
+            return total
+        await conn.execute(statement, [{"row_id": row.id, "row_summary": project(row.data or {})} for row in rows])
+        total += len(rows)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -11,6 +11,7 @@ class Pokemon(Base):
     id = Column(Integer, primary_key=True, index=True, comment="宝可梦 ID，对应 PokeAPI ID")
     name = Column(String(64), unique=True, index=True, comment="宝可梦英文名（小写）")
     data = Column(JSON, comment="/pokemon/{name} 接口返回的完整 JSON 数据")
+    summary = Column(JSON, comment="问答所需字段的精简投影（保存时由完整数据计算）")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="数据更新时间")
 
 
@@ -21,4 +22,30 @@ class PokemonSpecies(Base):
     id = Column(Integer, primary_key=True, index=True, comment="宝可梦物种 ID，对应 PokeAPI species ID")
     name = Column(String(64), unique=True, index=True, comment="宝可梦物种英文名（小写）")
     data = Column(JSON, comment="/pokemon-species/{name} 接口返回的完整 JSON 数据")
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="数据更新时间")
\ No newline at end of file
+    summary = Column(JSON, comment="问答所需字段的精简投影（保存时由完整数据计算）")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="数据更新时间")
+
+class EvolutionChain(Base):
+    """进化链数据模型 - 缓存 /evolution-chain API 返回的数据"""
+    __tablename__ = "evolution_chain"
+    
+    id = Column(Integer, primary_key=True, index=True, comment="进化链 ID，对应 PokeAPI evolution-chain ID")
+    data = Column(JSON, comment="/evolution-chain/{id} 接口返回的完整 JSON 数据")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="数据更新时间")
+
+class AnswerCache(Base):
+    """问答结果缓存 - 按归一化问题 + 解析意图 + 提示词/模型版本缓存 LLM 回答"""
+    __tablename__ = "answer_cache"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String(64), unique=True, index=True, comment="缓存键（归一化问题、意图、提示词版本、模型的 SHA-256）")
+    pokemon_name = Column(String(64), index=True, comment="宝可梦英文名（小写），数据变更时按此失效")
+    intent_type = Column(String(32), comment="意图类型")
+    detail_level = Column(String(16), comment="详细程度")
+    question = Column(Text, comment="归一化后的用户问题")
+    prompt_version = Column(String(32), comment="回答提示词版本")
+    model = Column(String(128), comment="生成回答的模型")
+    pokemon_id = Column(Integer, comment="宝可梦 ID")
+    answer = Column(Text, comment="生成的自然语言回答")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="缓存写入时间")
+    expires_at = Column(DateTime(timezone=True), index=True, comment="缓存过期时间")
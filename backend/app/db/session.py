@@ -1,31 +1,66 @@
 """数据库会话与引擎管理
 
-职责：提供 SQLAlchemy 引擎与会话工厂，并以依赖的形式在路由中注入 Session。
+职责：提供 SQLAlchemy 异步引擎与会话工厂，并以依赖的形式在路由中注入 AsyncSession。
+数据库 I/O 通过异步驱动（MySQL: aiomysql，本地/测试: aiosqlite）完成，不阻塞事件循环。
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Any, Awaitable, Callable
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
+from app.core.observability import instrument_engine
+from app.utils.fast_json import dumps, loads
 
-# 创建数据库引擎（连接池与预检查）
-engine = create_engine(
-    settings.database_url,
+
+def _pool_options(url: str) -> dict:
+    """连接池参数：SQLite 内存库使用 StaticPool，不支持池大小配置"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+    }
+
+
+# 创建异步数据库引擎（连接池与预检查；JSON 列使用 fast_json 编解码）
+engine = create_async_engine(
+    settings.async_database_url,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    json_serializer=dumps,
+    json_deserializer=loads,
+    **_pool_options(settings.async_database_url),
 )
+# 语句耗时与连接池状态指标（见 /metrics）
+instrument_engine(engine)
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 创建异步会话工厂（提交后不过期对象，避免在事件循环外触发隐式懒加载）
+AsyncSessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 
-def get_db():
+async def get_db():
     """获取数据库会话的依赖函数
 
     使用 `yield` 保证请求完成后自动关闭会话。
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+def sibling_session(db: AsyncSession) -> AsyncSession:
+    """创建与 db 绑定同一引擎的独立会话
+
+    AsyncSession 不允许并发操作；并发执行的阶段各自使用独立会话。
+    """
+    return AsyncSessionLocal(bind=db.bind)
+
+
+async def run_in_sibling_session(db: AsyncSession, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """在与 db 同引擎的独立会话中执行 func(session, *args)，结束后关闭该会话"""
+    async with sibling_session(db) as own_db:
+        return await func(own_db, *args)
@@ -0,0 +1,51 @@
+"""方言原生的批量 upsert
+
+- MySQL：INSERT ... ON DUPLICATE KEY UPDATE
+- SQLite / PostgreSQL：INSERT ... ON CONFLICT (主键) DO UPDATE
+一条语句写入一批记录，冲突行就地更新，无需先 SELECT，也不存在并发下“查无 → 插入冲突”的竞态。
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 支持原生 upsert 的方言 -> insert 构造函数
+_DIALECT_INSERTS = {
+    "mysql": mysql.insert,
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def supports_upsert(db: AsyncSession) -> bool:
+    """当前会话绑定的数据库是否支持原生 upsert"""
+    return db.bind.dialect.name in _DIALECT_INSERTS
+
+
+def build_upsert(db: AsyncSession, model, rows: List[Dict[str, Any]], update_columns: Sequence[str]) -> Optional[Any]:
+    """构造批量 upsert 语句
+
+    Args:
+        db: 数据库会话（用于判断方言）
+        model: ORM 模型（以主键判断冲突；其他唯一列的冲突不处理，由调用方在写入前消除）
+        rows: 待写入的行
+        update_columns: 冲突时更新的列；如模型有 updated_at 列，则同时刷新为当前时间
+
+    Returns:
+        upsert 语句；方言不支持时返回 None
+    """
+    dialect = db.bind.dialect.name
+    insert = _DIALECT_INSERTS.get(dialect)
+    if insert is None:
+        return None
+    statement = insert(model).values(rows)
+    if dialect == "mysql":
+        values = {column: statement.inserted[column] for column in update_columns}
+    else:
+        values = {column: statement.excluded[column] for column in update_columns}
+    if "updated_at" in model.__table__.c:
+        values["updated_at"] = func.now()
+    if dialect == "mysql":
+        return statement.on_duplicate_key_update(**values)
+    primary_key = [column.name for column in model.__table__.primary_key.columns]
+    return statement.on_conflict_do_update(index_elements=primary_key, set_=values)
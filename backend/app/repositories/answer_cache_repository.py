@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import AnswerCache
+
+
+def _utcnow() -> datetime:
+    """当前 UTC 时间（无时区信息，MySQL DATETIME / SQLite 均按此存储与比较）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class AnswerCacheRepository:
+    """问答缓存数据仓库 - 处理 answer_cache 表的读写与失效"""
+    
+    @staticmethod
+    async def get_answer(db: AsyncSession, cache_key: str) -> Optional[Dict[str, Any]]:
+        """获取未过期的缓存回答
+        
+        Args:
+            db: 数据库会话
+            cache_key: 缓存键
+        
+        Returns:
+            {"answer", "pokemon_name", "pokemon_id"}，不存在或已过期时返回 None
+        """
+        result = await db.execute(
+            select(AnswerCache.answer, AnswerCache.pokemon_name, AnswerCache.pokemon_id)
+            .where(AnswerCache.cache_key == cache_key, AnswerCache.expires_at > _utcnow())
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return {"answer": row.answer, "pokemon_name": row.pokemon_name, "pokemon_id": row.pokemon_id}
+    
+    @staticmethod
+    async def save_answer(db: AsyncSession, cache_key: str, entry: Dict[str, Any], ttl_seconds: float) -> None:
+        """写入（或覆盖）缓存回答
+        
+        Args:
+            db: 数据库会话
+            cache_key: 缓存键
+            entry: 包含 answer/pokemon_name/pokemon_id/intent_type/detail_level/question/prompt_version/model 的字典
+            ttl_seconds: 有效期（秒）
+        """
+        result = await db.execute(select(AnswerCache).where(AnswerCache.cache_key == cache_key))
+        existing = result.scalars().first()
+        if existing is None:
+            existing = AnswerCache(cache_key=cache_key)
+            db.add(existing)
+        for field in ("answer", "pokemon_name", "pokemon_id", "intent_type", "detail_level", "question", "prompt_version", "model"):
+            setattr(existing, field, entry.get(field))
+        existing.expires_at = _utcnow() + timedelta(seconds=ttl_seconds)
+        await db.commit()
+    
+    @staticmethod
+    async def delete_for_pokemon(db: AsyncSession, pokemon_name: str) -> None:
+        """删除某只宝可梦的全部缓存回答（不提交，由调用方在同一事务中提交）
+        
+        Args:
+            db: 数据库会话
+            pokemon_name: 宝可梦英文名
+        """
+        await db.execute(delete(AnswerCache).where(AnswerCache.pokemon_name == pokemon_name.lower()))
+    
+    @staticmethod
+    async def delete_for_pokemons(db: AsyncSession, pokemon_names: Iterable[str]) -> None:
+        """批量删除多只宝可梦的缓存回答（不提交，由调用方在同一事务中提交）
+        
+        Args:
+            db: 数据库会话
+            pokemon_names: 宝可梦英文名列表
+        """
+        names = {name.lower() for name in pokemon_names}
+        if names:
+            await db.execute(delete(AnswerCache).where(AnswerCache.pokemon_name.in_(names)))
+    
+    @staticmethod
+    async def delete_all(db: AsyncSession) -> None:
+        """清空问答缓存表"""
+        await db.execute(delete(AnswerCache))
+        await db.commit()
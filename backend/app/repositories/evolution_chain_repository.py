@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional, Set
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import EvolutionChain
+from app.db.upsert import build_upsert
+
+
+class EvolutionChainRepository:
+    """进化链数据仓库 - 处理 evolution_chain 表的读写"""
+    
+    @staticmethod
+    async def get_evolution_chain(db: AsyncSession, chain_id: int) -> Optional[Dict[str, Any]]:
+        """获取进化链数据
+        
+        Args:
+            db: 数据库会话
+            chain_id: 进化链 ID
+        
+        Returns:
+            进化链数据，如果不存在则返回 None
+        """
+        result = await db.execute(select(EvolutionChain.data).where(EvolutionChain.id == chain_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def list_evolution_chains(db: AsyncSession) -> List[Dict[str, Any]]:
+        """获取数据库中已缓存的全部进化链数据
+        
+        Args:
+            db: 数据库会话
+        
+        Returns:
+            进化链数据列表
+        """
+        result = await db.execute(select(EvolutionChain.data))
+        return [data for data in result.scalars().all() if data]
+    
+    @staticmethod
+    async def iter_evolution_chains(db: AsyncSession, batch_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """按 ID 顺序逐条产出已缓存的进化链数据（流式读取，每次取 batch_size 行）"""
+        result = await db.stream_scalars(
+            select(EvolutionChain.data).order_by(EvolutionChain.id).execution_options(yield_per=batch_size)
+        )
+        async for data in result:
+            if data:
+                yield data
+    
+    @staticmethod
+    async def save_evolution_chain(db: AsyncSession, chain_data: Dict[str, Any]) -> None:
+        """保存进化链数据到数据库（单条 upsert 语句，已存在则更新）
+        
+        Args:
+            db: 数据库会话
+            chain_data: 进化链数据
+        """
+        await EvolutionChainRepository.save_many_evolution_chains(db, [chain_data])
+    
+    @staticmethod
+    async def save_many_evolution_chains(db: AsyncSession, chain_list: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+        """批量保存进化链数据（每批一条 upsert 语句、一个事务）
+        
+        Args:
+            db: 数据库会话
+            chain_list: 进化链数据列表
+            batch_size: 每批记录数，默认取 settings.db_upsert_batch_size
+        
+        Returns:
+            保存的记录数
+        """
+        rows = list({data["id"]: {"id": data["id"], "data": data} for data in chain_list if data.get("id")}.values())
+        size = max(1, batch_size or settings.db_upsert_batch_size)
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            statement = build_upsert(db, EvolutionChain, batch, update_columns=("data",))
+            if statement is not None:
+                await db.execute(statement)
+            else:
+                result = await db.execute(select(EvolutionChain).where(EvolutionChain.id.in_([row["id"] for row in batch])))
+                existing = {record.id: record for record in result.scalars().all()}
+                for row in batch:
+                    if row["id"] in existing:
+                        existing[row["id"]].data = row["data"]
+                    else:
+                        db.add(EvolutionChain(**row))
+            await db.commit()
+        return len(rows)
+    
+    @staticmethod
+    async def list_evolution_chain_ids(db: AsyncSession, updated_after: Optional[datetime] = None) -> Set[int]:
+        """获取已缓存的进化链 ID（可限定为 updated_after 之后更新的记录）"""
+        query = select(EvolutionChain.id)
+        if updated_after is not None:
+            query = query.where(EvolutionChain.updated_at >= updated_after)
+        result = await db.execute(query)
+        return set(result.scalars().all())
@@ -1,97 +1,250 @@
-from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional, Set
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.db.models import Pokemon, PokemonSpecies
+from app.db.upsert import build_upsert
+from app.repositories.answer_cache_repository import AnswerCacheRepository
+from app.utils.pokemon_projection import is_current, project_pokemon, project_species, with_updated_at
 
 
 class PokemonRepository:
     """宝可梦数据仓库 - 处理数据库交互"""
     
     @staticmethod
-    async def get_pokemon(db: Session, name: str) -> Optional[Dict[str, Any]]:
-        """获取宝可梦数据
+    async def get_pokemon(db: AsyncSession, name: str) -> Optional[Dict[str, Any]]:
+        """获取宝可梦完整数据（data 列）
         
-        首先从数据库中查询，如果存在则返回，否则返回 None
+        首先从数据库中查询，如果存在则返回，否则返回 None。
+        问答热路径（PokemonService）不使用此方法，只读取精简投影（get_pokemon_summary）。
         
         Args:
             db: 数据库会话
             name: 宝可梦名称
         
         Returns:
-            宝可梦数据，如果不存在则返回 None
+            /pokemon 的完整 JSON，如果不存在则返回 None
         """
-        pokemon = db.query(Pokemon).filter(Pokemon.name == name.lower()).first()
-        return pokemon.data if pokemon else None
+        result = await db.execute(select(Pokemon.data).where(Pokemon.name == name.lower()))
+        return result.scalars().first()
     
     @staticmethod
-    async def save_pokemon(db: Session, pokemon_data: Dict[str, Any]) -> None:
-        """保存宝可梦数据到数据库
+    async def save_pokemon(db: AsyncSession, pokemon_data: Dict[str, Any]) -> None:
+        """保存宝可梦数据到数据库（单条 upsert 语句，已存在则更新）
         
         Args:
             db: 数据库会话
-            pokemon_data: 宝可梦数据
+            pokemon_data: 宝可梦数据（需包含 id 与 name）
         """
-        name = pokemon_data.get("name", "").lower()
-        if not name:
-            return
+        await PokemonRepository._save_many(db, Pokemon, [pokemon_data], project_pokemon)
+    
+    @staticmethod
+    async def get_pokemon_species(db: AsyncSession, name: str) -> Optional[Dict[str, Any]]:
+        """获取宝可梦物种完整数据（data 列）
+        
+        首先从数据库中查询，如果存在则返回，否则返回 None。
+        问答热路径（PokemonService）不使用此方法，只读取精简投影（get_species_summary）。
+        
+        Args:
+            db: 数据库会话
+            name: 宝可梦名称
+        
+        Returns:
+            /pokemon-species 的完整 JSON，如果不存在则返回 None
+        """
+        result = await db.execute(select(PokemonSpecies.data).where(PokemonSpecies.name == name.lower()))
+        return result.scalars().first()
+    
+    @staticmethod
+    async def get_pokemon_summary(db: AsyncSession, name: str) -> Optional[Dict[str, Any]]:
+        """获取宝可梦精简投影（问答热路径只读取投影，不加载完整 JSON）
         
-        # 检查是否已存在
-        existing = db.query(Pokemon).filter(Pokemon.name == name).first()
+        投影缺失或版本过旧时从完整数据重新计算并回写
         
-        if existing:
-            # 更新现有记录
-            existing.data = pokemon_data
-        else:
-            # 创建新记录
-            pokemon = Pokemon(
-                id=pokemon_data.get("id"),
-                name=name,
-                data=pokemon_data
-            )
-            db.add(pokemon)
+        Args:
+            db: 数据库会话
+            name: 宝可梦名称
         
-        db.commit()
+        Returns:
+            宝可梦投影，如果不存在则返回 None
+        """
+        return await PokemonRepository._get_summary(db, Pokemon, name, project_pokemon)
     
     @staticmethod
-    async def get_pokemon_species(db: Session, name: str) -> Optional[Dict[str, Any]]:
-        """获取宝可梦物种数据
+    async def get_species_summary(db: AsyncSession, name: str) -> Optional[Dict[str, Any]]:
+        """获取宝可梦物种精简投影（问答热路径只读取投影，不加载完整 JSON）
         
-        首先从数据库中查询，如果存在则返回，否则返回 None
+        投影缺失或版本过旧时从完整数据重新计算并回写
         
         Args:
             db: 数据库会话
             name: 宝可梦名称
         
         Returns:
-            宝可梦物种数据，如果不存在则返回 None
+            物种投影，如果不存在则返回 None
+        """
+        return await PokemonRepository._get_summary(db, PokemonSpecies, name, project_species)
+    
+    @staticmethod
+    async def list_species_summaries(db: AsyncSession) -> List[Dict[str, Any]]:
+        """获取数据库中已缓存的全部宝可梦物种精简投影
+        
+        Args:
+            db: 数据库会话
+        
+        Returns:
+            物种投影列表
         """
-        species = db.query(PokemonSpecies).filter(PokemonSpecies.name == name.lower()).first()
-        return species.data if species else None
+        result = await db.execute(select(PokemonSpecies.summary))
+        return [summary for summary in result.scalars().all() if summary]
     
     @staticmethod
-    async def save_pokemon_species(db: Session, species_data: Dict[str, Any]) -> None:
-        """保存宝可梦物种数据到数据库
+    async def save_pokemon_species(db: AsyncSession, species_data: Dict[str, Any]) -> None:
+        """保存宝可梦物种数据到数据库（单条 upsert 语句，已存在则更新）
         
         Args:
             db: 数据库会话
-            species_data: 宝可梦物种数据
+            species_data: 宝可梦物种数据（需包含 id 与 name）
         """
-        name = species_data.get("name", "").lower()
-        if not name:
-            return
-        
-        # 检查是否已存在
-        existing = db.query(PokemonSpecies).filter(PokemonSpecies.name == name).first()
-        
-        if existing:
-            # 更新现有记录
-            existing.data = species_data
-        else:
-            # 创建新记录
-            species = PokemonSpecies(
-                id=species_data.get("id"),
-                name=name,
-                data=species_data
-            )
-            db.add(species)
-        
-        db.commit()
\ No newline at end of file
+        await PokemonRepository._save_many(db, PokemonSpecies, [species_data], project_species)
+    
+    @staticmethod
+    async def save_many_pokemon(db: AsyncSession, pokemon_list: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+        """批量保存宝可梦数据（每批一条 upsert 语句、一个事务）
+        
+        Args:
+            db: 数据库会话
+            pokemon_list: 宝可梦数据列表
+            batch_size: 每批记录数，默认取 settings.db_upsert_batch_size
+        
+        Returns:
+            保存的记录数
+        """
+        return await PokemonRepository._save_many(db, Pokemon, pokemon_list, project_pokemon, batch_size)
+    
+    @staticmethod
+    async def save_many_species(db: AsyncSession, species_list: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+        """批量保存宝可梦物种数据（每批一条 upsert 语句、一个事务）
+        
+        Args:
+            db: 数据库会话
+            species_list: 宝可梦物种数据列表
+            batch_size: 每批记录数，默认取 settings.db_upsert_batch_size
+        
+        Returns:
+            保存的记录数
+        """
+        return await PokemonRepository._save_many(db, PokemonSpecies, species_list, project_species, batch_size)
+    
+    @staticmethod
+    async def list_pokemon_ids(db: AsyncSession, updated_after: Optional[datetime] = None) -> Set[int]:
+        """获取已缓存的宝可梦 ID（可限定为 updated_after 之后更新的记录）"""
+        return await PokemonRepository._list_ids(db, Pokemon, updated_after)
+    
+    @staticmethod
+    async def list_species_ids(db: AsyncSession, updated_after: Optional[datetime] = None) -> Set[int]:
+        """获取已缓存的物种 ID（可限定为 updated_after 之后更新的记录）"""
+        return await PokemonRepository._list_ids(db, PokemonSpecies, updated_after)
+    
+    @staticmethod
+    async def iter_pokemon_data(db: AsyncSession, batch_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """按 ID 顺序逐条产出已缓存的宝可梦完整数据（流式读取，每次取 batch_size 行）"""
+        async for data in PokemonRepository._iter_data(db, Pokemon, batch_size):
+            yield data
+    
+    @staticmethod
+    async def iter_species_data(db: AsyncSession, batch_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """按 ID 顺序逐条产出已缓存的物种完整数据（流式读取，每次取 batch_size 行）"""
+        async for data in PokemonRepository._iter_data(db, PokemonSpecies, batch_size):
+            yield data
+    
+    @staticmethod
+    async def _iter_data(db: AsyncSession, model, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        result = await db.stream_scalars(select(model.data).order_by(model.id).execution_options(yield_per=batch_size))
+        async for data in result:
+            if data:
+                yield data
+    
+    @staticmethod
+    async def _save_many(db: AsyncSession, model, data_list: Iterable[Dict[str, Any]], project, batch_size: Optional[int] = None) -> int:
+        """按主键分批 upsert，并在同一事务中失效相关缓存回答
+        
+        缺少 id 或 name 的记录被忽略；同一批内重复的 id 或 name 以最后一条为准。
+        id（PokeAPI ID）是记录的标识：name 已被其他 id 的记录占用时，先删除该旧记录再写入，
+        不因 name 的唯一约束冲突而使整批写入失败。
+        """
+        rows_by_id: Dict[int, Dict[str, Any]] = {}
+        for data in data_list:
+            if data.get("id") and data.get("name"):
+                rows_by_id[data["id"]] = {
+                    "id": data["id"],
+                    "name": data["name"].lower(),
+                    "data": data,
+                    "summary": project(data)
+                }
+        rows = list({row["name"]: row for row in rows_by_id.values()}.values())
+        size = max(1, batch_size or settings.db_upsert_batch_size)
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            await PokemonRepository._delete_renamed(db, model, batch)
+            statement = build_upsert(db, model, batch, update_columns=("name", "data", "summary"))
+            if statement is not None:
+                await db.execute(statement)
+            else:
+                await PokemonRepository._merge_rows(db, model, batch)
+            # 底层数据变化后，基于旧数据生成的缓存回答随同一事务失效
+            await AnswerCacheRepository.delete_for_pokemons(db, (row["name"] for row in batch))
+            await db.commit()
+        return len(rows)
+    
+    @staticmethod
+    async def _delete_renamed(db: AsyncSession, model, rows: List[Dict[str, Any]]) -> None:
+        """删除与待写入记录同名但 id 不同的旧记录（upsert 只按主键判断冲突）"""
+        ids_by_name = {row["name"]: row["id"] for row in rows}
+        await db.execute(
+            delete(model)
+            .where(model.name.in_(list(ids_by_name)), model.id != case(ids_by_name, value=model.name))
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    async def _merge_rows(db: AsyncSession, model, rows: List[Dict[str, Any]]) -> None:
+        """不支持原生 upsert 的方言：按主键查出已存在记录后逐条新增或更新"""
+        result = await db.execute(select(model).where(model.id.in_([row["id"] for row in rows])))
+        existing = {record.id: record for record in result.scalars().all()}
+        for row in rows:
+            record = existing.get(row["id"])
+            if record is None:
+                db.add(model(**row))
+            else:
+                record.name, record.data, record.summary = row["name"], row["data"], row["summary"]
+    
+    @staticmethod
+    async def _list_ids(db: AsyncSession, model, updated_after: Optional[datetime]) -> Set[int]:
+        query = select(model.id)
+        if updated_after is not None:
+            query = query.where(model.updated_at >= updated_after)
+        result = await db.execute(query)
+        return set(result.scalars().all())
+    
+    @staticmethod
+    async def _get_summary(db: AsyncSession, model, name: str, project) -> Optional[Dict[str, Any]]:
+        """读取投影（附带记录的 updated_at）；缺失或过旧时读取完整数据重新计算并回写（不改变 updated_at）"""
+        key = name.lower()
+        result = await db.execute(select(model.summary, model.updated_at).where(model.name == key))
+        row = result.first()
+        if row is None:
+            return None
+        if is_current(row.summary):
+            return with_updated_at(row.summary, row.updated_at)
+        result = await db.execute(select(model.data).where(model.name == key))
+        data = result.scalars().first()
+        if not data:
+            return None
+        summary = project(data)
+        await db.execute(
+            update(model).where(model.name == key).values(summary=summary, updated_at=model.updated_at)
+        )
+        await db.commit()
+        return with_updated_at(summary, row.updated_at)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Optional, Any
+from typing import Annotated, Dict, List, Optional, Any
+from app.core.config import settings
 
 
 class AskRequest(BaseModel):
@@ -20,4 +21,35 @@ class AskResponse(BaseModel):
     answer: str = Field(..., description="自然语言回答")
     pokemon_name: Optional[str] = Field(None, description="识别出的宝可梦英文名")
     pokemon_id: Optional[int] = Field(None, description="宝可梦 ID")
-    intent: Optional[IntentSchema] = Field(None, description="意图解析结果")
\ No newline at end of file
+    intent: Optional[IntentSchema] = Field(None, description="意图解析结果")
+
+
+class AskBatchRequest(BaseModel):
+    """批量问答请求模型"""
+    questions: List[Annotated[str, Field(min_length=1)]] = Field(
+        ..., min_length=1, max_length=settings.batch_max_questions, description="问题列表（相同问题只处理一次）"
+    )
+    stream: bool = Field(False, description="为 true 时以 NDJSON 按完成顺序逐条返回")
+
+
+class BatchErrorSchema(BaseModel):
+    """批量问答单项错误"""
+    type: str = Field(..., description="异常类型")
+    message: str = Field(..., description="错误信息")
+    status_code: int = Field(..., description="单独请求时对应的 HTTP 状态码")
+
+
+class AskBatchItem(BaseModel):
+    """批量问答单项结果"""
+    index: int = Field(..., description="问题在请求列表中的下标")
+    question: str = Field(..., description="原始问题")
+    success: bool = Field(..., description="是否成功")
+    result: Optional[AskResponse] = Field(None, description="成功时的问答结果")
+    error: Optional[BatchErrorSchema] = Field(None, description="失败时的错误信息")
+
+
+class AskBatchResponse(BaseModel):
+    """批量问答响应模型"""
+    results: List[AskBatchItem] = Field(..., description="按请求顺序排列的结果")
+    succeeded: int = Field(..., description="成功数")
+    failed: int = Field(..., description="失败数")
@@ -0,0 +1,125 @@
+"""问答缓存服务
+
+两级缓存：进程内 LRU（内存层）→ answer_cache 表（数据库层）。
+缓存键由归一化问题、解析出的意图（pokemon_name / intent_type / detail_level）、
+回答提示词版本与模型名共同决定：提示词或模型变化后旧回答自然失效；
+宝可梦/物种数据更新时，仓库层在同一事务中删除相关回答，服务层同步清理内存层。
+"""
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.clients.doubao_client import ANSWER_PROMPT_VERSION
+from app.core.config import settings
+from app.core.observability import DB_CACHE_REQUESTS
+from app.repositories.answer_cache_repository import AnswerCacheRepository
+from app.utils.cache import LRUTTLCache, register_cache
+from app.utils.question import normalize_question
+
+logger = logging.getLogger(__name__)
+
+# 进程内回答缓存（内存层）：cache_key -> {"answer", "pokemon_name", "pokemon_id"}
+answer_memory_cache = register_cache(LRUTTLCache(
+    "answer",
+    max_entries=settings.answer_cache_max_entries,
+    ttl_seconds=settings.answer_cache_ttl_seconds
+))
+
+
+class AnswerCacheService:
+    """问答结果缓存服务"""
+
+    def __init__(self):
+        self.memory_cache = answer_memory_cache
+        self.answer_cache_repository = AnswerCacheRepository()
+
+    @staticmethod
+    def build_cache_key(question: str, intent: Dict[str, Any]) -> str:
+        """计算缓存键
+
+        Args:
+            question: 用户原始问题（内部归一化）
+            intent: 意图解析结果
+
+        Returns:
+            64 位十六进制 SHA-256 摘要
+        """
+        parts = [
+            normalize_question(question),
+            (intent.get("pokemon_name") or "").lower(),
+            intent.get("intent_type") or "",
+            intent.get("detail_level") or "",
+            ANSWER_PROMPT_VERSION,
+            settings.doubao_model,
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    async def get_answer(self, db: AsyncSession, question: str, intent: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """查询缓存回答：内存层 → 数据库层（命中后回填内存层）
+
+        Returns:
+            {"answer", "pokemon_name", "pokemon_id"}；未命中或缓存关闭时返回 None
+        """
+        if not settings.answer_cache_enabled:
+            return None
+        cache_key = self.build_cache_key(question, intent)
+        entry = self.memory_cache.get(cache_key)
+        if entry is not None:
+            return entry
+        try:
+            entry = await self.answer_cache_repository.get_answer(db, cache_key)
+        except Exception as e:
+            # 缓存仅为加速手段：数据库层故障按未命中处理
+            logger.warning(f"读取问答缓存失败: {str(e)}")
+            await db.rollback()
+            return None
+        DB_CACHE_REQUESTS.labels("answer", "hit" if entry is not None else "miss").inc()
+        if entry is not None:
+            self.memory_cache.set(cache_key, entry)
+        return entry
+
+    def has_cached_answer(self, question: str, intent: Dict[str, Any]) -> bool:
+        """内存层中是否有该问题的缓存回答（不查数据库，不计入统计）"""
+        return settings.answer_cache_enabled and self.build_cache_key(question, intent) in self.memory_cache
+
+    async def save_answer(self, db: AsyncSession, question: str, intent: Dict[str, Any], answer: str, pokemon_id: Optional[int]) -> None:
+        """写入两级缓存
+
+        Args:
+            db: 数据库会话
+            question: 用户原始问题
+            intent: 意图解析结果
+            answer: LLM 生成的回答（兜底回答不应写入）
+            pokemon_id: 宝可梦 ID
+        """
+        if not settings.answer_cache_enabled:
+            return
+        cache_key = self.build_cache_key(question, intent)
+        pokemon_name = (intent.get("pokemon_name") or "").lower()
+        entry = {"answer": answer, "pokemon_name": pokemon_name, "pokemon_id": pokemon_id}
+        self.memory_cache.set(cache_key, entry)
+        try:
+            await self.answer_cache_repository.save_answer(db, cache_key, {
+                **entry,
+                "intent_type": intent.get("intent_type"),
+                "detail_level": intent.get("detail_level"),
+                "question": normalize_question(question),
+                "prompt_version": ANSWER_PROMPT_VERSION,
+                "model": settings.doubao_model,
+            }, ttl_seconds=settings.answer_cache_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"写入问答缓存失败: {str(e)}")
+            await db.rollback()
+
+    def forget_pokemon(self, pokemon_name: str) -> int:
+        """清除内存层中某只宝可梦的全部回答（数据库层由仓库在写入数据时同步删除）
+
+        Returns:
+            被清除的条目数
+        """
+        name = pokemon_name.lower()
+        return self.memory_cache.invalidate_where(lambda _, entry: entry.get("pokemon_name") == name)
+
+
+# 进程内共享实例
+answer_cache_service = AnswerCacheService()
@@ -1,12 +1,38 @@
 """图鉴问答服务
 
-职责：编排意图解析 → 数据获取（PokeAPI/缓存） → 回答生成（Doubao/兜底）。
+职责：编排意图解析 → 问答缓存 → 数据获取（PokeAPI/缓存） → 回答生成（Doubao/兜底）。
+数据获取阶段由 FetchPipeline 并发执行：pokemon 与 species 互不依赖、同时发起，
+进化链（仅 evolution 意图需要）在 species 就绪后立即获取，进化关系图命中时不访问数据库或网络。
+意图需要 LLM 解析时，按问题中猜测的宝可梦名称在解析期间推测性预取数据，猜中则数据获取
+直接加入进行中的加载，猜错则取消预取。
+批量问答在同一流程上按归一化问题去重、以受限并发执行；不同问题对同一宝可梦的数据获取
+经内存缓存与单飞合并共享。
+各阶段耗时记入 pokedex_qa_stage_duration_seconds（见 app.core.observability），
+意图解析耗时同时计入当前请求的 Server-Timing（见 app.utils.request_timing）。
 """
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+import asyncio
+from contextlib import nullcontext
+from typing import AsyncContextManager, AsyncIterator, Callable, Dict, Any, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.clients.doubao_client import DoubaoClient
+from app.core.config import settings
+from app.core.exception_handler import describe_exception
+from app.core.exceptions import LLMError
+from app.core.observability import FALLBACK_ANSWERS, QA_STAGE_SECONDS, SPECULATIVE_PREFETCH
+from app.db.session import run_in_sibling_session
+from app.services.answer_cache_service import answer_cache_service
+from app.services.fetch_pipeline import FetchPipeline
 from app.services.intent_parser_service import IntentParserService
 from app.services.pokemon_service import PokemonService
+from app.utils.question import normalize_question
+from app.utils.request_timing import timing_stage
+from app.utils.single_flight import SingleFlight
+
+# 需要进化链数据的意图类型
+EVOLUTION_INTENT_TYPES = {"evolution"}
+
+# 相同问题（归一化后）的并发请求只处理一次，共享回答
+question_flight = SingleFlight("question")
 
 
 class DexQAService:
@@ -16,45 +42,274 @@ class DexQAService:
         self.intent_parser_service = IntentParserService()
         self.pokemon_service = PokemonService()
         self.doubao_client = DoubaoClient()
+        self.answer_cache_service = answer_cache_service
+        self.question_flight = question_flight
     
-    async def answer_question(self, db: Session, question: str) -> Dict[str, Any]:
+    async def answer_question(self, db: AsyncSession, question: str) -> Dict[str, Any]:
         """回答用户的宝可梦问题
         
+        同一问题的并发请求合并为一次处理，所有请求共享结果或异常；合并的处理在独立会话中执行，
+        不使用发起请求的会话（发起请求被取消、其会话关闭后，其他等待者仍在等待该处理）。
+        
         Args:
-            db: 数据库会话
+            db: 数据库会话（用于派生处理所用的独立会话）
             question: 用户的自然语言问题
         
         Returns:
             包含回答和相关信息的字典
         """
+        with QA_STAGE_SECONDS.time("total"):
+            return await self.question_flight.do(
+                normalize_question(question),
+                lambda: run_in_sibling_session(db, self._answer_question, question)
+            )
+    
+    async def answer_batch(
+        self,
+        db: AsyncSession,
+        questions: List[str],
+        concurrency: Optional[int] = None,
+        admit: Optional[Callable[[str], AsyncContextManager[Any]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """批量回答问题，按完成顺序逐条产出结果
+        
+        归一化后相同的问题只处理一次，结果分发给所有对应下标；每个问题经 answer_question
+        在其自己的独立会话中执行，同时处理的问题数不超过 concurrency。单项失败不影响其他问题。
+        
+        Args:
+            db: 数据库会话（仅用于派生各问题的独立会话，不在其上执行查询）
+            questions: 问题列表
+            concurrency: 最大并发数，默认取 settings.batch_concurrency
+            admit: 每个问题处理期间进入的上下文（如准入控制）；进入时抛出的异常作为该项的 error
+        
+        Yields:
+            {"index", "question", "success", "result", "error"}；error 结构同全局异常处理器
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, question in enumerate(questions):
+            groups.setdefault(normalize_question(question), []).append(index)
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.batch_concurrency))
+        
+        async def run(indexes: List[int]) -> Any:
+            question = questions[indexes[0]]
+            async with semaphore:
+                try:
+                    async with admit(question) if admit is not None else nullcontext():
+                        return indexes, await self.answer_question(db, question), None
+                except Exception as e:
+                    return indexes, None, describe_exception(e)
+        
+        tasks = [asyncio.ensure_future(run(indexes)) for indexes in groups.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indexes, result, error = await next_done
+                for index in indexes:
+                    yield {
+                        "index": index,
+                        "question": questions[index],
+                        "success": error is None,
+                        "result": result,
+                        "error": error
+                    }
+        finally:
+            # 调用方提前结束（如客户端断开流式响应）时取消尚未完成的问题
+            for task in tasks:
+                task.cancel()
+    
+    async def _answer_question(self, db: AsyncSession, question: str) -> Dict[str, Any]:
+        """问答主流程（单个问题的实际处理）"""
+        prepared = await self.prepare_answer(db, question)
+        
+        if prepared["answer"] is None:
+            # 4. 生成自然语言回答（外部 LLM 不可用时在客户端兜底）
+            with QA_STAGE_SECONDS.time("generate"):
+                answer, used_fallback = await self.doubao_client.generate_answer(question=question, intent=prepared["intent"], **prepared["data"])
+            if used_fallback:
+                FALLBACK_ANSWERS.labels("sync").inc()
+            else:
+                # 兜底回答不缓存，待 LLM 恢复后重新生成
+                await self.answer_cache_service.save_answer(db, question, prepared["intent"], answer, prepared["pokemon_id"])
+            prepared["answer"] = answer
+        
+        # 5. 构造返回结果（包含回答、识别名称、ID、意图）
+        return self.build_result(prepared)
+    
+    def can_answer_from_cache(self, question: str) -> bool:
+        """不访问网络与数据库判断问题能否由内存问答缓存直接回答（准入控制据此优先放行；不计入缓存统计）"""
+        intent = self.intent_parser_service.parse_local(question, record_stats=False)
+        return bool(intent and intent.get("pokemon_name")) and self.answer_cache_service.has_cached_answer(question, intent)
+    
+    async def prepare_answer(self, db: AsyncSession, question: str) -> Dict[str, Any]:
+        """执行回答生成之前的全部步骤：意图解析 → 问答缓存 → 数据获取
+        
+        Args:
+            db: 数据库会话
+            question: 用户的自然语言问题
+        
+        Returns:
+            {"intent", "pokemon_name", "pokemon_id", "answer", "data"}；
+            answer 非空表示无需调用 LLM（未识别宝可梦或命中缓存），
+            否则 data 为回答生成所需的 pokemon_data / species_data / evolution_data
+        """
         # 1. 解析用户意图（识别宝可梦名称与问题类型）
-        intent = await self.intent_parser_service.parse_intent(question)
+        with QA_STAGE_SECONDS.time("intent"), timing_stage("intent"):
+            intent = await self.parse_intent(db, question)
+        prepared = {"intent": intent, "pokemon_name": None, "pokemon_id": None, "answer": None, "data": None}
         
         pokemon_name = intent.get("pokemon_name")
         if not pokemon_name:
             # 如果无法识别宝可梦名称，返回兜底回复，明确提示未找到
-            return {
-                "answer": "未找到对应的宝可梦，请更具体一些再试试。",
-                "pokemon_name": None,
-                "pokemon_id": None,
-                "intent": intent
-            }
-        
-        # 2. 获取宝可梦数据（优先读库缓存，缺失时调用 PokeAPI 并写库）
-        pokemon_data = await self.pokemon_service.get_pokemon(db, pokemon_name)
-        species_data = await self.pokemon_service.get_pokemon_species(db, pokemon_name)
-        
-        # 3. 生成自然语言回答（外部 LLM 不可用时在客户端兜底）
-        answer = await self.doubao_client.build_answer_with_doubao(
-            question=question,
-            pokemon_data=pokemon_data,
-            species_data=species_data
-        )
+            prepared["answer"] = "未找到对应的宝可梦，请更具体一些再试试。"
+            return prepared
+        prepared["pokemon_name"] = pokemon_name
+        
+        # 2. 命中问答缓存时直接返回，跳过数据获取与 LLM 生成
+        with QA_STAGE_SECONDS.time("answer_cache"):
+            cached = await self.answer_cache_service.get_answer(db, question, intent)
+        if cached is not None:
+            prepared["answer"] = cached["answer"]
+            prepared["pokemon_id"] = cached["pokemon_id"]
+            return prepared
         
-        # 4. 构造返回结果（包含回答、识别名称、ID、意图）
+        # 3. 并发获取宝可梦数据（优先读库缓存，缺失时调用 PokeAPI 并写库）
+        # 各阶段在独立会话中执行；先结束请求会话上问答缓存查询的读事务、归还连接，
+        # 否则高并发下每个请求占着一个连接等待其他连接，连接池耗尽后互相等待至超时
+        await db.commit()
+        with QA_STAGE_SECONDS.time("fetch"):
+            fetched = await self.fetch_pokemon_data(db, pokemon_name, intent)
+        prepared["pokemon_id"] = fetched["pokemon"].get("id")
+        prepared["data"] = {
+            "pokemon_data": fetched["pokemon"],
+            "species_data": fetched["species"],
+            "evolution_data": fetched.get("evolution")
+        }
+        return prepared
+    
+    async def parse_intent(self, db: AsyncSession, question: str) -> Dict[str, Any]:
+        """解析意图；需要调用 LLM 时，在等待期间按猜测的宝可梦名称推测性预取数据
+        
+        猜中时预取继续进行，随后的数据获取经单飞合并或内存缓存共享其结果；
+        猜错或解析失败时取消预取（其他请求也在等待同一加载时除外）。
+        """
+        intent = self.intent_parser_service.parse_local(question)
+        if intent is not None:
+            return intent
+        if not settings.speculative_prefetch_enabled:
+            return await self.intent_parser_service.parse_remote(question)
+        guess = self.intent_parser_service.guess_pokemon_name(question)
+        if guess is None:
+            SPECULATIVE_PREFETCH.labels("no_guess").inc()
+            return await self.intent_parser_service.parse_remote(question)
+        
+        prefetch = asyncio.ensure_future(self.pokemon_service.prefetch(db, guess))
+        try:
+            intent = await self.intent_parser_service.parse_remote(question)
+        except BaseException:
+            await self._cancel_prefetch(prefetch, guess)
+            raise
+        if (intent.get("pokemon_name") or "").lower() == guess:
+            SPECULATIVE_PREFETCH.labels("hit").inc()
+        else:
+            await self._cancel_prefetch(prefetch, guess)
+            SPECULATIVE_PREFETCH.labels("wasted").inc()
+        return intent
+    
+    async def _cancel_prefetch(self, prefetch: "asyncio.Future[None]", guess: str) -> None:
+        prefetch.cancel()
+        # 等待预取的调用方全部退出，单飞加载才会显示为无人等待
+        await asyncio.gather(prefetch, return_exceptions=True)
+        self.pokemon_service.cancel_prefetch(guess)
+    
+    async def stream_answer(self, db: AsyncSession, question: str, prepared: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """以事件序列流式输出回答
+        
+        事件顺序：intent（意图与宝可梦 ID）→ answer（增量文本，若干）→ [fallback] → done（完整 AskResponse）。
+        LLM 流中途失败时发送 fallback 事件，携带应替换已收到内容的兜底回答。
+        
+        Args:
+            db: 数据库会话（仅用于派生独立会话写缓存，响应流期间请求会话可能已关闭）
+            question: 用户的自然语言问题
+            prepared: prepare_answer 的返回值
+        
+        Yields:
+            {"event": 事件名, "data": 事件数据}
+        """
+        yield {"event": "intent", "data": {
+            "intent": prepared["intent"],
+            "pokemon_name": prepared["pokemon_name"],
+            "pokemon_id": prepared["pokemon_id"]
+        }}
+        
+        if prepared["answer"] is not None:
+            yield {"event": "answer", "data": {"delta": prepared["answer"]}}
+        else:
+            chunks: List[str] = []
+            try:
+                # 流式生成的耗时包含客户端消费事件的时间
+                with QA_STAGE_SECONDS.time("generate"):
+                    async for delta in self.doubao_client.stream_answer(question=question, intent=prepared["intent"], **prepared["data"]):
+                        chunks.append(delta)
+                        yield {"event": "answer", "data": {"delta": delta}}
+                if not chunks:
+                    raise LLMError(message="豆包流式响应为空")
+                prepared["answer"] = "".join(chunks)
+                await run_in_sibling_session(
+                    db, self.answer_cache_service.save_answer,
+                    question, prepared["intent"], prepared["answer"], prepared["pokemon_id"]
+                )
+            except Exception:
+                # 兜底：LLM 不可用或流中断时改用基于数据的简洁回答
+                prepared["answer"] = self.doubao_client.fallback_answer(prepared["data"]["pokemon_data"])
+                FALLBACK_ANSWERS.labels("stream").inc()
+                yield {"event": "fallback", "data": {"answer": prepared["answer"]}}
+        
+        yield {"event": "done", "data": self.build_result(prepared)}
+    
+    @staticmethod
+    def build_result(prepared: Dict[str, Any]) -> Dict[str, Any]:
+        """构造问答结果（与 AskResponse 字段一致）"""
         return {
-            "answer": answer,
-            "pokemon_name": pokemon_name,
-            "pokemon_id": pokemon_data.get("id"),
-            "intent": intent
-        }
\ No newline at end of file
+            "answer": prepared["answer"],
+            "pokemon_name": prepared["pokemon_name"],
+            "pokemon_id": prepared["pokemon_id"],
+            "intent": prepared["intent"]
+        }
+    
+    async def fetch_pokemon_data(self, db: AsyncSession, pokemon_name: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+        """按意图并发获取回答所需的数据
+        
+        Args:
+            db: 数据库会话
+            pokemon_name: 宝可梦英文名
+            intent: 意图解析结果
+        
+        Returns:
+            {"pokemon": ..., "species": ..., "evolution": ...}；evolution 仅在进化类意图下存在，获取失败时为 None
+        
+        Raises:
+            PokemonNotFoundError: 当宝可梦不存在时
+            PokeApiError: 当PokeAPI调用失败或阶段超时时
+            DatabaseError: 当数据库操作失败时
+        """
+        pipeline = FetchPipeline(on_stage_done=lambda stage, seconds: QA_STAGE_SECONDS.labels(stage).observe(seconds))
+        pipeline.add_stage(
+            "pokemon",
+            lambda _: run_in_sibling_session(db, self.pokemon_service.get_pokemon, pokemon_name),
+            timeout=settings.qa_stage_timeout_pokemon
+        )
+        pipeline.add_stage(
+            "species",
+            lambda _: run_in_sibling_session(db, self.pokemon_service.get_pokemon_species, pokemon_name),
+            timeout=settings.qa_stage_timeout_species
+        )
+        if intent.get("intent_type") in EVOLUTION_INTENT_TYPES:
+            # 进化链只是补充信息：获取失败时仍基于 pokemon/species 作答
+            pipeline.add_stage(
+                "evolution",
+                lambda deps: self.pokemon_service.get_species_evolution_chain(db, deps["species"]),
+                depends_on=("species",),
+                timeout=settings.qa_stage_timeout_evolution,
+                required=False
+            )
+        return await pipeline.run()
+
@@ -0,0 +1,129 @@
+"""进化关系图
+
+将进化链数据预先展开为图：物种 → 所属进化链、前一形态、后续形态以及进化条件。
+图常驻内存，作为进化链的内存缓存层：启动时从 evolution_chain 表加载，
+进化链从数据库或 PokeAPI 加载后增量登记，进化类问题命中时无需任何数据库或网络访问。
+"""
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.evolution_chain_repository import EvolutionChainRepository
+
+
+def build_evolution_steps(chain_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """将进化链树展开为逐级进化路径（广度优先）
+
+    Returns:
+        形如 [{"from": "charmander", "to": "charmeleon", "trigger": "level-up", "min_level": 16}] 的列表
+    """
+    steps: List[Dict[str, Any]] = []
+    pending = [chain_data.get("chain") or {}]
+    while pending:
+        node = pending.pop(0)
+        source = (node.get("species") or {}).get("name")
+        for child in node.get("evolves_to", []):
+            details = (child.get("evolution_details") or [{}])[0]
+            step = {
+                "from": source,
+                "to": (child.get("species") or {}).get("name"),
+                "trigger": (details.get("trigger") or {}).get("name"),
+            }
+            if details.get("min_level"):
+                step["min_level"] = details["min_level"]
+            if details.get("item"):
+                step["item"] = details["item"]["name"]
+            steps.append(step)
+            pending.append(child)
+    return steps
+
+
+class EvolutionGraph:
+    """物种级进化关系图"""
+
+    def __init__(self):
+        # 进化链 ID -> {"id", "root", "species", "steps", "revision"}
+        self._chains: Dict[int, Dict[str, Any]] = {}
+        # 登记计数：每次登记（含替换）的条目获得新的 revision，供下游缓存区分新旧条目
+        self._revision = 0
+        # 物种名 -> {"chain_id", "predecessor", "successors", "trigger"}
+        self._species: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+    def add_chain(self, chain_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """登记（或替换）一条进化链
+
+        Returns:
+            登记后的进化链条目；数据缺少 id 时返回 None
+        """
+        chain_id = chain_data.get("id")
+        if chain_id is None:
+            return None
+        steps = build_evolution_steps(chain_data)
+        root = ((chain_data.get("chain") or {}).get("species") or {}).get("name")
+        species = [root] + [step["to"] for step in steps] if root else []
+        self._revision += 1
+        entry = {"id": chain_id, "root": root, "species": species, "steps": steps, "revision": self._revision}
+        self._chains[chain_id] = entry
+
+        for name in species:
+            self._species[name] = {"chain_id": chain_id, "predecessor": None, "successors": [], "trigger": None}
+        for step in steps:
+            self._species[step["from"]]["successors"].append(step["to"])
+            node = self._species[step["to"]]
+            node["predecessor"] = step["from"]
+            node["trigger"] = {key: value for key, value in step.items() if key not in ("from", "to")}
+        return entry
+
+    def add_many(self, chain_list: List[Dict[str, Any]]) -> None:
+        """批量登记进化链"""
+        for chain_data in chain_list:
+            self.add_chain(chain_data)
+
+    def get_chain(self, chain_id: int) -> Optional[Dict[str, Any]]:
+        """按 ID 获取进化链条目 {"id", "root", "species", "steps", "revision"}"""
+        return self._chains.get(chain_id)
+
+    def get_species(self, name: str) -> Optional[Dict[str, Any]]:
+        """获取物种节点 {"chain_id", "predecessor", "successors", "trigger"}"""
+        return self._species.get(name.lower())
+
+    def chain_for_species(self, name: str) -> Optional[Dict[str, Any]]:
+        """物种所属的进化链条目"""
+        node = self.get_species(name)
+        return self._chains.get(node["chain_id"]) if node else None
+
+    def predecessors(self, name: str) -> List[str]:
+        """从进化链起点到该物种之前的所有形态（由远及近）"""
+        lineage: List[str] = []
+        node = self.get_species(name)
+        while node and node["predecessor"]:
+            lineage.insert(0, node["predecessor"])
+            node = self._species.get(node["predecessor"])
+        return lineage
+
+    def successors(self, name: str) -> List[str]:
+        """该物种可直接进化成的形态"""
+        node = self.get_species(name)
+        return list(node["successors"]) if node else []
+
+    def clear(self) -> int:
+        """清空图，返回清除的进化链数"""
+        count = len(self._chains)
+        self._chains.clear()
+        self._species.clear()
+        return count
+
+
+# 进程内共享的进化关系图：启动时从数据库加载，进化链加载时增量登记
+evolution_graph = EvolutionGraph()
+
+
+async def load_evolution_graph(db: AsyncSession) -> int:
+    """从数据库中已缓存的进化链构建进化关系图
+
+    Returns:
+        已登记的进化链数量
+    """
+    evolution_graph.add_many(await EvolutionChainRepository.list_evolution_chains(db))
+    return len(evolution_graph)
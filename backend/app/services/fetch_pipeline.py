@@ -0,0 +1,105 @@
+"""数据获取流水线
+
+以依赖关系描述若干异步阶段（stage）：无依赖关系的阶段并发执行，依赖阶段在前置
+阶段完成后立即启动；每个阶段独立超时。
+- 必需阶段失败：取消其余阶段并向上抛出原异常（超时统一转为 PokeApiError）
+- 可选阶段失败：结果记为 None，不影响整体
+可通过 on_stage_done 回调获取各阶段耗时（不含等待依赖的时间），用于指标统计。
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from app.core.exceptions import PokeApiError
+
+# 阶段函数：接收 {依赖阶段名: 结果}，返回本阶段结果
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+# 阶段结束回调：(阶段名, 耗时秒数)，阶段成功、失败或超时时均会调用
+StageObserver = Callable[[str, float], None]
+
+
+class PipelineStage:
+    """流水线中的单个阶段"""
+
+    def __init__(
+        self,
+        name: str,
+        func: StageFunc,
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        required: bool = True
+    ):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.required = required
+
+
+class FetchPipeline:
+    """依赖感知的并发数据获取流水线"""
+
+    def __init__(self, on_stage_done: Optional[StageObserver] = None):
+        self.stages: Dict[str, PipelineStage] = {}
+        self.on_stage_done = on_stage_done
+
+    def add_stage(
+        self,
+        name: str,
+        func: StageFunc,
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        required: bool = True
+    ) -> "FetchPipeline":
+        """登记阶段；依赖的阶段必须先于本阶段登记
+
+        Raises:
+            ValueError: 阶段重名或依赖了未登记的阶段
+        """
+        if name in self.stages:
+            raise ValueError(f"重复的流水线阶段: {name}")
+        stage = PipelineStage(name, func, depends_on, timeout, required)
+        unknown = [dep for dep in stage.depends_on if dep not in self.stages]
+        if unknown:
+            raise ValueError(f"阶段 {name} 依赖了未登记的阶段: {', '.join(unknown)}")
+        self.stages[name] = stage
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """执行全部阶段并返回 {阶段名: 结果}
+
+        Raises:
+            任一必需阶段抛出的异常（首个失败者）
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, tasks))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            # 回收所有任务结果，避免 "exception was never retrieved" 告警
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return {name: task.result() for name, task in tasks.items()}
+
+    async def _run_stage(self, stage: PipelineStage, tasks: Dict[str, asyncio.Task]) -> Any:
+        """等待依赖完成后执行单个阶段，并按 required 处理失败"""
+        start = None
+        try:
+            inputs = {dep: await tasks[dep] for dep in stage.depends_on}
+            start = time.perf_counter()
+            return await asyncio.wait_for(stage.func(inputs), timeout=stage.timeout)
+        except asyncio.TimeoutError:
+            if stage.required:
+                raise PokeApiError(message=f"数据获取阶段 {stage.name} 超时（{stage.timeout}s）")
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if stage.required:
+                raise
+            return None
+        finally:
+            if start is not None and self.on_stage_done is not None:
+                self.on_stage_done(stage.name, time.perf_counter() - start)
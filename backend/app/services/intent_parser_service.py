@@ -1,12 +1,37 @@
-from typing import Dict, Any
+import re
+from typing import Dict, Any, Optional
 from app.clients.doubao_client import DoubaoClient
+from app.core.config import settings
+from app.services.name_resolver_service import DETAIL_KEYWORDS, INTENT_KEYWORDS, name_resolver
+from app.utils.cache import LRUTTLCache, register_cache
+from app.utils.question import normalize_question
+
+# 猜测宝可梦名称用：中日文字符、英文单词（PokeAPI 名称由小写字母、数字与连字符组成）及需排除的意图关键词
+_CJK = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff]")
+_ASCII_WORD = re.compile(r"[A-Za-z][A-Za-z0-9\-]{2,}")
+_KEYWORD_WORDS = {
+    word for _, keywords in INTENT_KEYWORDS + DETAIL_KEYWORDS for keyword in keywords for word in keyword.split()
+}
+
+# LLM 意图解析结果缓存：归一化问题 -> 意图，重复提问不再调用 LLM 解析
+intent_memory_cache = register_cache(LRUTTLCache(
+    "intent",
+    max_entries=settings.answer_cache_max_entries,
+    ttl_seconds=settings.answer_cache_ttl_seconds
+))
 
 
 class IntentParserService:
-    """意图解析服务"""
+    """意图解析服务
+    
+    优先使用本地名称解析器（无网络调用），其次查询此前的 LLM 解析结果，
+    均无法确定时才调用豆包解析。
+    """
     
     def __init__(self):
         self.doubao_client = DoubaoClient()
+        self.name_resolver = name_resolver
+        self.intent_cache = intent_memory_cache
     
     async def parse_intent(self, question: str) -> Dict[str, Any]:
         """解析用户问题的意图
@@ -17,4 +42,45 @@ class IntentParserService:
         Returns:
             结构化的意图信息
         """
-        return await self.doubao_client.parse_question_to_intent(question)
\ No newline at end of file
+        intent = self.parse_local(question)
+        if intent is not None:
+            return intent
+        return await self.parse_remote(question)
+    
+    def parse_local(self, question: str, record_stats: bool = True) -> Optional[Dict[str, Any]]:
+        """不访问网络的解析：本地名称解析器 → 此前的 LLM 解析结果；均无法确定时返回 None
+
+        record_stats=False 时查询意图缓存不计入命中统计（用于准入控制的预判，随后的实际解析会再查一次）
+        """
+        if settings.local_intent_resolver_enabled:
+            intent = self.name_resolver.resolve(question)
+            if intent is not None:
+                return intent
+        key = normalize_question(question)
+        return self.intent_cache.get(key) if record_stats else self.intent_cache.peek(key)
+    
+    async def parse_remote(self, question: str) -> Dict[str, Any]:
+        """调用豆包解析意图，识别出宝可梦时缓存结果"""
+        intent = await self.doubao_client.parse_question_to_intent(question)
+        if intent.get("pokemon_name"):
+            self.intent_cache.set(normalize_question(question), intent)
+        return intent
+    
+    def guess_pokemon_name(self, question: str) -> Optional[str]:
+        """在 LLM 解析返回之前廉价地猜测问题涉及的宝可梦（用于推测性预取）
+        
+        依次尝试：本地名称索引中出现的第一个名称（出现多只时 resolve 会放弃，这里取第一只）；
+        中文问题中唯一的英文单词（如"pikachu的特性"），排除意图关键词。
+        纯英文问题中单词很多、难以判断，不做猜测。
+        
+        Returns:
+            小写英文名；无法猜测时返回 None
+        """
+        if settings.local_intent_resolver_enabled:
+            mentions = self.name_resolver.find_mentions(question)
+            if mentions:
+                return mentions[0][1]
+        if not _CJK.search(question):
+            return None
+        words = {word.lower() for word in _ASCII_WORD.findall(question)} - _KEYWORD_WORDS
+        return words.pop() if len(words) == 1 else None
@@ -0,0 +1,171 @@
+"""本地宝可梦名称解析服务
+
+从已缓存物种投影的 names（简中/繁中/日文/英文）构建 Aho-Corasick 自动机，
+在用户问题中一次扫描找出所有宝可梦名称，并用关键词规则推断 intent_type / detail_level。
+问题中恰好识别出一只宝可梦时直接给出意图，无需调用 LLM；识别不到或出现多只时视为歧义，
+由上层回退到 LLM 解析。
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.pokemon_repository import PokemonRepository
+
+# 参与索引的名称语言
+INDEXED_LANGUAGES = {"zh-Hans", "zh-Hant", "ja", "ja-Hrkt", "en"}
+
+# 意图关键词规则：按顺序匹配，先命中者优先；均未命中时为 basic_info
+INTENT_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("evolution", ("进化", "進化", "evolve", "evolution", "evolves")),
+    ("stats", ("种族值", "種族值", "能力值", "数值", "base stat", "stats")),
+    ("abilities", ("特性", "ability", "abilities")),
+    ("moves", ("技能", "招式", "学会", "moves", "move")),
+    ("intro", ("介绍", "介紹", "简介", "是谁", "图鉴", "introduce", "who is")),
+]
+
+# 详细程度关键词：未命中时为 normal
+DETAIL_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("high", ("详细", "詳細", "具体", "全部", "完整", "in detail", "detailed")),
+    ("low", ("简单", "简要", "简短", "一句话", "brief", "briefly", "short")),
+]
+
+
+def _is_ascii_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class PokemonNameResolver:
+    """基于 Aho-Corasick 自动机的多语言宝可梦名称识别器"""
+
+    def __init__(self):
+        # 名称（小写）-> 宝可梦英文名（默认形态）
+        self._names: Dict[str, str] = {}
+        self._dirty = False
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add_species(self, species: Dict[str, Any]) -> None:
+        """登记物种投影（见 project_species）中的多语言名称"""
+        pokemon_name = species.get("default_pokemon") or species.get("name")
+        if not pokemon_name:
+            return
+        aliases = [pokemon_name, species.get("name") or ""]
+        aliases += [
+            name for language, name in (species.get("names") or {}).items()
+            if language in INDEXED_LANGUAGES
+        ]
+        for alias in aliases:
+            alias = alias.strip().lower()
+            if alias and self._names.get(alias) != pokemon_name:
+                self._names[alias] = pokemon_name
+                self._dirty = True
+
+    def add_many(self, species_list: Iterable[Dict[str, Any]]) -> None:
+        """批量登记物种投影"""
+        for species in species_list:
+            self.add_species(species)
+
+    def find_mentions(self, question: str) -> List[Tuple[str, str]]:
+        """找出问题中提及的宝可梦
+
+        重叠的匹配只保留最左最长者（如 "超梦" 不会再识别出 "梦"）。
+
+        Returns:
+            [(问题中的原文, 宝可梦英文名)]，按出现顺序
+        """
+        if self._dirty:
+            self._build()
+        text = question.lower()
+        candidates: List[Tuple[int, int]] = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for alias in self._output[state]:
+                start, end = index - len(alias) + 1, index + 1
+                if _is_ascii_word_char(alias[0]) and start > 0 and _is_ascii_word_char(text[start - 1]):
+                    continue
+                if _is_ascii_word_char(alias[-1]) and end < len(text) and _is_ascii_word_char(text[end]):
+                    continue
+                candidates.append((start, end))
+
+        mentions: List[Tuple[str, str]] = []
+        cursor = 0
+        for start, end in sorted(candidates, key=lambda span: (span[0], span[0] - span[1])):
+            if start < cursor:
+                continue
+            mentions.append((question[start:end], self._names[text[start:end]]))
+            cursor = end
+        return mentions
+
+    def resolve(self, question: str) -> Optional[Dict[str, Any]]:
+        """本地解析问题意图
+
+        Returns:
+            与 LLM 解析结果同构的意图字典；未识别或识别出多只宝可梦时返回 None
+        """
+        mentions = self.find_mentions(question)
+        pokemon_names = {pokemon_name for _, pokemon_name in mentions}
+        if len(pokemon_names) != 1:
+            return None
+        lowered = question.lower()
+        return {
+            "pokemon_name": mentions[0][1],
+            "original_name": mentions[0][0],
+            "intent_type": self._match_keywords(lowered, INTENT_KEYWORDS, "basic_info"),
+            "detail_level": self._match_keywords(lowered, DETAIL_KEYWORDS, "normal"),
+        }
+
+    @staticmethod
+    def _match_keywords(text: str, rules: List[Tuple[str, Tuple[str, ...]]], default: str) -> str:
+        for label, keywords in rules:
+            if any(keyword in text for keyword in keywords):
+                return label
+        return default
+
+    def _build(self) -> None:
+        """根据当前名称表重建自动机（goto / fail / output）"""
+        goto: List[Dict[str, int]] = [{}]
+        output: List[List[str]] = [[]]
+        for alias in self._names:
+            state = 0
+            for char in alias:
+                if char not in goto[state]:
+                    goto.append({})
+                    output.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            output[state].append(alias)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(char, 0) if goto[fallback].get(char, 0) != child else 0
+                output[child] = output[child] + output[fail[child]]
+
+        self._goto, self._fail, self._output = goto, fail, output
+        self._dirty = False
+
+
+# 进程内共享的名称解析器：启动时从数据库加载，物种数据加载时增量登记
+name_resolver = PokemonNameResolver()
+
+
+async def load_name_resolver(db: AsyncSession) -> int:
+    """从数据库中已缓存的物种投影构建名称索引
+
+    Returns:
+        已登记的名称数量
+    """
+    name_resolver.add_many(await PokemonRepository.list_species_summaries(db))
+    return len(name_resolver)
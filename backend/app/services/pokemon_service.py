@@ -1,109 +1,271 @@
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.clients.pokeapi_client import PokeAPIClient
+from app.repositories.evolution_chain_repository import EvolutionChainRepository
 from app.repositories.pokemon_repository import PokemonRepository
+from app.core.config import settings
 from app.core.exceptions import PokemonNotFoundError, PokeApiError, DatabaseError
+from app.core.observability import DB_CACHE_REQUESTS
+from app.db.session import run_in_sibling_session
+from app.services.answer_cache_service import answer_cache_service
+from app.services.evolution_graph_service import evolution_graph
+from app.services.name_resolver_service import name_resolver
+from app.utils.cache import LRUTTLCache, register_cache
+from app.utils.pokemon_projection import project_pokemon, project_species, with_updated_at
+from app.utils.single_flight import SingleFlight
+
+# 进程内内存层缓存（位于数据库缓存之前），按小写名称索引，缓存精简投影；进程内所有服务实例共享
+pokemon_memory_cache = register_cache(LRUTTLCache(
+    "pokemon",
+    max_entries=settings.memory_cache_max_entries,
+    ttl_seconds=settings.memory_cache_ttl_seconds
+))
+species_memory_cache = register_cache(LRUTTLCache(
+    "pokemon_species",
+    max_entries=settings.memory_cache_max_entries,
+    ttl_seconds=settings.memory_cache_ttl_seconds
+))
+
+def _is_not_found(error: Exception) -> bool:
+    """PokeAPI 客户端的"资源不存在"：HTTPClient 与快照模式均以 404 HTTPException 表示"""
+    if isinstance(error, HTTPException):
+        return error.status_code == 404
+    return "not found" in str(error).lower()
+
+
+# 缓存未命中时的加载合并：同一资源并发未命中只触发一次 PokeAPI 请求与一次写库
+pokemon_fetch_flight = SingleFlight("pokemon_fetch")
 
 
 class PokemonService:
-    """宝可梦服务 - 处理宝可梦数据的获取和缓存"""
+    """宝可梦服务 - 处理宝可梦数据的获取和缓存
+    
+    读取顺序：内存缓存 → 数据库缓存 → PokeAPI，下层命中后回填上层；
+    进化链的内存层为进化关系图（evolution_graph）。
+    问答热路径只读写精简投影（见 app.utils.pokemon_projection），完整 JSON 仅在写库时保存；
+    get_pokemon / get_pokemon_species 返回投影而非 PokeAPI 原始结构，调用方只能使用投影中的字段
+    （需要完整数据时经 PokemonRepository.get_pokemon / get_pokemon_species 读取 data 列）。
+    内存未命中后的加载按 (资源类型, 名称) 单飞合并，并在独立会话中执行，
+    使得发起者被取消（如阶段超时）时其他等待者仍能拿到结果。
+    """
     
     def __init__(self):
         self.pokeapi_client = PokeAPIClient()
         self.pokemon_repository = PokemonRepository()
+        self.evolution_chain_repository = EvolutionChainRepository()
+        self.pokemon_cache = pokemon_memory_cache
+        self.species_cache = species_memory_cache
+        self.evolution_graph = evolution_graph
+        self.fetch_flight = pokemon_fetch_flight
     
-    async def get_pokemon(self, db: Session, name: str) -> Dict[str, Any]:
-        """获取宝可梦数据
+    async def get_pokemon(self, db: AsyncSession, name: str) -> Dict[str, Any]:
+        """获取宝可梦数据（精简投影）
         
-        首先从数据库缓存中查询，如果不存在则从 PokeAPI 获取并缓存
+        依次查询内存缓存、数据库缓存，均未命中时从 PokeAPI 获取并写入两级缓存
         
         Args:
             db: 数据库会话
             name: 宝可梦名称
         
         Returns:
-            宝可梦的详细信息
+            宝可梦投影（见 project_pokemon）
         
         Raises:
             PokemonNotFoundError: 当宝可梦不存在时
             PokeApiError: 当PokeAPI调用失败时
             DatabaseError: 当数据库操作失败时
         """
+        key = name.lower()
+        pokemon_data = self.pokemon_cache.get(key)
+        if pokemon_data is not None:
+            return pokemon_data
+        return await self.fetch_flight.do(
+            ("pokemon", key),
+            lambda: run_in_sibling_session(db, self._load_pokemon, name)
+        )
+    
+    async def _load_pokemon(self, db: AsyncSession, name: str) -> Dict[str, Any]:
+        """内存未命中时的加载路径：数据库缓存 → PokeAPI，并回填内存缓存"""
+        key = name.lower()
         try:
-            # 先从数据库缓存中查询
-            pokemon_data = await self.pokemon_repository.get_pokemon(db, name)
+            # 内存未命中，从数据库缓存中查询
+            pokemon_data = await self.pokemon_repository.get_pokemon_summary(db, name)
+            DB_CACHE_REQUESTS.labels("pokemon", "hit" if pokemon_data else "miss").inc()
             
             if not pokemon_data:
                 try:
                     # 如果数据库中没有，则从 PokeAPI 获取
-                    pokemon_data = await self.pokeapi_client.get_pokemon(name)
-                    # 将获取的数据存入数据库缓存
-                    await self.pokemon_repository.save_pokemon(db, pokemon_data)
+                    raw_data = await self.pokeapi_client.get_pokemon(name)
+                    # 将获取的数据存入数据库缓存（同时保存完整数据与投影）
+                    await self.pokemon_repository.save_pokemon(db, raw_data)
+                    # 以写库时刻标记数据版本，供提示词上下文缓存区分新旧数据
+                    pokemon_data = with_updated_at(project_pokemon(raw_data), datetime.now(timezone.utc))
+                    # 数据已更新：同步清理内存中基于旧数据的缓存回答
+                    answer_cache_service.forget_pokemon(name)
                 except Exception as e:
-                    if "not found" in str(e).lower():
+                    if _is_not_found(e):
                         raise PokemonNotFoundError(pokemon_name=name)
                     raise PokeApiError(message=f"获取宝可梦数据失败: {str(e)}")
             
+            self.pokemon_cache.set(key, pokemon_data)
             return pokemon_data
         except (PokemonNotFoundError, PokeApiError):
             raise
         except Exception as e:
             raise DatabaseError(message=f"数据库操作失败: {str(e)}")
     
-    async def get_pokemon_species(self, db: Session, name: str) -> Dict[str, Any]:
-        """获取宝可梦物种数据
+    async def get_pokemon_species(self, db: AsyncSession, name: str) -> Dict[str, Any]:
+        """获取宝可梦物种数据（精简投影）
         
-        首先从数据库缓存中查询，如果不存在则从 PokeAPI 获取并缓存
+        依次查询内存缓存、数据库缓存，均未命中时从 PokeAPI 获取并写入两级缓存
         
         Args:
             db: 数据库会话
             name: 宝可梦名称
         
         Returns:
-            宝可梦物种的详细信息
+            物种投影（见 project_species）
             
         Raises:
             PokemonNotFoundError: 当宝可梦不存在时
             PokeApiError: 当PokeAPI调用失败时
             DatabaseError: 当数据库操作失败时
         """
+        key = name.lower()
+        species_data = self.species_cache.get(key)
+        if species_data is not None:
+            return species_data
+        return await self.fetch_flight.do(
+            ("species", key),
+            lambda: run_in_sibling_session(db, self._load_species, name)
+        )
+    
+    async def _load_species(self, db: AsyncSession, name: str) -> Dict[str, Any]:
+        """内存未命中时的加载路径：数据库缓存 → PokeAPI，并回填内存缓存"""
+        key = name.lower()
         try:
-            # 先从数据库缓存中查询
-            species_data = await self.pokemon_repository.get_pokemon_species(db, name)
+            # 内存未命中，从数据库缓存中查询
+            species_data = await self.pokemon_repository.get_species_summary(db, name)
+            DB_CACHE_REQUESTS.labels("pokemon_species", "hit" if species_data else "miss").inc()
             
             if not species_data:
                 try:
                     # 如果数据库中没有，则从 PokeAPI 获取
-                    species_data = await self.pokeapi_client.get_pokemon_species(name)
-                    # 将获取的数据存入数据库缓存
-                    await self.pokemon_repository.save_pokemon_species(db, species_data)
+                    raw_data = await self.pokeapi_client.get_pokemon_species(name)
+                    # 将获取的数据存入数据库缓存（同时保存完整数据与投影）
+                    await self.pokemon_repository.save_pokemon_species(db, raw_data)
+                    # 以写库时刻标记数据版本，供提示词上下文缓存区分新旧数据
+                    species_data = with_updated_at(project_species(raw_data), datetime.now(timezone.utc))
+                    # 数据已更新：同步清理内存中基于旧数据的缓存回答
+                    answer_cache_service.forget_pokemon(name)
                 except Exception as e:
-                    if "not found" in str(e).lower():
+                    if _is_not_found(e):
                         raise PokemonNotFoundError(pokemon_name=name)
                     raise PokeApiError(message=f"获取宝可梦物种数据失败: {str(e)}")
             
+            self.species_cache.set(key, species_data)
+            # 登记多语言名称，供本地意图解析使用
+            name_resolver.add_species(species_data)
             return species_data
         except (PokemonNotFoundError, PokeApiError):
             raise
         except Exception as e:
             raise DatabaseError(message=f"数据库操作失败: {str(e)}")
     
-    async def get_evolution_chain(self, chain_id: int) -> Dict[str, Any]:
+    async def prefetch(self, db: AsyncSession, name: str) -> None:
+        """推测性预取宝可梦与物种数据（填充各级缓存），失败时忽略，由正式获取重新尝试"""
+        await asyncio.gather(self.get_pokemon(db, name), self.get_pokemon_species(db, name), return_exceptions=True)
+    
+    def cancel_prefetch(self, name: str) -> int:
+        """取消 name 已无调用方等待的加载（预取猜错时调用），返回取消的加载数
+        
+        其他请求正在等待同一加载时不取消。
+        """
+        key = name.lower()
+        return sum(self.fetch_flight.cancel_abandoned((resource, key)) for resource in ("pokemon", "species"))
+    
+    def invalidate(self, name: Optional[str] = None) -> int:
+        """失效内存缓存中的宝可梦与物种数据
+        
+        Args:
+            name: 宝可梦名称；为空时清空全部
+        
+        Returns:
+            被清除的条目数
+        """
+        if name is None:
+            return self.pokemon_cache.clear() + self.species_cache.clear()
+        key = name.lower()
+        return int(self.pokemon_cache.invalidate(key)) + int(self.species_cache.invalidate(key))
+    
+    async def get_evolution_chain(self, db: AsyncSession, chain_id: int) -> Dict[str, Any]:
         """获取宝可梦进化链信息
         
+        依次查询进化关系图、数据库缓存，均未命中时从 PokeAPI 获取并写库、登记到图中
+        
         Args:
+            db: 数据库会话
             chain_id: 进化链 ID
         
         Returns:
-            进化链的详细信息
+            展开后的进化链 {"id", "root", "species", "steps"}
             
         Raises:
             PokeApiError: 当PokeAPI调用失败时
+            DatabaseError: 当数据库操作失败时
         """
+        chain = self.evolution_graph.get_chain(chain_id)
+        if chain is not None:
+            return chain
+        return await self.fetch_flight.do(
+            ("evolution", chain_id),
+            lambda: run_in_sibling_session(db, self._load_evolution_chain, chain_id)
+        )
+    
+    async def _load_evolution_chain(self, db: AsyncSession, chain_id: int) -> Dict[str, Any]:
+        """图未命中时的加载路径：数据库缓存 → PokeAPI，并登记到进化关系图"""
         try:
-            # 直接从 PokeAPI 获取，不缓存（进化链数据相对稳定且不频繁使用）
-            return await self.pokeapi_client.get_pokemon_evolution_chain(chain_id)
+            chain_data = await self.evolution_chain_repository.get_evolution_chain(db, chain_id)
+            DB_CACHE_REQUESTS.labels("evolution_chain", "hit" if chain_data else "miss").inc()
+            
+            if not chain_data:
+                try:
+                    # 如果数据库中没有，则从 PokeAPI 获取并存入数据库缓存
+                    chain_data = await self.pokeapi_client.get_pokemon_evolution_chain(chain_id)
+                    await self.evolution_chain_repository.save_evolution_chain(db, chain_data)
+                except Exception as e:
+                    if _is_not_found(e):
+                        raise PokeApiError(message=f"进化链 ID {chain_id} 未找到")
+                    raise PokeApiError(message=f"获取进化链数据失败: {str(e)}")
+            
+            return self.evolution_graph.add_chain(chain_data)
+        except PokeApiError:
+            raise
         except Exception as e:
-            if "not found" in str(e).lower():
-                raise PokeApiError(message=f"进化链 ID {chain_id} 未找到")
-            raise PokeApiError(message=f"获取进化链数据失败: {str(e)}")
\ No newline at end of file
+            raise DatabaseError(message=f"数据库操作失败: {str(e)}")
+    
+    async def get_species_evolution_chain(self, db: AsyncSession, species_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """根据物种投影中的 evolution_chain_id 获取进化链
+        
+        Args:
+            db: 数据库会话
+            species_data: 宝可梦物种投影
+        
+        Returns:
+            展开后的进化链；物种数据未关联进化链时返回 None
+            
+        Raises:
+            PokeApiError: 当PokeAPI调用失败时
+        """
+        chain_id = self.parse_evolution_chain_id(species_data)
+        if chain_id is None:
+            return None
+        return await self.get_evolution_chain(db, chain_id)
+    
+    @staticmethod
+    def parse_evolution_chain_id(species_data: Dict[str, Any]) -> Optional[int]:
+        """物种投影关联的进化链 ID（投影计算时已从 evolution_chain.url 中解析）"""
+        return species_data.get("evolution_chain_id")
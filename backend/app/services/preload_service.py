@@ -0,0 +1,238 @@
+"""PokeAPI 预加载服务
+
+遍历 PokeAPI 列表接口，将 pokemon / pokemon-species / evolution-chain 批量镜像到数据库缓存，
+使新部署或重置数据库后的首批问题无需冷启动请求上游。
+
+- 并发：单个资源内以 concurrency 为上限并发获取，失败按指数退避重试
+- 可恢复：每获取 batch_size 条即批量写库提交，中断后重跑只处理尚未入库的 ID
+- 增量：已入库且未超过 refresh_days 的记录直接跳过，只获取新增（或过期）的 ID
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.clients.pokeapi_client import PokeAPIClient
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.repositories.evolution_chain_repository import EvolutionChainRepository
+from app.repositories.pokemon_repository import PokemonRepository
+from app.services.answer_cache_service import answer_cache_service
+from app.services.evolution_graph_service import evolution_graph
+from app.services.name_resolver_service import name_resolver
+from app.services.pokemon_service import pokemon_memory_cache, species_memory_cache
+from app.utils.pokemon_projection import project_species
+
+logger = logging.getLogger(__name__)
+
+# 预加载的资源，按依赖顺序排列
+PRELOAD_RESOURCES = ("pokemon", "pokemon-species", "evolution-chain")
+
+
+class PreloadProgress:
+    """单个资源的预加载进度"""
+
+    def __init__(self, resource: str, total: int = 0, skipped: int = 0):
+        self.resource = resource
+        self.total = total
+        self.skipped = skipped
+        self.saved = 0
+        self.missing = 0
+        self.failed_ids: List[int] = []
+
+    @property
+    def processed(self) -> int:
+        return self.saved + self.missing + len(self.failed_ids)
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.skipped
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "resource": self.resource,
+            "total": self.total,
+            "skipped": self.skipped,
+            "saved": self.saved,
+            "missing": self.missing,
+            "failed": len(self.failed_ids),
+            "failed_ids": self.failed_ids,
+        }
+
+
+def parse_resource_id(url: str) -> Optional[int]:
+    """从资源链接（如 .../pokemon/25/）中解析 ID"""
+    tail = (url or "").rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+class PreloadService:
+    """将 PokeAPI 数据批量镜像到数据库缓存"""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        refresh_days: Optional[int] = None,
+        on_progress: Optional[Callable[[PreloadProgress], None]] = None,
+        retry_delay: float = 0.5,
+    ):
+        # 失败重试由 _with_retries 统一负责，客户端不再重试
+        self.pokeapi_client = PokeAPIClient(retries=0)
+        self.concurrency = max(1, concurrency or settings.preload_concurrency)
+        self.batch_size = max(1, batch_size or settings.preload_batch_size)
+        self.max_retries = settings.preload_max_retries if max_retries is None else max_retries
+        self.refresh_days = settings.preload_refresh_days if refresh_days is None else refresh_days
+        self.on_progress = on_progress
+        self.retry_delay = retry_delay
+
+    async def run(self, db: AsyncSession, resources: Iterable[str] = PRELOAD_RESOURCES, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """依次预加载各资源
+
+        Args:
+            db: 数据库会话
+            resources: 要预加载的资源名
+            limit: 每种资源最多处理的 ID 数（按 ID 升序，调试/抽样用）
+
+        Returns:
+            各资源的进度汇总
+        """
+        summary = []
+        for resource in resources:
+            progress = await self.preload_resource(db, resource, limit)
+            summary.append(progress.as_dict())
+        return summary
+
+    async def preload_resource(self, db: AsyncSession, resource: str, limit: Optional[int] = None) -> PreloadProgress:
+        """预加载单个资源：列出全部 ID → 跳过已缓存 → 分批并发获取并写库"""
+        fetch, list_cached_ids, save_many = self._resource_handlers(resource)
+        listing = await self._with_retries(lambda: self.pokeapi_client.list_resources(resource))
+        ids = sorted({
+            resource_id for resource_id in (parse_resource_id(item.get("url")) for item in listing.get("results", []))
+            if resource_id is not None
+        })
+        if limit is not None:
+            ids = ids[:limit]
+
+        cached = await list_cached_ids(db, self._refresh_cutoff())
+        todo = [resource_id for resource_id in ids if resource_id not in cached]
+        progress = PreloadProgress(resource=resource, total=len(ids), skipped=len(ids) - len(todo))
+        self._report(progress)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(resource_id: int) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self._with_retries(lambda: fetch(resource_id))
+                except Exception as e:
+                    if isinstance(e, HTTPException) and e.status_code == 404:
+                        progress.missing += 1
+                        return None
+                    logger.warning(f"预加载 {resource}/{resource_id} 失败: {str(e)}")
+                    progress.failed_ids.append(resource_id)
+                    return None
+
+        for start in range(0, len(todo), self.batch_size):
+            batch = todo[start:start + self.batch_size]
+            fetched = [data for data in await asyncio.gather(*(fetch_one(i) for i in batch)) if data]
+            # 每批单独提交：中断后重跑时已提交的批次会被跳过
+            progress.saved += await save_many(db, fetched)
+            self._forget_cached(resource, fetched)
+            self._report(progress)
+        return progress
+
+    def _resource_handlers(self, resource: str):
+        """资源名 → (按 ID 获取, 列出已缓存 ID, 批量保存)"""
+        handlers: Dict[str, tuple] = {
+            "pokemon": (
+                lambda resource_id: self.pokeapi_client.get_pokemon(str(resource_id)),
+                PokemonRepository.list_pokemon_ids,
+                PokemonRepository.save_many_pokemon,
+            ),
+            "pokemon-species": (
+                lambda resource_id: self.pokeapi_client.get_pokemon_species(str(resource_id)),
+                PokemonRepository.list_species_ids,
+                PokemonRepository.save_many_species,
+            ),
+            "evolution-chain": (
+                self.pokeapi_client.get_pokemon_evolution_chain,
+                EvolutionChainRepository.list_evolution_chain_ids,
+                EvolutionChainRepository.save_many_evolution_chains,
+            ),
+        }
+        if resource not in handlers:
+            raise ValueError(f"不支持预加载的资源: {resource}")
+        return handlers[resource]
+
+    def _refresh_cutoff(self) -> Optional[datetime]:
+        """早于该时间更新的记录视为过期；refresh_days 为 0 时已缓存记录一律跳过"""
+        if self.refresh_days <= 0:
+            return None
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=self.refresh_days)
+
+    async def _with_retries(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """执行 func，非 404 失败时按指数退避重试 max_retries 次"""
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except HTTPException as e:
+                if e.status_code == 404 or attempt >= self.max_retries:
+                    raise
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+            await asyncio.sleep(self.retry_delay * (2 ** attempt))
+            attempt += 1
+
+    @staticmethod
+    def _forget_cached(resource: str, fetched: List[Dict[str, Any]]) -> None:
+        """数据已更新：清理进程内基于旧数据的内存缓存，并登记物种名称与进化链"""
+        for data in fetched:
+            name = (data.get("name") or "").lower()
+            if resource == "pokemon":
+                pokemon_memory_cache.invalidate(name)
+                answer_cache_service.forget_pokemon(name)
+            elif resource == "pokemon-species":
+                species_memory_cache.invalidate(name)
+                answer_cache_service.forget_pokemon(name)
+                name_resolver.add_species(project_species(data))
+            elif resource == "evolution-chain":
+                evolution_graph.add_chain(data)
+
+    def _report(self, progress: PreloadProgress) -> None:
+        logger.info(
+            f"预加载 {progress.resource}: {progress.processed}/{progress.pending} "
+            f"(跳过 {progress.skipped}, 缺失 {progress.missing}, 失败 {len(progress.failed_ids)})"
+        )
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+
+async def run_preload(resources: Iterable[str] = PRELOAD_RESOURCES, limit: Optional[int] = None, **options: Any) -> List[Dict[str, Any]]:
+    """在独立会话中执行一次预加载（供启动任务与命令行使用）
+
+    Args:
+        resources: 要预加载的资源名
+        limit: 每种资源最多处理的 ID 数
+        **options: 传给 PreloadService 的参数
+
+    Returns:
+        各资源的进度汇总
+    """
+    async with AsyncSessionLocal() as db:
+        return await PreloadService(**options).run(db, resources, limit)
+
+
+async def preload_in_background() -> None:
+    """启动时的后台预加载任务：失败只记录日志，不影响服务"""
+    try:
+        summary = await run_preload()
+        logger.info(f"启动预加载完成: {summary}")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"启动预加载失败: {str(e)}")
@@ -0,0 +1,37 @@
+"""PokeAPI 快照导出服务
+
+将数据库缓存中的 pokemon / pokemon-species / evolution-chain 完整数据打包为离线快照
+（格式见 app.clients.pokeapi_snapshot）。数据库缓存可先由预加载命令（preload.py）从 PokeAPI 填充。
+"""
+from typing import AsyncIterator, Callable, Dict, Any, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.clients.pokeapi_snapshot import SnapshotWriter, snapshot_keys
+from app.repositories.evolution_chain_repository import EvolutionChainRepository
+from app.repositories.pokemon_repository import PokemonRepository
+
+# 快照收录的资源及其数据来源（与 PokeAPIClient 的端点前缀一致）
+SNAPSHOT_SOURCES: Tuple[Tuple[str, Callable[[AsyncSession], AsyncIterator[Dict[str, Any]]]], ...] = (
+    ("pokemon", PokemonRepository.iter_pokemon_data),
+    ("pokemon-species", PokemonRepository.iter_species_data),
+    ("evolution-chain", EvolutionChainRepository.iter_evolution_chains),
+)
+
+
+async def export_snapshot(db: AsyncSession, path: str) -> Dict[str, int]:
+    """从数据库缓存导出快照文件（写入临时文件后原子替换 path）
+
+    Args:
+        db: 数据库会话
+        path: 快照文件路径
+
+    Returns:
+        各资源的记录数
+    """
+    counts: Dict[str, int] = {}
+    with SnapshotWriter(path) as writer:
+        for resource, iterate in SNAPSHOT_SOURCES:
+            counts[resource] = 0
+            async for data in iterate(db):
+                writer.add(snapshot_keys(resource, data), data)
+                counts[resource] += 1
+    return counts
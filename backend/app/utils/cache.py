@@ -0,0 +1,113 @@
+"""进程内 LRU + TTL 缓存
+
+- 容量上限：超出时淘汰最久未使用的条目
+- TTL：每个条目独立的过期时间，过期条目在访问时惰性清除
+- 统计：命中 / 未命中 / 淘汰 / 过期计数
+
+缓存实例通过 register_cache 登记到 cache_registry，统计与失效接口据此统一访问。
+仅在单个事件循环内使用，不做线程同步。
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class LRUTTLCache:
+    """容量受限、条目带 TTL 的 LRU 缓存"""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # key -> (过期时间戳, 值)；OrderedDict 末尾为最近使用
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取条目；未命中或已过期时返回 default"""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        """条目存在且未过期（不计入命中统计、不调整 LRU 顺序）"""
+        entry = self._entries.get(key, _MISSING)
+        return entry is not _MISSING and entry[0] > self._clock()
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """读取未过期的条目（不计入命中统计、不调整 LRU 顺序）；不存在或已过期时返回 default"""
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING or entry[0] <= self._clock():
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """写入条目；超出容量时淘汰最久未使用的条目"""
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """删除指定条目，返回是否存在"""
+        return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """删除所有满足 predicate(key, value) 的条目，返回删除数量"""
+        doomed = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+        for key in doomed:
+            del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> int:
+        """清空缓存，返回清除的条目数"""
+        count = len(self._entries)
+        self._entries.clear()
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """返回计数与容量信息"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 进程内所有已登记的缓存：name -> 实例
+cache_registry: Dict[str, LRUTTLCache] = {}
+
+
+def register_cache(cache: LRUTTLCache) -> LRUTTLCache:
+    """登记缓存实例，供统计/失效接口访问"""
+    cache_registry[cache.name] = cache
+    return cache
@@ -0,0 +1,60 @@
+"""JSON 编解码后端
+
+安装 orjson 时使用其编解码（比标准库 json 快数倍），未安装或 FAST_JSON_ENABLED=False 时退回标准库，
+两种后端输出等价（UTF-8、紧凑分隔符、不转义非 ASCII 字符）。用于：
+- FastJSONResponse：未声明 response_model 的接口的默认响应类
+- HTTPClient：上游（PokeAPI / 豆包）响应体解析
+- 数据库引擎：JSON 列的序列化与反序列化
+
+注意：回答提示词中的数据片段仍使用标准库 json.dumps（带空格分隔符），以保持提示词字节级不变。
+"""
+import json
+from typing import Any, Union
+from starlette.responses import JSONResponse
+from app.core.config import settings
+
+try:
+    import orjson  # 可选依赖（pip install orjson）
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# 实际使用的后端名称：orjson / json
+JSON_BACKEND = "orjson" if ORJSON_AVAILABLE and settings.fast_json_enabled else "json"
+
+if JSON_BACKEND == "orjson":
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """序列化为 UTF-8 字节串"""
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+
+    def dumps(obj: Any) -> str:
+        """序列化为字符串"""
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode("utf-8")
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """解析 JSON；格式错误时抛出 json.JSONDecodeError（orjson.JSONDecodeError 为其子类）"""
+        return orjson.loads(data)
+else:
+    def dumps(obj: Any) -> str:
+        """序列化为字符串"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps_bytes(obj: Any) -> bytes:
+        """序列化为 UTF-8 字节串"""
+        return dumps(obj).encode("utf-8")
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """解析 JSON；格式错误时抛出 json.JSONDecodeError"""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """使用当前 JSON 后端序列化的 JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
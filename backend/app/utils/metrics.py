@@ -0,0 +1,228 @@
+"""进程内指标（Prometheus 文本格式）
+
+提供计数器（Counter）、直方图（Histogram）与采集时回调（CallbackMetric）三类指标，
+登记到 metrics_registry 后由 /metrics 接口以 Prometheus 文本格式（0.0.4）输出。
+
+- 开销：记录一次观测只是一次字典查找与若干整数/浮点累加，直方图按桶二分定位，不加锁
+  （与 LRUTTLCache 一样只在单个事件循环内使用）
+- 基数：标签值只应来自有限集合（阶段名、上游名、状态码等）；每个指标的标签组合数超过
+  max_series 后，新的组合统一记入全部标签为 "other" 的序列，避免异常输入撑爆内存
+"""
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# 默认延迟桶（秒）：覆盖毫秒级缓存命中到数十秒的 LLM 生成
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 单个指标允许的标签组合数上限
+DEFAULT_MAX_SERIES = 200
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    """带标签的指标基类：按标签值元组缓存子序列"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), max_series: int = DEFAULT_MAX_SERIES):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._series: Dict[LabelValues, object] = {}
+        self._overflow_key: LabelValues = ("other",) * len(self.labelnames)
+
+    def labels(self, *values: object):
+        """按标签值取得子序列（不存在时创建）"""
+        key = tuple(str(value) for value in values)
+        child = self._series.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，收到 {key}")
+            if len(self._series) >= self.max_series:
+                key = self._overflow_key
+                child = self._series.get(key)
+            if child is None:
+                child = self._new_child()
+                self._series[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in self._series.items():
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: LabelValues, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """无标签计数器的累加"""
+        self.labels().inc(amount)
+
+    def _render_child(self, key: LabelValues, child: _CounterChild) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _Timer:
+    """with 语句计时，退出时（包括异常）记录观测值"""
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "bucket_counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # 各桶（非累积）计数，末位为 +Inf 桶；输出时再累积
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """固定分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS, max_series: int = DEFAULT_MAX_SERIES):
+        super().__init__(name, documentation, labelnames, max_series)
+        self.upper_bounds = tuple(sorted(float(bound) for bound in buckets if not math.isinf(bound)))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        """无标签直方图的观测"""
+        self.labels().observe(value)
+
+    def time(self, *values: object) -> _Timer:
+        """计时上下文：with histogram.time("stage"): ..."""
+        return _Timer(self.labels(*values))
+
+    def _render_child(self, key: LabelValues, child: _HistogramChild) -> List[str]:
+        names = self.labelnames + ("le",)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds + (math.inf,), child.bucket_counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class CallbackMetric:
+    """采集时才计算取值的指标（gauge / counter），适合已有统计数据的对象（连接池、内存缓存）
+
+    collect 返回 [(标签值元组, 取值)]；采集出错时该指标输出为空，不影响其他指标。
+    """
+
+    def __init__(self, name: str, documentation: str, type_name: str, labelnames: Sequence[str], collect: Callable[[], Iterable[Tuple[Sequence[object], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.type_name = type_name
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type_name}"]
+        try:
+            samples = list(self.collect())
+        except Exception:
+            return lines
+        for values, value in samples:
+            labels = _format_labels(self.labelnames, [str(v) for v in values])
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标登记表：按名称去重，按登记顺序输出"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        """登记指标并返回；同名指标已存在时返回已登记的实例"""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def get(self, name: str) -> Optional[object]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """以 Prometheus 文本格式输出全部指标"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 进程内共享的指标登记表
+metrics_registry = MetricsRegistry()
+
+# Prometheus 文本格式的 Content-Type
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
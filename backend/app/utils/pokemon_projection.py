@@ -0,0 +1,95 @@
+"""宝可梦数据精简投影
+
+PokeAPI 的 /pokemon 数据包含数百条带版本细节的技能，单条可达数百 KB，而问答只用到
+其中十余个字段。保存时预先计算精简投影（summary 列），热路径只读取投影；
+完整 JSON 仍保存在 data 列中，按需读取。
+
+投影结构调整时递增 PROJECTION_VERSION，读取到旧版本投影时会从完整数据重新计算。
+读取投影时附带记录的 updated_at（不落库），供提示词上下文缓存判断数据是否变化。
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+PROJECTION_VERSION = 1
+
+# 投影中保留的技能数量（按 PokeAPI 返回顺序）
+PROJECTION_MOVE_LIMIT = 20
+
+
+def project_pokemon(pokemon_data: Dict[str, Any]) -> Dict[str, Any]:
+    """从 /pokemon 完整数据计算精简投影
+
+    Returns:
+        {"v", "id", "name", "height", "weight", "types", "stats", "abilities", "hidden_ability", "moves"}
+    """
+    abilities = pokemon_data.get("abilities", [])
+    return {
+        "v": PROJECTION_VERSION,
+        "id": pokemon_data.get("id"),
+        "name": pokemon_data.get("name"),
+        "height": pokemon_data.get("height"),
+        "weight": pokemon_data.get("weight"),
+        "types": [t["type"]["name"] for t in pokemon_data.get("types", [])],
+        "stats": {s["stat"]["name"]: s["base_stat"] for s in pokemon_data.get("stats", [])},
+        "abilities": [a["ability"]["name"] for a in abilities if not a.get("is_hidden")],
+        "hidden_ability": next((a["ability"]["name"] for a in abilities if a.get("is_hidden")), None),
+        "moves": [m["move"]["name"] for m in pokemon_data.get("moves", [])[:PROJECTION_MOVE_LIMIT]],
+    }
+
+
+def project_species(species_data: Dict[str, Any]) -> Dict[str, Any]:
+    """从 /pokemon-species 完整数据计算精简投影
+
+    图鉴描述与名称按语言建索引（每种语言取第一条），避免每次请求线性扫描。
+
+    Returns:
+        {"v", "id", "name", "default_pokemon", "capture_rate", "base_happiness", "growth_rate",
+         "egg_groups", "color", "evolution_chain_id", "flavor_text": {语言: 文本}, "names": {语言: 名称}}
+    """
+    flavor_text: Dict[str, str] = {}
+    for entry in species_data.get("flavor_text_entries", []):
+        flavor_text.setdefault(entry["language"]["name"], entry["flavor_text"])
+    names: Dict[str, str] = {}
+    for entry in species_data.get("names", []):
+        language = (entry.get("language") or {}).get("name")
+        if language and entry.get("name"):
+            names.setdefault(language, entry["name"])
+    return {
+        "v": PROJECTION_VERSION,
+        "id": species_data.get("id"),
+        "name": species_data.get("name"),
+        "default_pokemon": _default_pokemon_name(species_data),
+        "capture_rate": species_data.get("capture_rate"),
+        "base_happiness": species_data.get("base_happiness"),
+        "growth_rate": (species_data.get("growth_rate") or {}).get("name"),
+        "egg_groups": [g["name"] for g in species_data.get("egg_groups", [])],
+        "color": (species_data.get("color") or {}).get("name"),
+        "evolution_chain_id": _evolution_chain_id(species_data),
+        "flavor_text": flavor_text,
+        "names": names,
+    }
+
+
+def is_current(projection: Optional[Dict[str, Any]]) -> bool:
+    """投影是否存在且为当前版本"""
+    return bool(projection) and projection.get("v") == PROJECTION_VERSION
+
+
+def with_updated_at(projection: Dict[str, Any], updated_at: Optional[datetime]) -> Dict[str, Any]:
+    """返回附带 updated_at（ISO 字符串）的投影副本，不修改原投影"""
+    return {**projection, "updated_at": updated_at.isoformat() if updated_at else None}
+
+
+def _default_pokemon_name(species_data: Dict[str, Any]) -> Optional[str]:
+    """物种的默认形态宝可梦名（如 deoxys → deoxys-normal），缺失时退回物种名"""
+    for variety in species_data.get("varieties", []):
+        if variety.get("is_default"):
+            return (variety.get("pokemon") or {}).get("name")
+    return species_data.get("name")
+
+
+def _evolution_chain_id(species_data: Dict[str, Any]) -> Optional[int]:
+    """从 evolution_chain.url（如 .../evolution-chain/2/）中解析进化链 ID"""
+    url = (species_data.get("evolution_chain") or {}).get("url") or ""
+    tail = url.rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
@@ -0,0 +1,151 @@
+"""回答提示词上下文：按意图选择数据字段，并缓存序列化后的片段
+
+上下文选择（select_answer_context）：按意图类型只提供回答需要的字段（如问属性时不附技能与图鉴描述），
+按详细程度确定回答字数与 max_completion_tokens；详细程度为 high 时追加种族值、特性与图鉴描述。
+LLM 给出的其他意图类型、未解析意图或关闭 ANSWER_CONTEXT_SELECTION_ENABLED 时使用完整上下文。
+
+回答提示词中的宝可梦数据、物种数据与进化链数据只随数据本身变化，与问题无关。
+各片段在首次使用时精简并序列化为字符串，按数据身份、版本与所选字段缓存：
+- 宝可梦 / 物种：(类型, id, 投影版本, updated_at, 字段)，数据刷新后 updated_at 变化即生成新片段
+- 进化链：(类型, 进化链 ID, 图登记 revision)，进化链重新登记后即生成新片段
+此后组装提示词只需拼接缓存的字符串。缺少版本标记（如 updated_at 为空）的数据不缓存，每次现算。
+"""
+import json
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from app.core.config import settings
+from app.utils.cache import LRUTTLCache, register_cache
+
+# 片段只按版本区分新旧，TTL 仅用于回收长期不用的条目
+prompt_context_cache = register_cache(LRUTTLCache(
+    "prompt_context",
+    max_entries=settings.prompt_context_cache_max_entries,
+    ttl_seconds=settings.memory_cache_ttl_seconds
+))
+
+
+# 提示词可包含的全部字段（完整上下文）
+POKEMON_FIELDS = ("name", "height", "weight", "types", "stats", "abilities", "hidden_ability", "moves")
+SPECIES_FIELDS = ("name", "capture_rate", "base_happiness", "growth_rate", "egg_groups", "color", "flavor_text")
+
+# 意图类型 -> (宝可梦字段, 物种字段)；物种字段为空时不附物种数据。进化链只在 evolution 意图下获取，有则附上
+INTENT_CONTEXT_FIELDS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "basic_info": (("name", "height", "weight", "types", "abilities"), ()),
+    "stats": (("name", "types", "stats"), ()),
+    "abilities": (("name", "types", "abilities", "hidden_ability"), ()),
+    "moves": (("name", "types", "moves"), ()),
+    "evolution": (("name", "types"), ("name", "growth_rate")),
+    "intro": (("name", "height", "weight", "types", "stats", "abilities", "hidden_ability"), ("name", "color", "egg_groups", "flavor_text")),
+}
+
+# 详细程度为 high 时追加的字段
+HIGH_DETAIL_FIELDS: Tuple[Tuple[str, ...], Tuple[str, ...]] = (("stats", "abilities", "hidden_ability"), ("name", "flavor_text"))
+
+# 详细程度 -> 回答字数上限（写入回答指令）；未知取值按 normal
+DETAIL_MAX_CHARS = {"low": 80, "normal": 200, "high": 400}
+
+
+class AnswerContext:
+    """一次回答生成的上下文：提供的数据字段、回答字数上限与 max_completion_tokens"""
+
+    __slots__ = ("name", "pokemon_fields", "species_fields", "max_chars", "max_completion_tokens")
+
+    def __init__(self, name: str, pokemon_fields: Tuple[str, ...], species_fields: Tuple[str, ...], max_chars: int, max_completion_tokens: int):
+        # 上下文名称：意图类型，完整上下文为 full（指标标签）
+        self.name = name
+        self.pokemon_fields = pokemon_fields
+        self.species_fields = species_fields
+        self.max_chars = max_chars
+        self.max_completion_tokens = max_completion_tokens
+
+
+def select_answer_context(intent: Optional[Dict[str, Any]]) -> AnswerContext:
+    """按意图类型与详细程度选择回答上下文"""
+    if not settings.answer_context_selection_enabled or not intent:
+        return AnswerContext("full", POKEMON_FIELDS, SPECIES_FIELDS, DETAIL_MAX_CHARS["normal"], settings.answer_max_tokens_high)
+    detail = intent.get("detail_level")
+    if detail not in DETAIL_MAX_CHARS:
+        detail = "normal"
+    budget = {"low": settings.answer_max_tokens_low, "normal": settings.answer_max_tokens_normal, "high": settings.answer_max_tokens_high}[detail]
+    fields = INTENT_CONTEXT_FIELDS.get(intent.get("intent_type") or "")
+    if fields is None:
+        return AnswerContext("full", POKEMON_FIELDS, SPECIES_FIELDS, DETAIL_MAX_CHARS[detail], budget)
+    pokemon_fields, species_fields = fields
+    if detail == "high":
+        pokemon_fields = _with_fields(POKEMON_FIELDS, pokemon_fields, HIGH_DETAIL_FIELDS[0])
+        species_fields = _with_fields(SPECIES_FIELDS, species_fields, HIGH_DETAIL_FIELDS[1])
+    return AnswerContext(intent["intent_type"], pokemon_fields, species_fields, DETAIL_MAX_CHARS[detail], budget)
+
+
+def _with_fields(order: Tuple[str, ...], fields: Tuple[str, ...], extra: Tuple[str, ...]) -> Tuple[str, ...]:
+    """追加字段，按完整上下文中的顺序排列"""
+    selected = set(fields) | set(extra)
+    return tuple(name for name in order if name in selected)
+
+
+def simplify_pokemon(pokemon_data: Dict[str, Any], fields: Tuple[str, ...] = POKEMON_FIELDS) -> Dict[str, Any]:
+    """精简宝可梦投影，只保留提示词需要的字段以减少 token 消耗"""
+    simplified = {
+        "name": pokemon_data.get("name"),
+        "height": pokemon_data.get("height"),
+        "weight": pokemon_data.get("weight"),
+        "types": pokemon_data.get("types", []),
+        "stats": pokemon_data.get("stats", {}),
+        "abilities": pokemon_data.get("abilities", []),
+        "hidden_ability": pokemon_data.get("hidden_ability"),
+        "moves": pokemon_data.get("moves", [])[:10]  # 只保留前10个技能
+    }
+    return {name: simplified[name] for name in fields}
+
+
+def simplify_species(species_data: Dict[str, Any], fields: Tuple[str, ...] = SPECIES_FIELDS) -> Dict[str, Any]:
+    """精简物种投影，图鉴描述只取简体中文"""
+    simplified = {
+        "name": species_data.get("name"),
+        "capture_rate": species_data.get("capture_rate"),
+        "base_happiness": species_data.get("base_happiness"),
+        "growth_rate": species_data.get("growth_rate"),
+        "egg_groups": species_data.get("egg_groups", []),
+        "color": species_data.get("color"),
+        "flavor_text": (species_data.get("flavor_text") or {}).get("zh-Hans", "")
+    }
+    return {name: simplified[name] for name in fields}
+
+
+def pokemon_context(pokemon_data: Dict[str, Any], fields: Tuple[str, ...] = POKEMON_FIELDS) -> str:
+    """宝可梦数据片段（JSON 字符串）"""
+    return _memoize(
+        ("pokemon", pokemon_data.get("id"), pokemon_data.get("v"), pokemon_data.get("updated_at"), fields),
+        pokemon_data.get("updated_at"),
+        lambda: json.dumps(simplify_pokemon(pokemon_data, fields), ensure_ascii=False)
+    )
+
+
+def species_context(species_data: Dict[str, Any], fields: Tuple[str, ...] = SPECIES_FIELDS) -> str:
+    """物种数据片段（JSON 字符串）"""
+    return _memoize(
+        ("species", species_data.get("id"), species_data.get("v"), species_data.get("updated_at"), fields),
+        species_data.get("updated_at"),
+        lambda: json.dumps(simplify_species(species_data, fields), ensure_ascii=False)
+    )
+
+
+def evolution_context(evolution_data: Optional[Dict[str, Any]]) -> str:
+    """进化链片段（含前导换行与标题）；无进化链数据时为空字符串"""
+    if not evolution_data:
+        return ""
+    return _memoize(
+        ("evolution", evolution_data.get("id"), evolution_data.get("revision")),
+        evolution_data.get("revision"),
+        lambda: f"\n进化链数据：{json.dumps(evolution_data.get('steps', []), ensure_ascii=False)}"
+    )
+
+
+def _memoize(key: Hashable, stamp: Any, build: Callable[[], str]) -> str:
+    """按 key 读取片段，未命中时构建并写入；stamp 为空说明无法判断数据是否变化，不缓存"""
+    if stamp is None:
+        return build()
+    fragment = prompt_context_cache.get(key)
+    if fragment is None:
+        fragment = build()
+        prompt_context_cache.set(key, fragment)
+    return fragment
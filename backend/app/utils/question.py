@@ -0,0 +1,17 @@
+"""用户问题文本处理工具"""
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?？!！。.~～ "
+
+
+def normalize_question(question: str) -> str:
+    """归一化用户问题，用于判定“同一个问题”
+
+    全角/半角统一（NFKC）、折叠空白、转小写并去掉句末标点，
+    例如 "喷火龙的属性是什么？" 与 " 喷火龙的属性是什么? " 归一化结果相同。
+    """
+    text = unicodedata.normalize("NFKC", question)
+    text = _WHITESPACE.sub(" ", text).strip().lower()
+    return text.rstrip(_TRAILING_PUNCTUATION)
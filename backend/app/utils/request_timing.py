@@ -0,0 +1,68 @@
+"""单个请求的耗时分解（Server-Timing）
+
+ServerTimingMiddleware 为请求创建 RequestTimings 并放入上下文变量，请求处理过程中
+各处以 record_timing 累加分项耗时（意图解析、数据库语句、上游请求等），响应头发出时
+输出为 Server-Timing 头。未启用时上下文中没有 RequestTimings，record_timing 直接返回。
+
+子任务（asyncio.create_task）会继承上下文，流水线中并发阶段的耗时同样计入；
+并发执行的分项按各自耗时累加，因此分项之和可能大于总耗时。
+"""
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from contextlib import contextmanager
+
+
+class RequestTimings:
+    """请求内各分项的累计耗时（秒）"""
+
+    __slots__ = ("started_at", "durations", "handler_done_at")
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        # 接口函数返回的时刻：其后至响应头发出的时间记为 serialize
+        self.handler_done_at: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header_value(self, now: Optional[float] = None) -> str:
+        """生成 Server-Timing 头：各分项与 total，单位毫秒"""
+        now = time.perf_counter() if now is None else now
+        durations = dict(self.durations)
+        if self.handler_done_at is not None:
+            durations["serialize"] = now - self.handler_done_at
+        durations["total"] = now - self.started_at
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in durations.items())
+
+
+# 当前请求的耗时分解；未启用 Server-Timing 或不在请求上下文中时为 None
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """向当前请求累加一项耗时"""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timing_stage(name: str) -> Iterator[None]:
+    """with 语句计时并累加到当前请求"""
+    if current_timings.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
+
+
+def mark_handler_done() -> None:
+    """标记接口函数即将返回，此后到响应头发出的时间记为 serialize"""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.handler_done_at = time.perf_counter()
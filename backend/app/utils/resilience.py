@@ -0,0 +1,286 @@
+"""上游容错原语：熔断器、并发隔离舱、近期延迟窗口与抖动退避
+
+- CircuitBreaker：连续失败达到阈值后熔断（open），恢复期内请求直接失败；恢复期过后进入
+  半开（half_open），只放行一个探测请求，成功则闭合，失败则重新熔断
+- Bulkhead：并发名额 + FIFO 等待，名额释放时直接转交队首等待者；等待超时抛出 BulkheadFullError
+- LatencyWindow：最近 N 次请求的耗时（超时的请求按不低于超时值记入），用于自适应超时与对冲阈值
+- backoff_delay：全抖动指数退避（在 [0, min(上限, 基数 × 2^attempt)] 内均匀取值）
+
+每个上游一个 UpstreamGuard（熔断器 + 隔离舱 + 延迟窗口），由 HTTPClient 按上游名创建并登记到
+upstream_registry，状态接口与指标据此读取。仅在单个事件循环内使用，不做线程同步。
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """熔断期间拒绝请求"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"上游 {name} 熔断中，{retry_after:.1f} 秒后重试")
+
+
+class BulkheadFullError(Exception):
+    """等待并发名额超时"""
+
+    def __init__(self, name: str, waited: float):
+        self.name = name
+        self.waited = waited
+        super().__init__(f"{name} 并发已满，等待 {waited:.1f} 秒仍无空闲名额")
+
+
+class Bulkhead:
+    """并发隔离舱：最多 max_concurrency 个调用同时进行，其余按到达顺序等待"""
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        # 等待超时被拒绝的次数
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        """有空闲名额且无人排队时立即占用"""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    async def acquire(self, timeout: Optional[float] = None) -> float:
+        """占用一个名额，返回等待秒数；等待超过 timeout 时抛出 BulkheadFullError"""
+        if self.try_acquire():
+            return 0.0
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        except asyncio.TimeoutError:
+            # 超时的同时恰好获得名额时照常返回
+            if not waiter.done():
+                self._abandon(waiter)
+                self.rejected += 1
+                raise BulkheadFullError(self.name, time.perf_counter() - start)
+        except asyncio.CancelledError:
+            # 调用方被取消：已获得的名额转交下一个等待者
+            if waiter.done():
+                self.release()
+            else:
+                self._abandon(waiter)
+            raise
+        return time.perf_counter() - start
+
+    def release(self) -> None:
+        """归还名额：直接转交队首的等待者"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _abandon(self, waiter: "asyncio.Future[None]") -> None:
+        waiter.cancel()
+        self._waiters.remove(waiter)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"max_concurrency": self.max_concurrency, "in_flight": self.in_flight, "queued": len(self._waiters), "rejected": self.rejected}
+
+
+class CircuitBreaker:
+    """按连续失败次数熔断的断路器"""
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self._clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # 熔断次数 / 熔断期间拒绝的请求数
+        self.opened = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        """距离允许探测的剩余秒数（非熔断状态为 0）"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.recovery_seconds - self._clock())
+
+    def before_call(self) -> None:
+        """请求前调用：熔断中或半开探测进行中时抛出 CircuitOpenError"""
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.retry_after())
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self.state = CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = OPEN
+            self._opened_at = self._clock()
+            self.opened += 1
+
+    def release(self) -> None:
+        """请求被取消、未产生结论时调用：释放半开探测名额"""
+        self._probe_in_flight = False
+
+    def reset(self) -> None:
+        """手动闭合"""
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_seconds": self.recovery_seconds,
+            "retry_after": round(self.retry_after(), 3),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyWindow:
+    """最近 window 个耗时样本（秒）；样本数不足 min_samples 时不给出分位数"""
+
+    def __init__(self, window: int, min_samples: int):
+        self.window = max(1, window)
+        self._samples: "deque[float]" = deque(maxlen=self.window)
+        self.min_samples = max(1, min_samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """最近秩分位数；样本不足时为 None"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = min(len(ordered), max(1, int(-(-fraction * len(ordered) // 1))))
+        return ordered[rank - 1]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: Callable[[float, float], float] = random.uniform) -> float:
+    """第 attempt 次重试（从 0 起）前的等待秒数：全抖动指数退避"""
+    return rng(0.0, min(cap, base * (2 ** attempt)))
+
+
+class UpstreamGuard:
+    """单个上游的熔断器、隔离舱与近期延迟，同一上游的所有客户端实例共享
+
+    隔离舱为 None 表示不限制该上游的并发。
+
+    延迟按调用类型分别统计：同一上游的不同调用（如 LLM 的意图解析与回答生成）耗时相差一个数量级，
+    共用一个窗口会让快调用的样本把慢调用的超时收紧到必然超时。call 为 None 时使用默认窗口 latency。
+    超时：该调用类型的样本足够时取 p99 × timeout_multiplier，不低于 min_timeout、不超过调用方给出的固定超时；
+    对冲：样本足够时，请求超过给定分位数的耗时仍未返回即发出对冲请求（见 hedge_delay）。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        breaker: CircuitBreaker,
+        latency: LatencyWindow,
+        base_timeout: float,
+        bulkhead: Optional[Bulkhead] = None,
+        adaptive_timeout: bool = False,
+        timeout_multiplier: float = 4.0,
+        min_timeout: float = 1.0,
+    ):
+        self.name = name
+        self.breaker = breaker
+        self.latency = latency
+        self.base_timeout = base_timeout
+        self.bulkhead = bulkhead
+        self.adaptive_timeout = adaptive_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        # 调用类型 -> 延迟窗口（与默认窗口容量、最少样本数相同）
+        self.call_latency: Dict[str, LatencyWindow] = {}
+
+    def window(self, call: Optional[str] = None) -> LatencyWindow:
+        """调用类型对应的延迟窗口，首次使用时创建"""
+        if call is None:
+            return self.latency
+        window = self.call_latency.get(call)
+        if window is None:
+            window = self.call_latency[call] = LatencyWindow(self.latency.window, self.latency.min_samples)
+        return window
+
+    def timeout(self, configured: Optional[float] = None, call: Optional[str] = None) -> float:
+        """本次请求使用的超时（秒）；configured 为调用方的固定超时，默认取 base_timeout"""
+        configured = self.base_timeout if configured is None else configured
+        if not self.adaptive_timeout:
+            return configured
+        p99 = self.window(call).percentile(0.99)
+        if p99 is None:
+            return configured
+        return min(configured, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def hedge_delay(self, percentile: float) -> Optional[float]:
+        """发出对冲请求前的等待秒数；未启用或样本不足时为 None"""
+        if percentile <= 0:
+            return None
+        return self.latency.percentile(percentile)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.stats(),
+            "bulkhead": self.bulkhead.stats() if self.bulkhead is not None else None,
+            **self._latency_stats(None),
+            "calls": {call: self._latency_stats(call) for call in self.call_latency},
+        }
+
+    def _latency_stats(self, call: Optional[str]) -> Dict[str, Any]:
+        window = self.window(call)
+        p50, p99 = window.percentile(0.5), window.percentile(0.99)
+        return {
+            "latency_samples": len(window),
+            "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+            "timeout_seconds": round(self.timeout(call=call), 3),
+        }
+
+
+# 进程内所有上游：上游名 -> UpstreamGuard
+upstream_registry: Dict[str, UpstreamGuard] = {}
+
+
+def register_upstream(guard: UpstreamGuard) -> UpstreamGuard:
+    """登记上游（同名已存在时返回已有实例）"""
+    return upstream_registry.setdefault(guard.name, guard)
@@ -0,0 +1,78 @@
+"""单飞（single-flight）调用合并
+
+同一 key 的并发调用只执行一次底层协程，其余调用方等待并共享同一结果或异常。
+底层任务以 shield 方式等待：个别调用方被取消不会中断正在进行的调用。
+确定不再需要结果时（如推测性预取猜错），可用 cancel_abandoned 取消已无调用方等待的调用。
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按 key 合并进行中的异步调用"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        # 各 key 当前仍在等待结果的调用方数
+        self._waiters: Dict[Hashable, int] = {}
+        # 实际执行次数 / 搭便车（共享结果）次数
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """执行 func 或加入同 key 的进行中调用
+
+        Args:
+            key: 合并键（如 ("pokemon", "charizard")）
+            func: 无参协程工厂，仅在没有进行中的调用时执行
+
+        Returns:
+            底层调用的结果；底层异常原样抛给所有调用方
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            remaining = self._waiters[key] - 1
+            if remaining:
+                self._waiters[key] = remaining
+            else:
+                del self._waiters[key]
+
+    def cancel_abandoned(self, key: Hashable) -> bool:
+        """取消 key 对应的进行中调用，前提是已没有调用方在等待其结果
+
+        Returns:
+            是否取消了调用
+        """
+        task = self._inflight.get(key)
+        if task is None or task.done() or self._waiters.get(key, 0):
+            return False
+        task.cancel()
+        return True
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有调用方都已取消时，标记异常已读取，避免未检索异常告警
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """当前进行中的调用数"""
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        """返回执行与合并计数"""
+        return {"in_flight": len(self._inflight), "executions": self.executions, "shared": self.shared}
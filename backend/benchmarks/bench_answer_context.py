@@ -0,0 +1,59 @@
+"""回答上下文选择基准：各意图类型 / 详细程度下提示词大小与输出预算，完整上下文 vs 按意图选择
+
+以真实规模的宝可梦 / 物种投影与进化链（同 bench_prompt_context）为每种意图构建回答提示词，
+对比完整上下文与 select_answer_context 选出的上下文的系统提示字符数与 max_completion_tokens。
+按 --mix 给出的意图占比（默认为假设的线上分布）汇总详细程度为 normal 时每次回答的平均值。
+
+字符数是 token 数的近似（中文约 1 字 1 token，JSON 键与英文更少）；实际用量见 pokedex_llm_tokens 指标。
+
+运行：python -m benchmarks.bench_answer_context [--mix basic_info=0.3,stats=0.2,...]
+"""
+import argparse
+from typing import Dict, Tuple
+
+from app.clients.doubao_client import DoubaoClient
+from app.utils.prompt_context import AnswerContext, INTENT_CONTEXT_FIELDS, select_answer_context
+from benchmarks.bench_prompt_context import EVOLUTION, POKEMON, SPECIES
+
+DEFAULT_MIX = "basic_info=0.3,stats=0.2,abilities=0.1,moves=0.1,evolution=0.2,intro=0.1"
+QUESTION = "喷火龙的数据？"
+
+
+def prompt_size(client: DoubaoClient, intent_type: str, context: AnswerContext) -> int:
+    evolution = EVOLUTION if intent_type == "evolution" else None
+    system_prompt, user_prompt = client.build_answer_messages(QUESTION, POKEMON, SPECIES, evolution, context)
+    return len(system_prompt) + len(user_prompt)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight)
+    total = sum(mix.values())
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def main(args: argparse.Namespace) -> None:
+    client = DoubaoClient()
+    full = select_answer_context(None)
+    rows: Dict[Tuple[str, str], Tuple[int, int, int]] = {}
+    print(f"{'intent':<11} {'detail':<7} {'full_chars':>10} {'chars':>6} {'saved':>6} {'max_tokens':>10}")
+    for intent_type in INTENT_CONTEXT_FIELDS:
+        for detail in ("low", "normal", "high"):
+            context = select_answer_context({"intent_type": intent_type, "detail_level": detail})
+            before, after = prompt_size(client, intent_type, full), prompt_size(client, intent_type, context)
+            rows[intent_type, detail] = (before, after, context.max_completion_tokens)
+            print(f"{intent_type:<11} {detail:<7} {before:>10} {after:>6} {1 - after / before:>6.0%} {context.max_completion_tokens:>10}")
+
+    mix = parse_mix(args.mix)
+    before = sum(weight * rows[name, "normal"][0] for name, weight in mix.items())
+    after = sum(weight * rows[name, "normal"][1] for name, weight in mix.items())
+    print(f"mix (detail=normal): prompt chars {before:.0f} -> {after:.0f} ({1 - after / before:.0%} fewer), "
+          f"max_completion_tokens {full.max_completion_tokens} -> {rows[next(iter(mix)), 'normal'][2]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="意图占比，如 basic_info=0.3,stats=0.2")
+    main(parser.parse_args())
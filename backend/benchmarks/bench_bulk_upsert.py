@@ -0,0 +1,95 @@
+"""批量写入基准：逐条 SELECT + INSERT/UPDATE + COMMIT vs 单条 upsert vs 批量 upsert
+
+以文件型 SQLite 写入 --records 条物种大小的记录（每次提交都会落盘），对比：
+- legacy：旧实现，每条记录先 SELECT，再 INSERT 或 UPDATE，然后提交
+- single：save_pokemon_species，每条记录一条 upsert 语句 + 提交
+- bulk：save_many_species，每 --batch-size 条一条 upsert 语句 + 提交
+每种方式先写入空表（全部插入），再重复写入一次（全部更新）。
+
+运行：python -m benchmarks.bench_bulk_upsert [--records 1000] [--batch-size 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.db.models import PokemonSpecies
+from app.repositories.answer_cache_repository import AnswerCacheRepository
+from app.repositories.pokemon_repository import PokemonRepository
+from app.utils.pokemon_projection import project_species
+
+
+def build_species(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": i, "name": f"species-{i}", "capture_rate": 45, "base_happiness": 50,
+            "growth_rate": {"name": "medium-slow"}, "color": {"name": "red"},
+            "egg_groups": [{"name": "monster"}, {"name": "dragon"}],
+            "names": [{"name": f"name-{i}-{lang}", "language": {"name": lang}} for lang in ("zh-Hans", "zh-Hant", "ja", "en", "fr", "de")],
+            "flavor_text_entries": [{"flavor_text": "x" * 120, "language": {"name": lang}} for lang in ("zh-Hans", "en", "ja", "fr", "de") * 6],
+            "varieties": [{"is_default": True, "pokemon": {"name": f"species-{i}"}}],
+            "evolution_chain": {"url": f"https://pokeapi.co/api/v2/evolution-chain/{i}/"},
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+async def legacy_save(db: AsyncSession, species_data: Dict[str, Any]) -> None:
+    """旧实现：SELECT → INSERT/UPDATE → COMMIT"""
+    name = species_data["name"].lower()
+    result = await db.execute(select(PokemonSpecies).where(PokemonSpecies.name == name))
+    existing = result.scalars().first()
+    if existing:
+        existing.data = species_data
+        existing.summary = project_species(species_data)
+    else:
+        db.add(PokemonSpecies(id=species_data["id"], name=name, data=species_data, summary=project_species(species_data)))
+    await AnswerCacheRepository.delete_for_pokemon(db, name)
+    await db.commit()
+
+
+async def main(records: int, batch_size: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    species = build_species(records)
+
+    async def legacy(db):
+        for data in species:
+            await legacy_save(db, data)
+
+    async def single(db):
+        for data in species:
+            await PokemonRepository.save_pokemon_species(db, data)
+
+    async def bulk(db):
+        await PokemonRepository.save_many_species(db, species, batch_size=batch_size)
+
+    print(f"records={records}  batch_size={batch_size}")
+    for label, write in (("legacy", legacy), ("single", single), ("bulk", bulk)):
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            await db.execute(delete(PokemonSpecies))
+            await db.commit()
+            timings = []
+            for _ in ("insert", "update"):
+                start = time.perf_counter()
+                await write(db)
+                timings.append(time.perf_counter() - start)
+        print(f"{label:<7} insert={timings[0]:7.2f}s  update={timings[1]:7.2f}s")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.records, args.batch_size))
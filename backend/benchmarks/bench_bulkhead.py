@@ -0,0 +1,91 @@
+"""上游并发隔离基准：豆包处理能力下降时，LLM 调用积压对回答耗时与 PokeAPI 请求的影响
+
+豆包桩模拟降级的提供方：同时只处理 --llm-capacity 个请求、每个耗时 --llm-latency-ms，其余在提供方排队。
+同时发出 --llm-calls 个回答生成（DoubaoClient.generate_answer，失败时使用兜底回答），
+期间以 --pokeapi-concurrency 个并发持续请求 PokeAPI 桩（PokeAPIClient.get_pokemon）。
+
+输出：
+- 回答生成：LLM 回答数 / 兜底回答数、耗时 p50 / p99、豆包在途请求峰值
+- PokeAPI：请求耗时 p50 / p99
+
+运行：python -m benchmarks.bench_bulkhead [--llm-calls 200] [--llm-capacity 8] [--llm-latency-ms 500]
+      （以 DOUBAO_MAX_CONCURRENCY=0 / 16 分别运行比较）
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import List
+
+
+async def main(args: argparse.Namespace) -> None:
+    os.environ.setdefault("DOUBAO_API_KEY", "bench")
+    from app.clients.doubao_client import DoubaoClient
+    from app.clients.pokeapi_client import PokeAPIClient
+    from app.core.config import settings
+    from benchmarks.load_test import percentile
+    from benchmarks.stubs import FaultProfile, StubArk, StubPokeAPI, install_stub_upstreams
+
+    install_stub_upstreams(
+        StubPokeAPI(FaultProfile(args.latency_ms, seed=1)),
+        StubArk(FaultProfile(args.llm_latency_ms, seed=2, capacity=args.llm_capacity)),
+    )
+    doubao, pokeapi = DoubaoClient(), PokeAPIClient()
+    pokemon_data = {"name": "pikachu", "types": ["electric"], "stats": {}}
+    answer_seconds: List[float] = []
+    pokeapi_seconds: List[float] = []
+    fallbacks = 0
+    peak_in_flight = 0
+    done = asyncio.Event()
+
+    async def answer(i: int) -> None:
+        nonlocal fallbacks
+        start = time.perf_counter()
+        _, used_fallback = await doubao.generate_answer(f"皮卡丘的属性？{i}", pokemon_data, {})
+        answer_seconds.append(time.perf_counter() - start)
+        fallbacks += used_fallback
+
+    async def lookups(worker: int) -> None:
+        i = worker
+        while not done.is_set():
+            start = time.perf_counter()
+            await pokeapi.get_pokemon(f"mon{i % 1000 + 1}")
+            pokeapi_seconds.append(time.perf_counter() - start)
+            i += args.pokeapi_concurrency
+
+    async def sample_in_flight() -> None:
+        nonlocal peak_in_flight
+        bulkhead = doubao.http_client.guard.bulkhead
+        while not done.is_set():
+            if bulkhead is not None:
+                peak_in_flight = max(peak_in_flight, bulkhead.in_flight)
+            await asyncio.sleep(0.01)
+
+    workers = [asyncio.ensure_future(lookups(w)) for w in range(args.pokeapi_concurrency)]
+    sampler = asyncio.ensure_future(sample_in_flight())
+    start = time.perf_counter()
+    await asyncio.gather(*(answer(i) for i in range(args.llm_calls)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*workers, sampler)
+
+    answer_seconds.sort()
+    pokeapi_seconds.sort()
+    print(f"doubao_max_concurrency={settings.doubao_max_concurrency} llm_calls={args.llm_calls} "
+          f"llm_capacity={args.llm_capacity} llm_latency={args.llm_latency_ms}ms")
+    print(f"answers: llm={args.llm_calls - fallbacks} fallback={fallbacks} "
+          f"p50={percentile(answer_seconds, 0.5) * 1000:.0f}ms p99={percentile(answer_seconds, 0.99) * 1000:.0f}ms "
+          f"all_done={elapsed:.1f}s"
+          + (f" peak_in_flight={peak_in_flight}" if doubao.http_client.guard.bulkhead is not None else ""))
+    print(f"pokeapi: requests={len(pokeapi_seconds)} p50={percentile(pokeapi_seconds, 0.5) * 1000:.1f}ms "
+          f"p99={percentile(pokeapi_seconds, 0.99) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-calls", type=int, default=200, help="同时发出的回答生成数")
+    parser.add_argument("--llm-capacity", type=int, default=8, help="豆包桩同时处理的请求数")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0, help="豆包桩处理单个请求的耗时")
+    parser.add_argument("--pokeapi-concurrency", type=int, default=4, help="并发请求 PokeAPI 的协程数")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="PokeAPI 桩的响应延迟")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""数据库访问并发基准：同步 Session vs AsyncSession
+
+每个模拟请求执行一次耗时约 --query-ms 的查询（SQLite 自定义函数模拟慢查询）。
+- sync：旧实现，在协程中直接调用同步 Session，查询期间阻塞整个事件循环
+- async：AsyncSession + aiosqlite，查询在驱动线程中执行，事件循环继续调度其他请求
+
+运行：python -m benchmarks.bench_db_concurrency [--query-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+LEVELS = (1, 4, 8, 16, 32)
+
+
+def _register_sleep(sync_engine) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, _record):
+        dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * pct) - 1)]
+
+
+async def _measure(request, in_flight: int, rounds: int) -> List[float]:
+    samples: List[float] = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        await request()
+        samples.append(time.perf_counter() - start)
+
+    for _ in range(rounds):
+        await asyncio.gather(*(one() for _ in range(in_flight)))
+    return samples
+
+
+async def main(query_ms: int, rounds: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    sync_engine = create_engine(f"sqlite:///{path}", pool_size=40, max_overflow=0)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=40, max_overflow=0)
+    _register_sleep(sync_engine)
+    _register_sleep(async_engine.sync_engine)
+    query = text(f"SELECT bench_sleep({query_ms})")
+
+    async def sync_request() -> None:
+        await asyncio.sleep(0)
+        with Session(sync_engine) as db:
+            db.execute(query).scalar()
+
+    async def async_request() -> None:
+        await asyncio.sleep(0)
+        async with AsyncSession(async_engine) as db:
+            (await db.execute(query)).scalar()
+
+    # 预热连接池
+    await _measure(async_request, max(LEVELS), 1)
+    print(f"query={query_ms}ms  rounds={rounds}")
+    for in_flight in LEVELS:
+        for label, request in (("sync", sync_request), ("async", async_request)):
+            samples = await _measure(request, in_flight, rounds)
+            print(f"{label:<6} in_flight={in_flight:<3} p50={statistics.median(samples) * 1000:7.1f}ms "
+                  f"p99={_percentile(samples, 0.99) * 1000:7.1f}ms")
+
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--query-ms", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.query_ms, args.rounds))
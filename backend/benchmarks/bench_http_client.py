@@ -0,0 +1,96 @@
+"""HTTPClient 连接复用基准
+
+在本机启动一个最小 HTTP/1.1 桩服务（支持 keep-alive），对比：
+- before：每次请求新建 httpx.AsyncClient（旧实现）
+- after：HTTPClient 共享连接池
+
+运行：python -m benchmarks.bench_http_client [--requests 500] [--concurrency 10]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+from app.clients.http_client import HTTPClient, close_http_clients
+
+_BODY = b'{"id": 6, "name": "charizard"}'
+_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(_BODY)).encode() + b"\r\n"
+    b"Connection: keep-alive\r\n\r\n" + _BODY
+)
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """按请求逐个返回固定 JSON，保持连接直到客户端关闭"""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            writer.write(_RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def _summary(label: str, samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    return (f"{label:<8} n={len(samples):<5} mean={statistics.mean(samples) * 1000:.3f}ms "
+            f"p50={statistics.median(samples) * 1000:.3f}ms p99={p99 * 1000:.3f}ms")
+
+
+async def _run(fetch, total: int, concurrency: int) -> List[float]:
+    samples: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await fetch()
+            samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return samples
+
+
+async def main(total: int, concurrency: int) -> None:
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    async def before() -> None:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{base_url}/pokemon/charizard", timeout=10)
+            response.json()
+
+    pooled = HTTPClient(base_url=base_url, timeout=10)
+
+    async def after() -> None:
+        await pooled.get("pokemon/charizard")
+
+    # 预热，排除首次导入与首个连接的影响
+    await _run(before, 20, concurrency)
+    await _run(after, 20, concurrency)
+
+    print(_summary("before", await _run(before, total, concurrency)))
+    print(_summary("after", await _run(after, total, concurrency)))
+
+    await close_http_clients()
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,81 @@
+"""JSON 后端基准：标准库 json vs orjson
+
+按真实规模构造 /pokemon 数据（上百条技能，每条带多个版本细节），对比：
+- upstream：HTTPClient 解析上游响应体（httpx Response.json() vs fast_json.loads）
+- response：未声明 response_model 的接口响应序列化（JSONResponse vs FastJSONResponse）
+- column：JSON 列读写（SQLAlchemy 默认 json.dumps/json.loads vs 引擎 json_serializer/json_deserializer）
+  以文件型 SQLite 反复 get_pokemon 读取完整 data 列
+
+运行：python -m benchmarks.bench_json [--moves 120] [--rounds 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from starlette.responses import JSONResponse
+
+from app.db.base import Base
+from app.repositories.pokemon_repository import PokemonRepository
+from app.utils import fast_json
+from benchmarks.bench_projection import build_pokemon
+
+
+def _time(func: Callable[[], object], rounds: int) -> List[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _report(label: str, samples: List[float]) -> None:
+    print(f"{label:<18} p50={statistics.median(samples) * 1000:8.3f}ms  mean={statistics.mean(samples) * 1000:8.3f}ms")
+
+
+async def _time_column_reads(json_serializer, json_deserializer, payload, rounds: int) -> List[float]:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    options = {"json_serializer": json_serializer, "json_deserializer": json_deserializer} if json_serializer else {}
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **options)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    samples = []
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await PokemonRepository.save_pokemon(db, payload)
+        for _ in range(rounds):
+            start = time.perf_counter()
+            await PokemonRepository.get_pokemon(db, payload["name"])
+            samples.append(time.perf_counter() - start)
+    await engine.dispose()
+    return samples
+
+
+def main(moves: int, rounds: int) -> None:
+    if fast_json.JSON_BACKEND != "orjson":
+        print("orjson 未安装或 FAST_JSON_ENABLED=False，fast_json 使用标准库，对比无意义")
+        return
+    payload = build_pokemon(moves)
+    body = json.dumps(payload).encode("utf-8")
+    print(f"moves={moves}  rounds={rounds}  payload={len(body) / 1024:.1f}KB")
+
+    _report("upstream json", _time(lambda: httpx.Response(200, content=body).json(), rounds))
+    _report("upstream orjson", _time(lambda: fast_json.loads(httpx.Response(200, content=body).content), rounds))
+    _report("response json", _time(lambda: JSONResponse(payload), rounds))
+    _report("response orjson", _time(lambda: fast_json.FastJSONResponse(payload), rounds))
+    _report("column json", asyncio.run(_time_column_reads(None, None, payload, rounds)))
+    _report("column orjson", asyncio.run(_time_column_reads(fast_json.dumps, fast_json.loads, payload, rounds)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--moves", type=int, default=120)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    main(args.moves, args.rounds)
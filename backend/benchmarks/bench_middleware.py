@@ -0,0 +1,137 @@
+"""中间件基准：@app.middleware("http")（BaseHTTPMiddleware）vs 纯 ASGI 中间件栈
+
+直接以 ASGI 协议调用 main.app（不经过网络与 HTTP 客户端），上游 PokeAPI / 豆包以 MockTransport 桩替代，
+数据库使用临时 SQLite 文件。分别装配两种中间件栈，以 --concurrency 个并发请求测量吞吐：
+- legacy：原 add_encoding_header（BaseHTTPMiddleware）+ CORS
+- asgi：JSONCharsetMiddleware + TimingMiddleware + RequestIDMiddleware + CORS（当前实现）
+接口：GET /health 与 POST /api/v1/ask（预热后问题命中问答缓存，测量的是服务端框架与中间件开销）。
+
+运行：python -m benchmarks.bench_middleware [--requests 5000] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+# 必须在导入应用前指定数据库与密钥：应用配置在导入时读取环境变量
+os.environ["DATABASE_URL_ENV"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+os.environ.setdefault("DOUBAO_API_KEY", "bench")
+
+import httpx
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import CORSMiddleware
+
+from app.clients.http_client import set_shared_client
+from app.core.config import settings
+from main import app
+
+POKEMON = {
+    "id": 6, "name": "charizard", "height": 17, "weight": 905,
+    "types": [{"type": {"name": "fire"}}, {"type": {"name": "flying"}}],
+    "stats": [{"stat": {"name": "hp"}, "base_stat": 78}],
+    "abilities": [{"ability": {"name": "blaze"}, "is_hidden": False}],
+    "moves": [{"move": {"name": "scratch"}}],
+}
+SPECIES = {
+    "id": 6, "name": "charizard", "capture_rate": 45,
+    "names": [{"name": "喷火龙", "language": {"name": "zh-Hans"}}],
+    "flavor_text_entries": [{"flavor_text": "喷出火焰", "language": {"name": "zh-Hans"}}],
+    "varieties": [{"is_default": True, "pokemon": {"name": "charizard"}}],
+}
+
+
+def pokeapi_handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/pokemon/charizard"):
+        return httpx.Response(200, json=POKEMON)
+    if request.url.path.endswith("/pokemon-species/charizard"):
+        return httpx.Response(200, json=SPECIES)
+    return httpx.Response(404)
+
+
+def doubao_handler(request: httpx.Request) -> httpx.Response:
+    content = json.dumps({"pokemon_name": "charizard", "original_name": "喷火龙", "intent_type": "basic_info", "detail_level": "normal"})
+    if "提取结构化意图" not in json.loads(request.content)["messages"][0]["content"]:
+        content = "喷火龙是火/飞行属性。"
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+async def legacy_add_encoding_header(request, call_next):
+    """原实现：BaseHTTPMiddleware 包装每个请求"""
+    response = await call_next(request)
+    content_type = response.headers.get("Content-Type", "")
+    if request.url.path.startswith("/api/") and content_type.startswith("application/json"):
+        response.headers["Content-Type"] = "application/json; charset=utf-8"
+    return response
+
+
+async def call(method: str, path: str, body: bytes = b"") -> int:
+    """以 ASGI 协议直接调用应用，返回状态码"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def measure(method: str, path: str, body: bytes, requests: int, concurrency: int) -> float:
+    """以 concurrency 个并发工作协程完成 requests 次请求，返回每秒请求数"""
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            assert await call(method, path, body) == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, concurrency: int) -> None:
+    set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient(transport=httpx.MockTransport(pokeapi_handler)))
+    set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient(transport=httpx.MockTransport(doubao_handler)))
+    for handler in app.router.on_startup:
+        await handler()
+
+    cors = next(m for m in app.user_middleware if m.cls is CORSMiddleware)
+    stacks = {
+        "legacy": [cors, Middleware(BaseHTTPMiddleware, dispatch=legacy_add_encoding_header)],
+        "asgi": list(app.user_middleware),
+    }
+    ask_body = json.dumps({"question": "喷火龙是什么属性？"}).encode()
+    print(f"requests={requests}  concurrency={concurrency}")
+    try:
+        for label, stack in stacks.items():
+            # 替换中间件列表并清除已构建的中间件栈，下次调用时按新列表重建
+            app.user_middleware = stack
+            app.middleware_stack = None
+            await call("POST", "/api/v1/ask", ask_body)  # 预热：填充数据与问答缓存
+            health = await measure("GET", "/health", b"", requests, concurrency)
+            ask = await measure("POST", "/api/v1/ask", ask_body, requests, concurrency)
+            print(f"{label:<7} /health={health:8.0f} req/s  /api/v1/ask={ask:8.0f} req/s")
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
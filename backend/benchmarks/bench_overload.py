@@ -0,0 +1,91 @@
+"""过载基准：以超过处理能力的固定到达率（开环）向 /api/v1/ask 发送请求，比较准入控制开启与关闭
+
+闭环压测（load_test）中客户端收到响应后才发下一个请求，被拒绝的客户端会立即取下一个问题，
+无法反映过载；这里按 --rate 的泊松到达持续 --duration 秒，到达时间与响应无关。
+上游为进程内桩（见 benchmarks.stubs），每个请求询问一只此前未出现的宝可梦（cold），
+另有 --hit-ratio 比例的请求重复预热阶段已回答过的问题（问答缓存命中）。
+
+输出：
+- goodput：在客户端期限 --deadline 内成功返回的请求数 / 秒
+- 成功请求的 p50 / p99 延迟、缓存命中请求的 p99 延迟
+- 被拒绝（503/429）与超过期限 / 失败的请求数
+
+运行：python -m benchmarks.bench_overload [--rate 80] [--duration 10] [--deadline 5] [--hit-ratio 0.2]
+      （以 ADMISSION_ENABLED=False / True 分别运行比较）
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+
+async def main(args: argparse.Namespace) -> None:
+    os.environ["DATABASE_URL_ENV"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_overload.db')}"
+    os.environ.setdefault("DOUBAO_API_KEY", "bench")
+    import httpx
+    from app.core import admission
+    from benchmarks.load_test import build_questions, percentile
+    from benchmarks.stubs import FaultProfile, StubArk, StubPokeAPI, install_stub_upstreams
+    from main import app
+
+    install_stub_upstreams(StubPokeAPI(FaultProfile(args.latency_ms, seed=1)), StubArk(FaultProfile(args.llm_latency_ms, seed=2)))
+    for handler in app.router.on_startup:
+        await handler()
+
+    rng = random.Random(0)
+    warm_questions = build_questions(1, args.warm, evolution_every=4)
+    cold_questions = iter(build_questions(args.warm + 1, int(args.rate * args.duration * 2) + 1, evolution_every=4))
+    outcomes: List[Dict[str, Any]] = []
+
+    async def one(client: Any, body: Dict[str, Any], cached: bool) -> None:
+        # 超过期限的请求不取消（服务端照常处理完），只在统计时计为失败
+        start = time.perf_counter()
+        response = await client.post("/api/v1/ask", json=body)
+        seconds = time.perf_counter() - start
+        status = response.status_code if seconds <= args.deadline else "late"
+        outcomes.append({"status": status, "cached": cached, "seconds": seconds})
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+            # 预热：回答 --warm 个问题，供缓存命中请求使用
+            for body in warm_questions:
+                await client.post("/api/v1/ask", json=body)
+            tasks = []
+            start = time.perf_counter()
+            next_arrival = start
+            while next_arrival - start < args.duration:
+                await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+                cached = rng.random() < args.hit_ratio
+                body = rng.choice(warm_questions) if cached else next(cold_questions)
+                tasks.append(asyncio.ensure_future(one(client, body, cached)))
+                next_arrival += rng.expovariate(args.rate)
+            await asyncio.gather(*tasks)
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+
+    ok = sorted(o["seconds"] for o in outcomes if o["status"] == 200)
+    ok_cached = sorted(o["seconds"] for o in outcomes if o["status"] == 200 and o["cached"])
+    rejected = sum(1 for o in outcomes if o["status"] in (429, 503))
+    failed = len(outcomes) - len(ok) - rejected
+    print(f"admission={'on' if admission.ask_admission is not None else 'off'} rate={args.rate}/s duration={args.duration}s "
+          f"deadline={args.deadline}s hit_ratio={args.hit_ratio}")
+    print(f"requests={len(outcomes)} ok={len(ok)} rejected={rejected} failed_or_late={failed} "
+          f"goodput={len(ok) / args.duration:.1f}/s")
+    print(f"ok p50={percentile(ok, 0.5) * 1000:.0f}ms p99={percentile(ok, 0.99) * 1000:.0f}ms "
+          f"cached p99={percentile(ok_cached, 0.99) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=80.0, help="每秒到达的请求数（泊松到达）")
+    parser.add_argument("--duration", type=float, default=10.0, help="发送请求的时长（秒）")
+    parser.add_argument("--deadline", type=float, default=5.0, help="客户端期限（秒），超过即视为失败")
+    parser.add_argument("--hit-ratio", type=float, default=0.2, help="重复已回答问题（缓存命中）的请求比例")
+    parser.add_argument("--warm", type=int, default=50, help="预热阶段回答的问题数")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="PokeAPI 桩的响应延迟")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="豆包桩的响应延迟")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+"""数据库读取基准：完整 JSON（data 列）vs 精简投影（summary 列）
+
+按真实 /pokemon 数据的规模构造记录（上百条技能，每条带多个版本细节），
+分别以 get_pokemon（完整数据）与 get_pokemon_summary（投影）读取并解码，
+对比单次读取耗时与返回对象的序列化体积。
+
+运行：python -m benchmarks.bench_projection [--moves 120] [--reads 500]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.repositories.pokemon_repository import PokemonRepository
+
+
+def build_pokemon(moves: int) -> Dict[str, Any]:
+    version_details = [
+        {"level_learned_at": i, "move_learn_method": {"name": "level-up", "url": "https://pokeapi.co/api/v2/move-learn-method/1/"},
+         "version_group": {"name": f"version-{i}", "url": f"https://pokeapi.co/api/v2/version-group/{i}/"}}
+        for i in range(12)
+    ]
+    return {
+        "id": 6, "name": "charizard", "height": 17, "weight": 905,
+        "types": [{"slot": 1, "type": {"name": "fire"}}, {"slot": 2, "type": {"name": "flying"}}],
+        "stats": [{"stat": {"name": name}, "base_stat": 80, "effort": 0} for name in ("hp", "attack", "defense", "special-attack", "special-defense", "speed")],
+        "abilities": [{"ability": {"name": "blaze"}, "is_hidden": False}, {"ability": {"name": "solar-power"}, "is_hidden": True}],
+        "moves": [{"move": {"name": f"move-{i}", "url": f"https://pokeapi.co/api/v2/move/{i}/"}, "version_group_details": version_details} for i in range(moves)],
+        "sprites": {f"sprite_{i}": f"https://raw.githubusercontent.com/PokeAPI/sprites/{i}.png" for i in range(40)},
+    }
+
+
+async def _time_reads(read, reads: int) -> List[float]:
+    samples = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        await read()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main(moves: int, reads: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await PokemonRepository.save_pokemon(db, build_pokemon(moves))
+        full = await PokemonRepository.get_pokemon(db, "charizard")
+        summary = await PokemonRepository.get_pokemon_summary(db, "charizard")
+        print(f"moves={moves}  reads={reads}")
+        print(f"size    data={len(json.dumps(full)) / 1024:8.1f}KB  summary={len(json.dumps(summary)) / 1024:6.1f}KB")
+        for label, read in (
+            ("data", lambda: PokemonRepository.get_pokemon(db, "charizard")),
+            ("summary", lambda: PokemonRepository.get_pokemon_summary(db, "charizard")),
+        ):
+            samples = await _time_reads(read, reads)
+            print(f"{label:<8} p50={statistics.median(samples) * 1000:7.3f}ms  mean={statistics.mean(samples) * 1000:7.3f}ms")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--moves", type=int, default=120)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.moves, args.reads))
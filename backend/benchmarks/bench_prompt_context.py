@@ -0,0 +1,100 @@
+"""提示词构建基准：每次精简 + json.dumps vs 按数据版本缓存的片段拼接
+
+以真实规模的宝可梦 / 物种投影与进化链构造 --requests 个问题各不相同的请求，
+分别以旧实现（每次请求重新精简数据并序列化）与 DoubaoClient.build_answer_messages
+（片段按 id + updated_at 缓存，只做字符串拼接）构建提示词，对比单次构建耗时。
+
+运行：python -m benchmarks.bench_prompt_context [--requests 20000]
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.clients.doubao_client import ANSWER_INSTRUCTIONS, DoubaoClient
+from app.utils.prompt_context import prompt_context_cache
+
+POKEMON = {
+    "v": 1, "id": 6, "name": "charizard", "height": 17, "weight": 905, "types": ["fire", "flying"],
+    "stats": {name: 80 for name in ("hp", "attack", "defense", "special-attack", "special-defense", "speed")},
+    "abilities": ["blaze"], "hidden_ability": "solar-power",
+    "moves": [f"move-{i}" for i in range(20)], "updated_at": "2026-01-01T00:00:00",
+}
+SPECIES = {
+    "v": 1, "id": 6, "name": "charizard", "default_pokemon": "charizard", "capture_rate": 45, "base_happiness": 50,
+    "growth_rate": "medium-slow", "egg_groups": ["monster", "dragon"], "color": "red", "evolution_chain_id": 2,
+    "flavor_text": {lang: "口中喷出灼热的火焰，能把岩石也烧得通红。" * 2 for lang in ("zh-Hans", "zh-Hant", "ja", "en", "fr", "de")},
+    "names": {lang: "喷火龙" for lang in ("zh-Hans", "zh-Hant", "ja", "en", "fr", "de")},
+    "updated_at": "2026-01-01T00:00:00",
+}
+EVOLUTION = {
+    "id": 2, "root": "charmander", "species": ["charmander", "charmeleon", "charizard"], "revision": 1,
+    "steps": [
+        {"from": "charmander", "to": "charmeleon", "trigger": "level-up", "min_level": 16},
+        {"from": "charmeleon", "to": "charizard", "trigger": "level-up", "min_level": 36},
+    ],
+}
+
+
+def legacy_build(question: str, pokemon_data: Dict[str, Any], species_data: Dict[str, Any], evolution_data: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+    """旧实现：每次请求重新精简数据并 json.dumps"""
+    simplified_pokemon = {
+        "name": pokemon_data.get("name"),
+        "height": pokemon_data.get("height"),
+        "weight": pokemon_data.get("weight"),
+        "types": pokemon_data.get("types", []),
+        "stats": pokemon_data.get("stats", {}),
+        "abilities": pokemon_data.get("abilities", []),
+        "hidden_ability": pokemon_data.get("hidden_ability"),
+        "moves": pokemon_data.get("moves", [])[:10]
+    }
+    simplified_species = {
+        "name": species_data.get("name"),
+        "capture_rate": species_data.get("capture_rate"),
+        "base_happiness": species_data.get("base_happiness"),
+        "growth_rate": species_data.get("growth_rate"),
+        "egg_groups": species_data.get("egg_groups", []),
+        "color": species_data.get("color"),
+        "flavor_text": (species_data.get("flavor_text") or {}).get("zh-Hans", "")
+    }
+    evolution_section = ""
+    if evolution_data:
+        evolution_section = f"\n进化链数据：{json.dumps(evolution_data.get('steps', []), ensure_ascii=False)}"
+    system_prompt = f"""
+{ANSWER_INSTRUCTIONS.format(max_chars=200)}
+
+用户问题：{question}
+
+宝可梦数据：{json.dumps(simplified_pokemon, ensure_ascii=False)}
+宝可梦物种数据：{json.dumps(simplified_species, ensure_ascii=False)}{evolution_section}
+        """
+    return system_prompt, "请根据以上信息回答用户的问题："
+
+
+def _time_builds(build: Callable[..., Tuple[str, str]], questions: List[str]) -> List[float]:
+    samples = []
+    for question in questions:
+        start = time.perf_counter()
+        build(question, POKEMON, SPECIES, EVOLUTION)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(requests: int) -> None:
+    client = DoubaoClient()
+    questions = [f"喷火龙怎么进化？#{i}" for i in range(requests)]
+    assert client.build_answer_messages(questions[0], POKEMON, SPECIES, EVOLUTION) == legacy_build(questions[0], POKEMON, SPECIES, EVOLUTION)
+    prompt_context_cache.clear()
+
+    print(f"requests={requests}")
+    for label, build in (("legacy", legacy_build), ("memoized", client.build_answer_messages)):
+        samples = _time_builds(build, questions)
+        print(f"{label:<9} p50={statistics.median(samples) * 1e6:7.2f}us  mean={statistics.mean(samples) * 1e6:7.2f}us  total={sum(samples) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.requests)
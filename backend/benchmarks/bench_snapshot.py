@@ -0,0 +1,81 @@
+"""PokeAPI 离线快照基准：单次资源查询耗时
+
+对同一批桩数据（benchmarks.stubs，monN）比较 PokeAPIClient.get_pokemon 的三种来源：
+- http：经 HTTPClient 请求进程内 PokeAPI 桩（零注入延迟，只含客户端、传输与 JSON 解析开销）
+- db：从 SQLite 数据库缓存读取完整数据（PokemonRepository.get_pokemon）
+- snapshot：从 mmap 快照读取（PokeAPIClient 快照模式）
+另输出快照构建耗时、文件大小与打开（解析索引）耗时。
+
+运行：python -m benchmarks.bench_snapshot [--pokemon 1000] [--lookups 5000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.clients.pokeapi_client import PokeAPIClient
+from app.clients.pokeapi_snapshot import SnapshotWriter, close_pokeapi_snapshot, load_pokeapi_snapshot, snapshot_keys
+from app.db.base import Base
+from app.repositories.pokemon_repository import PokemonRepository
+from benchmarks.stubs import StubArk, StubPokeAPI, install_stub_upstreams, stub_pokemon
+
+
+async def per_lookup_us(lookup, names) -> float:
+    start = time.perf_counter()
+    for name in names:
+        await lookup(name)
+    return (time.perf_counter() - start) / len(names) * 1e6
+
+
+async def main(pokemon: int, lookups: int) -> None:
+    directory = tempfile.mkdtemp()
+    records = [stub_pokemon(pokemon_id) for pokemon_id in range(1, pokemon + 1)]
+    rng = random.Random(0)
+    names = [f"mon{rng.randint(1, pokemon)}" for _ in range(lookups)]
+
+    path = os.path.join(directory, "pokeapi.snapshot")
+    start = time.perf_counter()
+    with SnapshotWriter(path) as writer:
+        for record in records:
+            writer.add(snapshot_keys("pokemon", record), record)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    entries = load_pokeapi_snapshot(path)
+    open_ms = (time.perf_counter() - start) * 1000
+    close_pokeapi_snapshot()
+    print(f"snapshot: {pokemon} 条记录 / {entries} 个索引条目，{os.path.getsize(path) / 1024:.0f} KiB，"
+          f"构建 {build_ms:.1f} ms，打开 {open_ms:.2f} ms")
+
+    client = PokeAPIClient()
+    install_stub_upstreams(StubPokeAPI(), StubArk())
+    http_us = await per_lookup_us(client.get_pokemon, names)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await PokemonRepository.save_many_pokemon(db, records)
+        db_us = await per_lookup_us(lambda name: PokemonRepository.get_pokemon(db, name), names)
+    await engine.dispose()
+
+    load_pokeapi_snapshot(path)
+    try:
+        snapshot_us = await per_lookup_us(client.get_pokemon, names)
+    finally:
+        close_pokeapi_snapshot()
+
+    print(f"lookups={lookups}")
+    for label, value in (("http", http_us), ("db", db_us), ("snapshot", snapshot_us)):
+        print(f"{label:<9} {value:9.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pokemon", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.pokemon, args.lookups))
@@ -0,0 +1,212 @@
+"""压测：以固定并发驱动真实应用，上游为进程内桩（见 benchmarks.stubs）
+
+经 httpx.ASGITransport 调用 main.app（完整中间件栈、路由、数据库与缓存），PokeAPI / 豆包由桩应用模拟，
+可注入延迟与错误。数据库使用临时 SQLite 文件。每个并发级别依次测量两个阶段：
+- cold：每个请求询问一只此前未出现过的宝可梦（各级缓存均未命中，走完整的数据获取与回答生成）
+- warm：按相同顺序将 cold 阶段的问题重放 --warm-rounds 轮（命中问答缓存）
+问题中每 --evolution-every 个有一个是进化类问题（额外获取进化链）。
+--snapshot：先将全部桩数据打包为 PokeAPI 离线快照，应用以仅快照模式运行（不访问 PokeAPI 桩）。
+
+输出每个阶段的吞吐（req/s）、p50/p95/p99 延迟与非 2xx 响应数。
+基线：--update-baseline 将结果写入 --baseline 文件；否则存在基线时逐项比较，
+吞吐低于基线、p50 高于基线（另加 --slack-ms 绝对余量）或非 2xx 响应数多于基线，
+超过 --tolerance 即判定为退化，以退出码 1 结束。
+基线与运行环境相关，更换机器或调整桩参数后应重新生成。
+
+运行：python -m benchmarks.load_test [--concurrency 1 4 8 32] [--requests 200] [--latency-ms 20]
+      [--error-rate 0] [--baseline benchmarks/baselines/load_test.json] [--update-baseline] [--tolerance 0.3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "load_test.json"
+
+# 参与基线比较的指标：吞吐越高越好，p50 越低越好。
+# p95/p99 只输出不比较：cold 阶段每级仅数百个样本，尾部受 SQLite 写锁与调度抖动影响，波动超过 50%
+_HIGHER_IS_BETTER = ("rps",)
+_LOWER_IS_BETTER = ("p50_ms",)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """最近秩百分位数（sorted_values 须已升序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(-(-fraction * len(sorted_values) // 1))))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """汇总一次压测：吞吐与延迟分位数（毫秒）"""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+async def run_load(client: Any, path: str, bodies: Sequence[Dict[str, Any]], concurrency: int) -> Dict[str, float]:
+    """以 concurrency 个工作协程依次发送 bodies（闭环：每个协程收到响应后才发下一个请求）"""
+    remaining = iter(bodies)
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for body in remaining:
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if not response.is_success:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def compare_with_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+    slack_ms: float = 0.0,
+) -> List[str]:
+    """与基线逐项比较，返回退化描述（为空表示未退化）；基线中没有的场景跳过
+
+    延迟另有 slack_ms 的绝对余量，避免毫秒级的缓存命中路径因调度抖动误报。
+    """
+    regressions = []
+    for scenario, result in results.items():
+        expected = baseline.get(scenario)
+        if not expected:
+            continue
+        for metric in _HIGHER_IS_BETTER:
+            if metric in expected and result[metric] < expected[metric] * (1 - tolerance):
+                regressions.append(f"{scenario} {metric}: {result[metric]} < 基线 {expected[metric]}")
+        for metric in _LOWER_IS_BETTER:
+            if metric in expected and result[metric] > expected[metric] * (1 + tolerance) + slack_ms:
+                regressions.append(f"{scenario} {metric}: {result[metric]} > 基线 {expected[metric]}")
+        # 基线无错误时不允许出现错误
+        if result["errors"] > expected.get("errors", 0) * (1 + tolerance):
+            regressions.append(f"{scenario} errors: {result['errors']} > 基线 {expected.get('errors', 0)}")
+    return regressions
+
+
+def build_questions(first_id: int, count: int, evolution_every: int) -> List[Dict[str, Any]]:
+    """为 monN（N 从 first_id 起）各生成一个问题"""
+    questions = []
+    for offset in range(count):
+        pokemon_id = first_id + offset
+        evolution = evolution_every > 0 and offset % evolution_every == 0
+        questions.append({"question": f"mon{pokemon_id}怎么进化？" if evolution else f"mon{pokemon_id}的属性和种族值是什么？"})
+    return questions
+
+
+def build_stub_snapshot(path: str, count: int) -> None:
+    """将 mon1..monN 的桩数据写入快照文件"""
+    from app.clients.pokeapi_snapshot import SnapshotWriter, snapshot_keys
+    from benchmarks.stubs import stub_evolution_chain, stub_pokemon, stub_species
+
+    with SnapshotWriter(path) as writer:
+        for pokemon_id in range(1, count + 1):
+            writer.add(snapshot_keys("pokemon", stub_pokemon(pokemon_id)), stub_pokemon(pokemon_id))
+            writer.add(snapshot_keys("pokemon-species", stub_species(pokemon_id)), stub_species(pokemon_id))
+        for chain_id in range(1, (count + 2) // 3 + 1):
+            writer.add(snapshot_keys("evolution-chain", {"id": chain_id}), stub_evolution_chain(chain_id))
+
+
+async def main(args: argparse.Namespace) -> int:
+    # 应用配置在导入时读取环境变量，因此在此处（而非模块顶部）设置后再导入应用
+    os.environ["DATABASE_URL_ENV"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load_test.db')}"
+    os.environ.setdefault("DOUBAO_API_KEY", "bench")
+    if args.snapshot:
+        os.environ["POKEAPI_SNAPSHOT_PATH"] = os.path.join(tempfile.mkdtemp(), "pokeapi.snapshot")
+        os.environ["POKEAPI_SNAPSHOT_ONLY"] = "True"
+    import httpx
+    from benchmarks.stubs import FaultProfile, StubArk, StubPokeAPI, install_stub_upstreams
+    from main import app
+
+    pokeapi_faults = FaultProfile(args.latency_ms, args.jitter_ms, args.error_rate, seed=1)
+    ark_faults = FaultProfile(args.llm_latency_ms, args.jitter_ms, args.error_rate, seed=2)
+    if args.snapshot:
+        # 应用启动时映射快照，需在启动前构建完成
+        build_stub_snapshot(os.environ["POKEAPI_SNAPSHOT_PATH"], len(args.concurrency) * args.requests)
+    pokeapi, ark = StubPokeAPI(pokeapi_faults), StubArk(ark_faults)
+    install_stub_upstreams(pokeapi, ark)
+    for handler in app.router.on_startup:
+        await handler()
+
+    config = {
+        "requests": args.requests,
+        "warm_rounds": args.warm_rounds,
+        "evolution_every": args.evolution_every,
+        "snapshot": args.snapshot,
+        "pokeapi": pokeapi_faults.describe(),
+        "llm": ark_faults.describe(),
+    }
+    print(f"config: {json.dumps(config, ensure_ascii=False)}")
+    print(f"{'scenario':<10} {'requests':>8} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    results: Dict[str, Dict[str, float]] = {}
+    next_id = 1
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test", timeout=60) as client:
+            for concurrency in args.concurrency:
+                # 每个并发级别使用一批新的宝可梦，保证 cold 阶段不受前一级别的缓存影响
+                questions = build_questions(next_id, args.requests, args.evolution_every)
+                next_id += args.requests
+                for phase, bodies in (("cold", questions), ("warm", questions * args.warm_rounds)):
+                    scenario = f"{phase}/c{concurrency}"
+                    results[scenario] = await run_load(client, "/api/v1/ask", bodies, concurrency)
+                    r = results[scenario]
+                    print(f"{scenario:<10} {r['requests']:>8} {r['errors']:>6} {r['rps']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+    print(f"upstream calls: pokeapi={sum(pokeapi.calls.values())} llm={sum(ark.calls.values())}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({"config": config, "results": results}, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"基线已写入 {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"未找到基线 {baseline_path}，跳过比较（使用 --update-baseline 生成）")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("config") != config:
+        print("基线的压测参数与本次不同，跳过比较")
+        return 0
+    regressions = compare_with_baseline(results, baseline["results"], args.tolerance, args.slack_ms)
+    for line in regressions:
+        print(f"退化: {line}")
+    print("与基线比较：" + ("存在退化" if regressions else f"未退化（容差 {args.tolerance:.0%}）"))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="cold 阶段的请求数（即每个并发级别使用的宝可梦数）")
+    parser.add_argument("--warm-rounds", type=int, default=5, help="warm 阶段重放问题的轮数")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="PokeAPI 桩的响应延迟")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="豆包桩的响应延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="延迟的均匀抖动范围（±）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="桩返回错误状态码的概率")
+    parser.add_argument("--evolution-every", type=int, default=4, help="每 N 个问题中有一个进化类问题（0 表示没有）")
+    parser.add_argument("--snapshot", action="store_true", help="以 PokeAPI 离线快照（仅快照模式）代替 PokeAPI 桩")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="允许的相对退化幅度")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="延迟比较的绝对余量（毫秒）")
+    sys.exit(asyncio.run(main(parser.parse_args())))
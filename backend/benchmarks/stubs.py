@@ -0,0 +1,243 @@
+"""进程内上游桩：模拟 PokeAPI 与豆包（Ark v3）的 ASGI 应用
+
+供压测与基准脚本使用，经 httpx.ASGITransport 注入共享客户端（见 install_stub_upstreams），
+请求不离开进程，结果可重复：
+- StubPokeAPI：pokemon/{name}、pokemon-species/{name}、evolution-chain/{id}
+- StubArk：chat/completions（意图解析返回 JSON 意图；回答生成返回固定文本，stream=true 时以 SSE 分段返回）
+
+数据为合成数据：宝可梦 monN（N ≥ 1）的 ID 为 N，每三只组成一条进化链（链 ID 为 (N + 2) // 3），
+中文名为"测试兽N"。问题中出现 monN 即可被识别。
+
+故障注入（FaultProfile）：每个请求先等待 latency_ms ± jitter_ms，再以 error_rate 的概率返回 error_status；
+随机数由 seed 固定，同样的请求序列得到同样的故障序列。
+"""
+import asyncio
+import json
+import random
+import re
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.clients.http_client import set_shared_client
+from app.core.config import settings
+from app.services.name_resolver_service import DETAIL_KEYWORDS, INTENT_KEYWORDS, PokemonNameResolver
+
+_POKEMON_PATH = re.compile(r"/pokemon/(?P<name>[^/]+)/?$")
+_SPECIES_PATH = re.compile(r"/pokemon-species/(?P<name>[^/]+)/?$")
+_CHAIN_PATH = re.compile(r"/evolution-chain/(?P<id>\d+)/?$")
+_CHAT_PATH = re.compile(r"/chat/completions/?$")
+_NAME = re.compile(r"^mon(?P<id>[1-9]\d*)$")
+_MENTION = re.compile(r"mon[1-9]\d*")
+
+_STAT_NAMES = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+_TYPE_NAMES = ("normal", "fire", "water", "grass", "electric", "ice", "fighting", "poison", "ground", "flying")
+
+# 回答生成的固定回复（流式时按此切分）
+STUB_ANSWER = "这是一只用于压测的宝可梦，属性与种族值见数据。"
+
+
+class FaultProfile:
+    """延迟与错误注入配置
+
+    capacity > 0 时模拟处理能力有限的上游：同时只处理 capacity 个请求，其余在桩内排队，
+    并发越高延迟越长（单个事件循环内使用）。
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0,
+        capacity: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.capacity = capacity
+        self._random = random.Random(seed)
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def apply(self) -> Optional[int]:
+        """等待注入的延迟（及排队）；需要注入错误时返回错误状态码"""
+        if self.capacity <= 0:
+            return await self._apply()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.capacity)
+        async with self._slots:
+            return await self._apply()
+
+    async def _apply(self) -> Optional[int]:
+        delay = self.latency_ms + (self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return self.error_status if fail else None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "error_status": self.error_status,
+            "capacity": self.capacity,
+        }
+
+
+class StubUpstream:
+    """ASGI 桩应用基类：按路径分发到 handle，统计各路径请求数"""
+
+    def __init__(self, faults: Optional[FaultProfile] = None):
+        self.faults = faults or FaultProfile()
+        self.calls: Dict[str, int] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        status = await self.faults.apply()
+        if status is not None:
+            payload, content_type = json.dumps({"error": "injected fault"}).encode(), b"application/json"
+        else:
+            status, payload, content_type = self.handle(scope["method"], scope["path"], body)
+        self.calls[scope["path"]] = self.calls.get(scope["path"], 0) + 1
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(payload)).encode())],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, bytes]:
+        raise NotImplementedError
+
+    @staticmethod
+    def json_response(data: Any, status: int = 200) -> Tuple[int, bytes, bytes]:
+        return status, json.dumps(data, ensure_ascii=False).encode("utf-8"), b"application/json"
+
+
+def stub_pokemon(pokemon_id: int) -> Dict[str, Any]:
+    name = f"mon{pokemon_id}"
+    return {
+        "id": pokemon_id,
+        "name": name,
+        "height": 3 + pokemon_id % 20,
+        "weight": 40 + pokemon_id * 7 % 900,
+        "base_experience": 60 + pokemon_id % 200,
+        "types": [
+            {"slot": 1, "type": {"name": _TYPE_NAMES[pokemon_id % len(_TYPE_NAMES)]}},
+            {"slot": 2, "type": {"name": _TYPE_NAMES[(pokemon_id * 3) % len(_TYPE_NAMES)]}},
+        ],
+        "stats": [{"base_stat": 40 + (pokemon_id * (i + 3)) % 90, "stat": {"name": stat}} for i, stat in enumerate(_STAT_NAMES)],
+        "abilities": [
+            {"ability": {"name": f"ability-{pokemon_id % 50}"}, "is_hidden": False, "slot": 1},
+            {"ability": {"name": f"ability-{pokemon_id % 37 + 50}"}, "is_hidden": True, "slot": 3},
+        ],
+        "moves": [{"move": {"name": f"move-{(pokemon_id + i) % 300}"}} for i in range(40)],
+        "sprites": {"front_default": f"https://example.invalid/sprites/{pokemon_id}.png"},
+    }
+
+
+def stub_species(pokemon_id: int) -> Dict[str, Any]:
+    name = f"mon{pokemon_id}"
+    chain_id = (pokemon_id + 2) // 3
+    return {
+        "id": pokemon_id,
+        "name": name,
+        "capture_rate": 45,
+        "base_happiness": 50,
+        "growth_rate": {"name": "medium-slow"},
+        "egg_groups": [{"name": "monster"}],
+        "color": {"name": "red"},
+        "names": [
+            {"name": f"测试兽{pokemon_id}", "language": {"name": "zh-Hans"}},
+            {"name": name.capitalize(), "language": {"name": "en"}},
+        ],
+        "genera": [{"genus": "压测宝可梦", "language": {"name": "zh-Hans"}}],
+        "flavor_text_entries": [{"flavor_text": f"编号 {pokemon_id} 的压测数据。", "language": {"name": "zh-Hans"}}],
+        "varieties": [{"is_default": True, "pokemon": {"name": name}}],
+        "evolves_from_species": {"name": f"mon{pokemon_id - 1}"} if (pokemon_id - 1) % 3 else None,
+        "evolution_chain": {"url": f"https://pokeapi.co/api/v2/evolution-chain/{chain_id}/"},
+    }
+
+
+def stub_evolution_chain(chain_id: int) -> Dict[str, Any]:
+    first = chain_id * 3 - 2
+
+    def link(pokemon_id: int, stage: int) -> Dict[str, Any]:
+        return {
+            "species": {"name": f"mon{pokemon_id}"},
+            "evolution_details": [{"trigger": {"name": "level-up"}, "min_level": 16 * stage}] if stage else [],
+            "evolves_to": [link(pokemon_id + 1, stage + 1)] if stage < 2 else [],
+        }
+
+    return {"id": chain_id, "chain": link(first, 0)}
+
+
+class StubPokeAPI(StubUpstream):
+    """PokeAPI 桩：monN 存在，其余名称返回 404"""
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, bytes]:
+        for pattern, build in ((_POKEMON_PATH, stub_pokemon), (_SPECIES_PATH, stub_species)):
+            match = pattern.search(path)
+            if match:
+                name = _NAME.match(match.group("name"))
+                if name is None:
+                    return self.json_response({"detail": "Not found."}, 404)
+                return self.json_response(build(int(name.group("id"))))
+        match = _CHAIN_PATH.search(path)
+        if match and int(match.group("id")) > 0:
+            return self.json_response(stub_evolution_chain(int(match.group("id"))))
+        return self.json_response({"detail": "Not found."}, 404)
+
+
+class StubArk(StubUpstream):
+    """豆包 Ark v3 chat/completions 桩"""
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, bytes]:
+        if not _CHAT_PATH.search(path):
+            return self.json_response({"error": "not found"}, 404)
+        request = json.loads(body)
+        system_prompt = request["messages"][0]["content"]
+        question = request["messages"][-1]["content"]
+        if "提取结构化意图" in system_prompt:
+            # 与本地名称解析器使用同一套关键词规则，两条路径得到的意图（及问答缓存键）一致
+            mention = _MENTION.search(question)
+            content = json.dumps({
+                "pokemon_name": mention.group(0) if mention else "",
+                "original_name": mention.group(0) if mention else "",
+                "intent_type": PokemonNameResolver._match_keywords(question.lower(), INTENT_KEYWORDS, "basic_info"),
+                "detail_level": PokemonNameResolver._match_keywords(question.lower(), DETAIL_KEYWORDS, "normal"),
+            }, ensure_ascii=False)
+        else:
+            content = STUB_ANSWER
+        # token 数以字符数近似
+        prompt_tokens = sum(len(message["content"]) for message in request["messages"])
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content), "total_tokens": prompt_tokens + len(content)}
+        if request.get("stream"):
+            chunks = [content[i:i + 8] for i in range(0, len(content), 8)]
+            events = [{"choices": [{"delta": {"content": chunk}}]} for chunk in chunks]
+            events.append({"choices": [{"delta": {}, "finish_reason": "stop"}]})
+            if (request.get("stream_options") or {}).get("include_usage"):
+                events.append({"choices": [], "usage": usage})
+            body = "".join("data: " + json.dumps(event, ensure_ascii=False) + "\n\n" for event in events) + "data: [DONE]\n\n"
+            return 200, body.encode("utf-8"), b"text/event-stream"
+        return self.json_response({
+            "choices": [{"message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+
+def install_stub_upstreams(pokeapi: StubPokeAPI, ark: StubArk) -> None:
+    """将 PokeAPI / 豆包的共享客户端替换为指向桩应用的客户端（需在应用启动前调用）"""
+    set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient(transport=httpx.ASGITransport(app=pokeapi)))
+    set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient(transport=httpx.ASGITransport(app=ark)))
@@ -0,0 +1,36 @@
+"""PokeAPI 离线快照构建命令
+
+将数据库缓存中的 pokemon / pokemon-species / evolution-chain 打包为单个带索引的快照文件，
+配置 POKEAPI_SNAPSHOT_PATH 后服务经 mmap 读取，不再请求 PokeAPI（格式见 app/clients/pokeapi_snapshot.py）。
+用法（在 backend 目录下执行）：
+
+    python preload.py                                   # 先将 PokeAPI 数据镜像到数据库缓存
+    python build_snapshot.py --output data/pokeapi.snapshot
+
+快照先写入临时文件再原子替换，可在服务运行期间重新构建；服务重启后读取新快照。
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from app.db.session import AsyncSessionLocal, engine
+from app.services.snapshot_service import export_snapshot
+
+
+async def main(args: argparse.Namespace) -> int:
+    directory = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(directory, exist_ok=True)
+    try:
+        async with AsyncSessionLocal() as db:
+            counts = await export_snapshot(db, args.output)
+    finally:
+        await engine.dispose()
+    print(json.dumps({"output": args.output, "size_bytes": os.path.getsize(args.output), **counts}, ensure_ascii=False, indent=2))
+    return 0 if all(counts.values()) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从数据库缓存构建 PokeAPI 离线快照")
+    parser.add_argument("--output", default="data/pokeapi.snapshot", help="快照文件路径")
+    sys.exit(asyncio.run(main(parser.parse_args())))
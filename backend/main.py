@@ -1,26 +1,40 @@
 """FastAPI 应用入口
 
 - 注册 API 路由与中间件
-- 提供健康检查与内部配置诊断接口
-- 启动事件中初始化数据库表
+- 提供健康检查、指标（/metrics）与内部配置诊断接口
+- 启动事件中初始化数据库表与共享 HTTP 连接池，关闭事件中释放连接
 
 本文件仅包含应用装配与通用端点，不包含业务逻辑。
 """
+import asyncio
 import uvicorn
 import sys
 import io
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
 from app.db.base import Base
-from app.db.session import engine
+from app.db.migrations import run_migrations
+from app.db.session import engine, AsyncSessionLocal
 from app.core.config import settings
 from app.core.exception_handler import register_exception_handlers
+from app.core.middleware import (
+    JSONCharsetMiddleware, ProfilingMiddleware, RequestIDMiddleware, ServerTimingMiddleware, TimingMiddleware
+)
+from app.clients.http_client import init_http_clients, close_http_clients
+from app.clients.pokeapi_snapshot import close_pokeapi_snapshot, load_pokeapi_snapshot
+from app.utils.fast_json import FastJSONResponse
+from app.utils.metrics import METRICS_CONTENT_TYPE, metrics_registry
+from app.services.evolution_graph_service import load_evolution_graph
+from app.services.name_resolver_service import load_name_resolver
+from app.services.preload_service import preload_in_background
 from datetime import datetime, timezone
 
 # 设置系统默认编码为 UTF-8（仅在直接运行时生效，避免影响测试捕获）
 
 # 创建 FastAPI 应用实例
+# 响应序列化：声明了 response_model 的接口由 Pydantic 直接输出 JSON 字节（最快路径，不指定 response_class）；
+# 其余返回 dict 的接口显式使用 FastJSONResponse（安装 orjson 时以 orjson 序列化）
 app = FastAPI(
     title="Pokédex AI 智能图鉴系统",
     description="基于自然语言的宝可梦智能图鉴 API，支持问答交互",
@@ -29,14 +43,22 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# 设置 API 响应编码：仅对以 /api/ 开头的接口设置 JSON UTF-8 头，避免影响 Swagger 静态资源
-@app.middleware("http")
-async def add_encoding_header(request, call_next):
-    response = await call_next(request)
-    # 只对API路由设置JSON编码头，避免干扰Swagger UI
-    if request.url.path.startswith("/api/"):
-        response.headers["Content-Type"] = "application/json; charset=utf-8"
-    return response
+# 纯 ASGI 中间件（后添加的位于外层）：只改写响应头，不为每个请求创建任务
+# - 仅对以 /api/ 开头的 JSON 接口设置 UTF-8 头，避免影响 Swagger 静态资源与 SSE / NDJSON 流
+app.add_middleware(JSONCharsetMiddleware, path_prefix="/api/")
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware, path_prefix="/api/v1/ask")
+app.add_middleware(TimingMiddleware)
+# 请求级采样分析：配置了管理员令牌或抽样比例时启用；位于 RequestIDMiddleware 内层以便用请求 ID 命名结果文件
+if settings.admin_token or settings.profile_sample_rate > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=settings.profile_dir,
+        admin_token=settings.admin_token,
+        sample_rate=settings.profile_sample_rate,
+        interval_ms=settings.profile_interval_ms,
+    )
+app.add_middleware(RequestIDMiddleware)
 
 # 配置 CORS：开发阶段允许所有来源；生产环境建议限定具体域名
 app.add_middleware(
@@ -45,6 +67,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Process-Time", "Server-Timing", "X-Profile-Id"],
 )
 
 # 注册 API 路由，所有业务接口统一挂载到 /api/v1 前缀下
@@ -58,15 +81,55 @@ register_exception_handlers(app)
 async def startup_event():
     """应用启动事件处理函数
 
-    - 创建/更新数据库表结构
-    - 可在此处添加连接池预热、缓存预加载等初始化逻辑
+    - 创建/更新数据库表结构（补齐新增列并回填精简投影）
+    - 从数据库加载本地宝可梦名称索引与进化关系图
+    - 配置了 POKEAPI_SNAPSHOT_PATH 时映射 PokeAPI 离线快照
+    - 为各上游（PokeAPI/豆包）创建共享的 HTTP 连接池
+    - PRELOAD_ON_STARTUP 开启时在后台预加载 PokeAPI 数据（不阻塞启动）
     """
-    # 创建数据库表
-    Base.metadata.create_all(bind=engine)
+    # 创建数据库表（异步引擎上以 run_sync 执行 DDL）
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
     print("数据库表已创建")
-
-
-@app.get("/", tags=["健康检查"])
+    # 从已缓存的物种数据构建本地名称索引（本地意图解析）
+    # 并从已缓存的进化链构建进化关系图（进化类问题免网络访问）
+    async with AsyncSessionLocal() as db:
+        name_count = await load_name_resolver(db)
+        chain_count = await load_evolution_graph(db)
+    print(f"本地名称索引已加载: {name_count} 个名称，进化关系图已加载: {chain_count} 条进化链")
+    # PokeAPI 离线快照：只读映射，多个工作进程共享页缓存
+    if settings.pokeapi_snapshot_path:
+        snapshot_count = load_pokeapi_snapshot(settings.pokeapi_snapshot_path)
+        print(f"PokeAPI 快照已加载: {snapshot_count} 个条目（{'仅快照' if settings.pokeapi_snapshot_only else '未收录时访问网络'}）")
+    # 创建共享 HTTP 客户端（keep-alive 连接在请求间复用）
+    await init_http_clients()
+    # 后台预加载：只获取尚未缓存的数据，服务在此期间照常按需加载
+    app.state.preload_task = asyncio.create_task(preload_in_background()) if settings.preload_on_startup else None
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭事件处理函数
+
+    - 取消尚未完成的后台预加载（已提交的批次保留，下次启动继续）
+    - 关闭共享 HTTP 客户端，释放上游连接
+    - 解除 PokeAPI 快照映射
+    - 释放数据库连接池
+    """
+    preload_task = getattr(app.state, "preload_task", None)
+    if preload_task is not None and not preload_task.done():
+        preload_task.cancel()
+        try:
+            await preload_task
+        except asyncio.CancelledError:
+            pass
+    await close_http_clients()
+    close_pokeapi_snapshot()
+    await engine.dispose()
+
+
+@app.get("/", tags=["健康检查"], response_class=FastJSONResponse)
 async def root():
     """健康检查接口
 
@@ -78,7 +141,7 @@ async def root():
         "docs": "/docs"
     }
 
-@app.get("/health", tags=["健康检查"])
+@app.get("/health", tags=["健康检查"], response_class=FastJSONResponse)
 async def health():
     """简化健康检查
 
@@ -89,7 +152,17 @@ async def health():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
-@app.get("/internal/config/doubao")
+if settings.metrics_enabled:
+    @app.get("/metrics", tags=["健康检查"], include_in_schema=False)
+    async def metrics():
+        """Prometheus 指标接口
+
+        输出问答各阶段耗时直方图、各级缓存命中、上游请求状态码、兜底回答次数与数据库连接池状态。
+        """
+        return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/internal/config/doubao", response_class=FastJSONResponse)
 async def internal_doubao_config():
     """内部诊断端点：检查豆包密钥加载状态
 
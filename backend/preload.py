@@ -0,0 +1,62 @@
+"""PokeAPI 预加载命令
+
+将 PokeAPI 的 pokemon / pokemon-species / evolution-chain 批量镜像到数据库缓存。
+用法（在 backend 目录下执行）：
+
+    python preload.py                                   # 预加载全部资源，只获取尚未缓存的 ID
+    python preload.py --resources pokemon-species       # 只预加载物种
+    python preload.py --limit 151                       # 每种资源只处理前 151 个 ID
+    python preload.py --refresh-days 30                 # 同时刷新 30 天前缓存的记录
+
+每批获取完成即提交，中断后重新执行会从未入库的 ID 继续。
+"""
+import argparse
+import asyncio
+import json
+import sys
+from app.clients.http_client import close_http_clients
+from app.db.base import Base
+from app.db.migrations import run_migrations
+from app.db.session import engine
+from app.services.preload_service import PRELOAD_RESOURCES, PreloadProgress, run_preload
+
+
+def print_progress(progress: PreloadProgress) -> None:
+    """单行刷新打印进度"""
+    print(
+        f"\r[{progress.resource}] {progress.processed}/{progress.pending} "
+        f"已保存 {progress.saved} 跳过 {progress.skipped} 缺失 {progress.missing} 失败 {len(progress.failed_ids)}",
+        end="" if progress.processed < progress.pending else "\n",
+        flush=True
+    )
+
+
+async def main(args: argparse.Namespace) -> int:
+    # 新库上直接运行时先建表（已有库补齐新增列）
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
+    try:
+        summary = await run_preload(
+            resources=args.resources,
+            limit=args.limit,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            refresh_days=args.refresh_days,
+            on_progress=print_progress
+        )
+    finally:
+        await close_http_clients()
+        await engine.dispose()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 1 if any(item["failed"] for item in summary) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="将 PokeAPI 数据预加载到数据库缓存")
+    parser.add_argument("--resources", nargs="+", choices=PRELOAD_RESOURCES, default=list(PRELOAD_RESOURCES), help="要预加载的资源")
+    parser.add_argument("--limit", type=int, default=None, help="每种资源最多处理的 ID 数")
+    parser.add_argument("--concurrency", type=int, default=None, help="并发请求数（默认 PRELOAD_CONCURRENCY）")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批提交的记录数（默认 PRELOAD_BATCH_SIZE）")
+    parser.add_argument("--refresh-days", type=int, default=None, help="刷新早于该天数的已缓存记录（默认 PRELOAD_REFRESH_DAYS）")
+    sys.exit(asyncio.run(main(parser.parse_args())))
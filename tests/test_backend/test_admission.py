@@ -0,0 +1,167 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+import pytest
+
+from app.api import ask_api
+from app.core import admission
+from app.core.admission import AdmissionController, TokenBucket
+from app.core.exceptions import ServiceOverloadedError
+from main import app
+
+
+def test_slots_are_handed_to_queued_requests_in_order():
+    order = []
+
+    async def request(controller, name):
+        async with controller.admit():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, max_queue=10, queue_timeout=5)
+        await asyncio.gather(*(request(controller, name) for name in "abcdef"))
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert order == list("abcdef")
+    assert controller.in_flight == 0 and controller.queued == 0
+    assert controller.service_time is not None
+
+
+def test_overload_is_rejected_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        assert await controller.acquire()
+        # 无空闲名额时，缓存命中的请求不占名额直接放行
+        assert await controller.acquire(cache_hit=lambda: True) is False
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceOverloadedError) as full:
+            await controller.acquire()
+        with pytest.raises(ServiceOverloadedError) as timed_out:
+            await queued
+        # 估计等待（排队位置 / 并发数 × 平均处理耗时）超过期限时不排队，立即拒绝
+        controller.service_time = 0.2
+        with pytest.raises(ServiceOverloadedError) as deadline:
+            await controller.acquire()
+        controller.release()
+        return controller, full.value, timed_out.value, deadline.value
+
+    controller, full, timed_out, deadline = asyncio.run(scenario())
+    assert (full.reason, full.status_code, full.headers) == ("queue_full", 503, {"Retry-After": "1"})
+    assert timed_out.reason == "timeout" and deadline.reason == "deadline"
+    assert controller.in_flight == 0 and controller.queued == 0
+
+
+def test_token_bucket_limits_each_client():
+    bucket = TokenBucket(rate=2, burst=2, now=0.0)
+    assert [bucket.take(0.0), bucket.take(0.0)] == [0.0, 0.0]
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0.0
+
+    async def scenario():
+        controller = AdmissionController(max_concurrency=10, max_queue=0, queue_timeout=1, client_rate=1, client_burst=1)
+        assert await controller.acquire("10.0.0.1")
+        assert await controller.acquire("10.0.0.2")
+        with pytest.raises(ServiceOverloadedError) as limited:
+            await controller.acquire("10.0.0.1")
+        return limited.value
+
+    limited = asyncio.run(scenario())
+    assert limited.status_code == 429 and limited.headers == {"Retry-After": "1"}
+
+
+def test_ask_endpoint_sheds_load_with_503(monkeypatch):
+    async def slow_answer(db, question):
+        await asyncio.sleep(0.1)
+        return {"answer": "ok", "pokemon_name": "pikachu", "pokemon_id": 25, "intent": None}
+
+    monkeypatch.setattr(admission, "ask_admission", AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1))
+    monkeypatch.setattr(ask_api.dex_qa_service, "answer_question", slow_answer)
+    monkeypatch.setattr(ask_api.dex_qa_service, "can_answer_from_cache", lambda question: False)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/api/v1/ask", json={"question": f"皮卡丘{i}"}) for i in range(2)))
+
+    responses = asyncio.run(scenario())
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 503]
+    rejected = next(response for response in responses if response.status_code == 503)
+    assert rejected.headers["retry-after"] == "1"
+    assert rejected.json()["error"]["type"] == "ServiceOverloadedError"
+
+
+def test_batch_questions_each_pass_admission(monkeypatch):
+    async def slow_answer(db, question):
+        await asyncio.sleep(0.1)
+        return {"answer": "ok", "pokemon_name": "pikachu", "pokemon_id": 25, "intent": None}
+
+    monkeypatch.setattr(admission, "ask_admission", AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1))
+    monkeypatch.setattr(ask_api.dex_qa_service, "answer_question", slow_answer)
+    monkeypatch.setattr(ask_api.dex_qa_service, "can_answer_from_cache", lambda question: False)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/api/v1/ask/batch", json={"questions": ["皮卡丘", "妙蛙种子"]})
+
+    body = asyncio.run(scenario()).json()
+    assert (body["succeeded"], body["failed"]) == (1, 1)
+    rejected = next(item for item in body["results"] if not item["success"])
+    assert rejected["error"]["type"] == "ServiceOverloadedError"
+    assert admission.ask_admission.in_flight == 0
+
+
+def test_stream_holds_slot_until_answer_stream_ends(monkeypatch):
+    controller = AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1)
+    in_flight_while_streaming = []
+
+    async def prepare(db, question):
+        return {"answer": None}
+
+    async def stream_answer(db, question, prepared):
+        yield {"event": "answer", "data": {"delta": "皮卡"}}
+        await asyncio.sleep(0.1)
+        in_flight_while_streaming.append(controller.in_flight)
+        yield {"event": "done", "data": {}}
+
+    monkeypatch.setattr(admission, "ask_admission", controller)
+    monkeypatch.setattr(ask_api.dex_qa_service, "prepare_answer", prepare)
+    monkeypatch.setattr(ask_api.dex_qa_service, "stream_answer", stream_answer)
+    monkeypatch.setattr(ask_api.dex_qa_service, "can_answer_from_cache", lambda question: False)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            async def second():
+                # 第一个请求已进入回答流（已让出事件循环）后再发起
+                await asyncio.sleep(0.05)
+                return await client.post("/api/v1/ask/stream", json={"question": "妙蛙种子"})
+            return await asyncio.gather(client.post("/api/v1/ask/stream", json={"question": "皮卡丘"}), second())
+
+    streamed, rejected = asyncio.run(scenario())
+    assert streamed.status_code == 200 and "event: done" in streamed.text
+    assert rejected.status_code == 503
+    assert in_flight_while_streaming == [1]
+    assert controller.in_flight == 0
+
+
+def test_cache_check_for_admission_does_not_count_intent_cache_lookups(monkeypatch):
+    from app.core.config import settings
+    from app.services.intent_parser_service import intent_memory_cache
+
+    monkeypatch.setattr(settings, "local_intent_resolver_enabled", False)
+    intent_memory_cache.clear()
+    intent_memory_cache.set("喷火龙的属性", {"pokemon_name": "charizard", "intent_type": "basic_info", "detail_level": "normal"})
+    before = intent_memory_cache.stats()
+    try:
+        assert ask_api.dex_qa_service.can_answer_from_cache("喷火龙的属性？") is False
+        assert ask_api.dex_qa_service.can_answer_from_cache("没见过的问题") is False
+        after = intent_memory_cache.stats()
+    finally:
+        intent_memory_cache.clear()
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.db.base import Base
+from app.repositories.pokemon_repository import PokemonRepository
+from app.services.answer_cache_service import AnswerCacheService
+
+INTENT = {"pokemon_name": "charizard", "original_name": "喷火龙", "intent_type": "basic_info", "detail_level": "normal"}
+
+
+async def with_session(scenario):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            return await scenario(db)
+    finally:
+        await engine.dispose()
+
+
+def test_key_normalizes_question_and_tracks_model(monkeypatch):
+    key = AnswerCacheService.build_cache_key("喷火龙的属性是什么？", INTENT)
+    assert key == AnswerCacheService.build_cache_key(" 喷火龙的属性是什么? ", INTENT)
+    assert key != AnswerCacheService.build_cache_key("喷火龙的属性是什么？", {**INTENT, "intent_type": "stats"})
+    monkeypatch.setattr(settings, "doubao_model", "another-model")
+    assert key != AnswerCacheService.build_cache_key("喷火龙的属性是什么？", INTENT)
+
+
+def test_database_tier_survives_memory_flush_and_is_invalidated_by_data_updates():
+    async def scenario(db):
+        service = AnswerCacheService()
+        service.memory_cache.clear()
+        await service.save_answer(db, "喷火龙的属性是什么？", INTENT, "火/飞行", 6)
+        service.memory_cache.clear()
+        from_db = await service.get_answer(db, "喷火龙的属性是什么", INTENT)
+
+        await PokemonRepository.save_pokemon(db, {"id": 6, "name": "charizard"})
+        service.memory_cache.clear()
+        after_update = await service.get_answer(db, "喷火龙的属性是什么", INTENT)
+        return from_db, after_update
+
+    from_db, after_update = asyncio.run(with_session(scenario))
+    assert from_db == {"answer": "火/飞行", "pokemon_name": "charizard", "pokemon_id": 6}
+    assert after_update is None
+
+
+def test_forget_pokemon_clears_memory_tier():
+    service = AnswerCacheService()
+    service.memory_cache.clear()
+    service.memory_cache.set("k1", {"answer": "a", "pokemon_name": "charizard", "pokemon_id": 6})
+    service.memory_cache.set("k2", {"answer": "b", "pokemon_name": "mewtwo", "pokemon_id": 150})
+    assert service.forget_pokemon("Charizard") == 1
+    assert len(service.memory_cache) == 1
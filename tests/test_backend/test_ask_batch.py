@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.exceptions import PokemonNotFoundError
+from app.services.dex_qa_service import DexQAService
+
+
+def run_batch(questions, answer_question, concurrency):
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        service = DexQAService()
+        service.answer_question = answer_question
+        try:
+            async with AsyncSession(engine) as db:
+                return [item async for item in service.answer_batch(db, questions, concurrency=concurrency)]
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def test_batch_dedupes_bounds_concurrency_and_reports_errors_per_item():
+    calls = []
+    running = {"now": 0, "peak": 0}
+
+    async def answer_question(db, question):
+        calls.append(question)
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        if "missingno" in question:
+            raise PokemonNotFoundError(pokemon_name="missingno")
+        return {"answer": question, "pokemon_name": None, "pokemon_id": None, "intent": None}
+
+    questions = ["皮卡丘是什么属性？", "皮卡丘是什么属性?", "missingno 是什么", "超梦的特性", "喷火龙的种族值"]
+    items = run_batch(questions, answer_question, concurrency=2)
+
+    assert len(calls) == 4
+    assert running["peak"] == 2
+    by_index = {item["index"]: item for item in items}
+    assert sorted(by_index) == [0, 1, 2, 3, 4]
+    assert by_index[0]["result"] is by_index[1]["result"]
+    assert by_index[1]["question"] == "皮卡丘是什么属性?"
+    assert not by_index[2]["success"]
+    assert by_index[2]["error"] == {"type": "PokemonNotFoundError", "message": "未找到宝可梦: missingno", "status_code": 404}
+    assert by_index[3]["success"] and by_index[3]["error"] is None
+
+
+def test_batch_leaves_session_isolation_to_answer_question():
+    # answer_question 自行在独立会话中执行，批量问答不再为每个问题额外打开一个会话
+    sessions = []
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        service = DexQAService()
+
+        async def answer_question(db, question):
+            sessions.append(db)
+            return {"answer": question, "pokemon_name": None, "pokemon_id": None, "intent": None}
+
+        service.answer_question = answer_question
+        try:
+            async with AsyncSession(engine) as db:
+                items = [item async for item in service.answer_batch(db, ["皮卡丘", "超梦"], concurrency=2)]
+                return db, items
+        finally:
+            await engine.dispose()
+
+    db, items = asyncio.run(scenario())
+    assert len(items) == 2 and all(item["success"] for item in items)
+    assert sessions == [db, db]
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.ask_api import format_sse_event
+from app.clients.http_client import set_shared_client
+from app.core.config import settings
+from app.db.base import Base
+from app.services.dex_qa_service import DexQAService
+
+PREPARED = {
+    "intent": {"pokemon_name": "pikachu", "original_name": "皮卡丘", "intent_type": "basic_info", "detail_level": "normal"},
+    "pokemon_name": "pikachu",
+    "pokemon_id": 25,
+    "answer": None,
+    "data": {
+        "pokemon_data": {"id": 25, "name": "pikachu", "types": ["electric"], "stats": {"speed": 90}},
+        "species_data": {"id": 25, "name": "pikachu", "flavor_text": {"zh-Hans": "电气老鼠"}},
+        "evolution_data": None,
+    },
+}
+
+
+def sse_body(*deltas, done=True):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': d}}]})}\n\n" for d in deltas]
+    if done:
+        lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+async def collect(handler):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    try:
+        service = DexQAService()
+        service.doubao_client.api_key = "test"
+        service.answer_cache_service.memory_cache.clear()
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            prepared = {**PREPARED, "answer": None}
+            events = [item async for item in service.stream_answer(db, "皮卡丘是什么属性", prepared)]
+            cached = await service.answer_cache_service.get_answer(db, "皮卡丘是什么属性", PREPARED["intent"])
+        return events, cached
+    finally:
+        set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient())
+        await engine.dispose()
+
+
+def test_stream_emits_intent_deltas_and_done_and_caches_answer():
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=sse_body("皮卡丘", "是电属性。"))
+
+    events, cached = asyncio.run(collect(handler))
+    assert [e["event"] for e in events] == ["intent", "answer", "answer", "done"]
+    assert events[0]["data"]["pokemon_id"] == 25
+    assert events[-1]["data"]["answer"] == "皮卡丘是电属性。"
+    assert cached["answer"] == "皮卡丘是电属性。"
+
+
+def test_stream_failure_falls_back_without_caching():
+    events, cached = asyncio.run(collect(lambda request: httpx.Response(500)))
+    assert [e["event"] for e in events] == ["intent", "fallback", "done"]
+    assert "pikachu" in events[-1]["data"]["answer"]
+    assert cached is None
+
+
+def test_format_sse_event():
+    assert format_sse_event("answer", {"delta": "电"}) == 'event: answer\ndata: {"delta": "电"}\n\n'
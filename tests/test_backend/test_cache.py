@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from app.utils.cache import LRUTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = LRUTTLCache("t", max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LRUTTLCache("t", max_entries=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=50)
+    clock.now = 6
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_invalidate_and_clear():
+    cache = LRUTTLCache("t", max_entries=10, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.invalidate("a") is True
+    assert cache.invalidate("a") is False
+    assert cache.clear() == 1
+    assert len(cache) == 0
+
+
+def test_peek_does_not_touch_stats_or_lru_order():
+    clock = FakeClock()
+    cache = LRUTTLCache("t", max_entries=2, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1 and cache.peek("missing", 0) == 0
+    cache.set("c", 3)
+    assert "a" not in cache
+    clock.now = 6
+    assert cache.peek("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 0 and stats["misses"] == 0 and stats["expirations"] == 0
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.clients.http_client import set_shared_client
+from app.core.config import settings
+from app.db.base import Base
+from app.repositories.evolution_chain_repository import EvolutionChainRepository
+from app.services.evolution_graph_service import EvolutionGraph
+from app.services.pokemon_service import PokemonService
+
+
+def node(name, children=(), trigger="level-up", **details):
+    return {"species": {"name": name}, "evolution_details": [{"trigger": {"name": trigger}, **details}], "evolves_to": list(children)}
+
+
+CHARMANDER = {"id": 2, "chain": node("charmander", [node("charmeleon", [node("charizard", min_level=36)], min_level=16)])}
+EEVEE = {"id": 67, "chain": node("eevee", [
+    node("vaporeon", trigger="use-item", item={"name": "water-stone"}),
+    node("jolteon", trigger="use-item", item={"name": "thunder-stone"}),
+])}
+
+
+def test_graph_links_species_to_chain_neighbours_and_triggers():
+    graph = EvolutionGraph()
+    graph.add_many([CHARMANDER, EEVEE])
+
+    assert graph.get_chain(2)["steps"] == [
+        {"from": "charmander", "to": "charmeleon", "trigger": "level-up", "min_level": 16},
+        {"from": "charmeleon", "to": "charizard", "trigger": "level-up", "min_level": 36},
+    ]
+    assert graph.chain_for_species("Charizard")["species"] == ["charmander", "charmeleon", "charizard"]
+    assert graph.predecessors("charizard") == ["charmander", "charmeleon"]
+    assert graph.successors("eevee") == ["vaporeon", "jolteon"]
+    assert graph.get_species("jolteon")["trigger"] == {"trigger": "use-item", "item": "thunder-stone"}
+    assert graph.get_species("charmander")["predecessor"] is None
+
+
+def test_evolution_chain_is_cached_in_db_and_graph():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json=CHARMANDER)
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            service = PokemonService()
+            service.evolution_graph = EvolutionGraph()
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                first = await service.get_species_evolution_chain(db, {"evolution_chain_id": 2})
+                second = await service.get_evolution_chain(db, 2)
+                # 图被清空后从数据库缓存恢复，仍不访问网络
+                service.evolution_graph.clear()
+                third = await service.get_evolution_chain(db, 2)
+                stored = await EvolutionChainRepository.get_evolution_chain(db, 2)
+            return first, second, third, stored
+        finally:
+            set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient())
+            await engine.dispose()
+
+    first, second, third, stored = asyncio.run(scenario())
+    assert calls == ["/api/v2/evolution-chain/2"]
+    assert first is second
+    assert third["steps"] == first["steps"]
+    assert stored["id"] == 2
@@ -0,0 +1,47 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+import pytest
+from starlette.responses import JSONResponse
+
+from app.clients.http_client import HTTPClient, set_shared_client
+from app.utils.fast_json import FastJSONResponse, dumps, loads
+
+PAYLOAD = {"name": "喷火龙", "types": ["fire", "flying"], "stats": {"hp": 78}, "hidden_ability": None}
+
+
+def test_fast_json_matches_stdlib_output():
+    assert FastJSONResponse(PAYLOAD).body == JSONResponse(PAYLOAD).body
+    assert loads(dumps(PAYLOAD)) == PAYLOAD
+    assert loads(dumps(PAYLOAD).encode("utf-8")) == PAYLOAD
+    with pytest.raises(json.JSONDecodeError):
+        loads(b"{broken")
+
+
+def test_http_client_decodes_upstream_json():
+    base_url = "https://fast-json.test"
+
+    def handler(request):
+        if request.url.path == "/broken":
+            return httpx.Response(200, content=b"<html>")
+        return httpx.Response(200, content=json.dumps(PAYLOAD).encode("utf-8"))
+
+    async def scenario():
+        set_shared_client(base_url, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        client = HTTPClient(base_url)
+        try:
+            ok = await client.get("pokemon")
+            with pytest.raises(Exception) as error:
+                await client.get("broken")
+            return ok, error.value
+        finally:
+            set_shared_client(base_url, httpx.AsyncClient())
+
+    ok, error = asyncio.run(scenario())
+    assert ok == PAYLOAD
+    assert error.status_code == 500 and "JSON 解析失败" in error.detail
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from app.core.exceptions import PokeApiError, PokemonNotFoundError
+from app.services.fetch_pipeline import FetchPipeline
+
+
+async def sleep_and_return(value, delay=0.05):
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_independent_stages_run_concurrently():
+    pipeline = FetchPipeline()
+    pipeline.add_stage("pokemon", lambda _: sleep_and_return("p", 0.1))
+    pipeline.add_stage("species", lambda _: sleep_and_return("s", 0.1))
+    pipeline.add_stage("evolution", lambda deps: sleep_and_return(deps["species"] + "-chain", 0.01), depends_on=("species",))
+
+    start = time.perf_counter()
+    result = asyncio.run(pipeline.run())
+    elapsed = time.perf_counter() - start
+
+    assert result == {"pokemon": "p", "species": "s", "evolution": "s-chain"}
+    assert elapsed < 0.18
+
+
+def test_stage_timeout_maps_to_poke_api_error():
+    pipeline = FetchPipeline()
+    pipeline.add_stage("pokemon", lambda _: sleep_and_return("p", 1), timeout=0.01)
+    with pytest.raises(PokeApiError):
+        asyncio.run(pipeline.run())
+
+
+def test_required_failure_propagates_and_cancels_siblings():
+    cancelled = []
+
+    async def slow(_):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def missing(_):
+        raise PokemonNotFoundError(pokemon_name="missingno")
+
+    pipeline = FetchPipeline()
+    pipeline.add_stage("species", slow)
+    pipeline.add_stage("pokemon", missing)
+    with pytest.raises(PokemonNotFoundError):
+        asyncio.run(pipeline.run())
+    assert cancelled == [True]
+
+
+def test_optional_failure_yields_none():
+    async def broken(_):
+        raise PokeApiError(message="boom")
+
+    pipeline = FetchPipeline()
+    pipeline.add_stage("species", lambda _: sleep_and_return("s"))
+    pipeline.add_stage("evolution", broken, depends_on=("species",), required=False)
+    assert asyncio.run(pipeline.run()) == {"species": "s", "evolution": None}
+
+
+def test_unknown_dependency_rejected():
+    with pytest.raises(ValueError):
+        FetchPipeline().add_stage("evolution", lambda _: sleep_and_return(None), depends_on=("species",))
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from benchmarks.load_test import compare_with_baseline, percentile, run_load
+from benchmarks.stubs import FaultProfile, StubArk, StubPokeAPI
+
+
+def test_stub_upstreams_serve_synthetic_data_and_inject_faults():
+    async def scenario():
+        pokeapi = httpx.AsyncClient(transport=httpx.ASGITransport(app=StubPokeAPI()), base_url="https://pokeapi.test/api/v2")
+        faulty = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=StubPokeAPI(FaultProfile(latency_ms=1, error_rate=0.5, seed=7))),
+            base_url="https://pokeapi.test/api/v2",
+        )
+        ark = httpx.AsyncClient(transport=httpx.ASGITransport(app=StubArk()), base_url="https://ark.test/api/v3")
+        intent_request = {"messages": [{"role": "system", "content": "请提取结构化意图"}, {"role": "user", "content": "mon5怎么进化？"}]}
+        async with pokeapi, faulty, ark:
+            return (
+                (await pokeapi.get("/pokemon/mon5")).json(),
+                (await pokeapi.get("/pokemon-species/mon5")).json(),
+                (await pokeapi.get("/evolution-chain/2/")).json(),
+                (await pokeapi.get("/pokemon/missingno")).status_code,
+                [(await faulty.get("/pokemon/mon1")).status_code for _ in range(20)],
+                (await ark.post("/chat/completions", json=intent_request)).json(),
+            )
+
+    pokemon, species, chain, missing, statuses, completion = asyncio.run(scenario())
+
+    assert pokemon["id"] == 5 and pokemon["name"] == "mon5" and len(pokemon["stats"]) == 6
+    assert species["evolution_chain"]["url"].endswith("/evolution-chain/2/")
+    assert chain["chain"]["species"]["name"] == "mon4"
+    assert chain["chain"]["evolves_to"][0]["evolves_to"][0]["species"]["name"] == "mon6"
+    assert missing == 404
+    assert set(statuses) == {200, 503}
+    intent = json.loads(completion["choices"][0]["message"]["content"])
+    assert intent["pokemon_name"] == "mon5" and intent["intent_type"] == "evolution"
+
+
+def test_run_load_reports_percentiles_and_baseline_regressions():
+    app = FastAPI()
+
+    @app.post("/ask")
+    async def ask(body: dict):
+        if body["fail"]:
+            raise HTTPException(status_code=503)
+        await asyncio.sleep(0.001)
+        return {"ok": True}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await run_load(client, "/ask", [{"fail": i % 10 == 0} for i in range(40)], concurrency=4)
+
+    result = asyncio.run(scenario())
+    assert result["requests"] == 40 and result["errors"] == 4
+    assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+    assert percentile([1, 2, 3, 4], 0.5) == 2 and percentile([1, 2, 3, 4], 0.99) == 4
+    baseline = {"cold/c8": {"rps": 100.0, "p50_ms": 50.0, "errors": 0}, "warm/c8": {"rps": 900.0, "p50_ms": 2.0, "errors": 0}}
+    within = {"cold/c8": {"rps": 90.0, "p50_ms": 55.0, "errors": 0}, "warm/c8": {"rps": 850.0, "p50_ms": 4.0, "errors": 0}}
+    assert compare_with_baseline(within, baseline, 0.25, slack_ms=5) == []
+    regressed = {"cold/c8": {"rps": 70.0, "p50_ms": 70.0, "errors": 1}}
+    assert len(compare_with_baseline(regressed, baseline, 0.25, slack_ms=5)) == 3
+    assert compare_with_baseline({"warm/c1": {"rps": 1.0, "p50_ms": 1e6, "errors": 9}}, baseline, 0.25) == []
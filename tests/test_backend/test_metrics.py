@@ -0,0 +1,60 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+import pytest
+
+from app.clients.http_client import HTTPClient, set_shared_client
+from app.core.observability import UPSTREAM_REQUESTS
+from app.services.fetch_pipeline import FetchPipeline
+from app.utils.metrics import Counter, Histogram, MetricsRegistry
+
+
+def test_registry_renders_prometheus_text_with_bounded_series():
+    registry = MetricsRegistry()
+    requests = registry.register(Counter("demo_requests_total", "Demo requests", ("status",), max_series=2))
+    latency = registry.register(Histogram("demo_seconds", "Demo latency", ("stage",), buckets=(0.1, 1.0)))
+
+    requests.labels(200).inc()
+    requests.labels('5"00').inc(2)
+    requests.labels(404).inc()  # 超出 max_series，记入 other
+    for value in (0.05, 0.5, 5.0):
+        latency.labels("intent").observe(value)
+
+    text = registry.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{status="200"} 1.0' in text
+    assert 'demo_requests_total{status="5\\"00"} 2.0' in text
+    assert 'demo_requests_total{status="other"} 1.0' in text
+    assert 'demo_seconds_bucket{stage="intent",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="intent",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="intent",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="intent"} 3' in text
+    with pytest.raises(ValueError):
+        latency.labels("intent", "extra")
+
+
+def test_pipeline_stage_durations_and_upstream_status_are_recorded():
+    observed = []
+    base_url = "https://metrics.test"
+
+    async def scenario():
+        pipeline = FetchPipeline(on_stage_done=lambda stage, seconds: observed.append(stage))
+        pipeline.add_stage("pokemon", lambda _: asyncio.sleep(0, result=1))
+        pipeline.add_stage("evolution", lambda deps: asyncio.sleep(0, result=None), depends_on=("pokemon",), required=False)
+        await pipeline.run()
+
+        set_shared_client(base_url, httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404))))
+        try:
+            with pytest.raises(Exception):
+                await HTTPClient(base_url, upstream="metrics-test").get("pokemon/missingno")
+        finally:
+            set_shared_client(base_url, httpx.AsyncClient())
+
+    before = UPSTREAM_REQUESTS.labels("metrics-test", "404").value
+    asyncio.run(scenario())
+    assert sorted(observed) == ["evolution", "pokemon"]
+    assert UPSTREAM_REQUESTS.labels("metrics-test", "404").value == before + 1
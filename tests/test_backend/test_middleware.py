@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.middleware import JSONCharsetMiddleware, RequestIDMiddleware, TimingMiddleware, request_id_var
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/api/item")
+    async def item(request: Request):
+        return {"request_id": request.state.request_id, "context": request_id_var.get()}
+
+    @app.get("/api/stream")
+    async def stream():
+        return StreamingResponse(iter(['{"index": 0}\n']), media_type="application/x-ndjson")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(JSONCharsetMiddleware, path_prefix="/api/")
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(RequestIDMiddleware)
+    return app
+
+
+def test_middlewares_rewrite_headers_without_touching_streams():
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://test") as client:
+            return (
+                await client.get("/api/item"),
+                await client.get("/api/item", headers={"X-Request-ID": "trace-123"}),
+                await client.get("/api/item", headers={"X-Request-ID": "bad id\n"}),
+                await client.get("/api/stream"),
+                await client.get("/health"),
+            )
+
+    generated, forwarded, rejected, stream, health = asyncio.run(scenario())
+
+    assert generated.headers["content-type"] == "application/json; charset=utf-8"
+    assert generated.json()["request_id"] == generated.json()["context"] == generated.headers["x-request-id"]
+    assert len(generated.headers["x-request-id"]) == 32
+    assert float(generated.headers["x-process-time"]) >= 0
+
+    assert forwarded.headers["x-request-id"] == "trace-123" and forwarded.json()["request_id"] == "trace-123"
+    assert rejected.headers["x-request-id"] != "bad id\n"
+
+    assert stream.headers["content-type"] == "application/x-ndjson"
+    assert stream.text == '{"index": 0}\n'
+    assert health.headers["content-type"] == "application/json"
+    assert "x-request-id" in health.headers
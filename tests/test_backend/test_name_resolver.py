@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from app.services.name_resolver_service import PokemonNameResolver
+from app.utils.pokemon_projection import project_species
+
+
+def species(name, names, default=None):
+    return project_species({
+        "name": name,
+        "names": [{"name": value, "language": {"name": lang}} for lang, value in names.items()],
+        "varieties": [{"is_default": True, "pokemon": {"name": default or name}}],
+    })
+
+
+def build_resolver():
+    resolver = PokemonNameResolver()
+    resolver.add_many([
+        species("charizard", {"zh-Hans": "喷火龙", "zh-Hant": "噴火龍", "ja": "リザードン", "en": "Charizard"}),
+        species("mew", {"zh-Hans": "梦幻", "en": "Mew"}),
+        species("mewtwo", {"zh-Hans": "超梦", "en": "Mewtwo"}),
+        species("deoxys", {"zh-Hans": "代欧奇希斯", "en": "Deoxys"}, default="deoxys-normal"),
+    ])
+    return resolver
+
+
+def test_resolves_chinese_name_and_intent():
+    intent = build_resolver().resolve("喷火龙的种族值是多少？")
+    assert intent == {
+        "pokemon_name": "charizard",
+        "original_name": "喷火龙",
+        "intent_type": "stats",
+        "detail_level": "normal",
+    }
+
+
+def test_resolves_other_languages_and_default_form():
+    resolver = build_resolver()
+    assert resolver.resolve("噴火龍怎麼進化")["intent_type"] == "evolution"
+    assert resolver.resolve("リザードンの特性")["pokemon_name"] == "charizard"
+    assert resolver.resolve("Tell me about Deoxys in detail")["pokemon_name"] == "deoxys-normal"
+    assert resolver.resolve("Tell me about Deoxys in detail")["detail_level"] == "high"
+
+
+def test_longest_match_and_word_boundaries():
+    resolver = build_resolver()
+    assert resolver.find_mentions("超梦的属性") == [("超梦", "mewtwo")]
+    assert resolver.resolve("What type is Mewtwo?")["pokemon_name"] == "mewtwo"
+    assert resolver.resolve("how do you spell mewing") is None
+
+
+def test_ambiguous_or_unknown_questions_fall_back():
+    resolver = build_resolver()
+    assert resolver.resolve("喷火龙和超梦谁更强") is None
+    assert resolver.resolve("皮卡丘是什么属性") is None
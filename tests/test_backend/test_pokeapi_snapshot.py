@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.clients.http_client import set_shared_client
+from app.clients.pokeapi_client import PokeAPIClient
+from app.clients.pokeapi_snapshot import (
+    PokeAPISnapshot, SnapshotFormatError, SnapshotWriter, close_pokeapi_snapshot, load_pokeapi_snapshot, snapshot_keys,
+)
+from app.core.config import settings
+from app.core.exceptions import PokemonNotFoundError
+from app.db.base import Base
+from app.repositories.evolution_chain_repository import EvolutionChainRepository
+from app.repositories.pokemon_repository import PokemonRepository
+from app.services.pokemon_service import PokemonService
+from app.services.snapshot_service import export_snapshot
+
+
+def test_snapshot_roundtrip_by_name_and_id(tmp_path):
+    path = str(tmp_path / "pokeapi.snapshot")
+    with SnapshotWriter(path) as writer:
+        writer.add(snapshot_keys("pokemon", {"id": 6, "name": "Charizard"}), {"id": 6, "name": "charizard", "note": "喷火龙"})
+        writer.add(snapshot_keys("evolution-chain", {"id": 2}), {"id": 2, "chain": {}})
+    assert not os.path.exists(f"{path}.tmp")
+
+    snapshot = PokeAPISnapshot(path)
+    try:
+        assert len(snapshot) == 3
+        assert snapshot.get("pokemon/charizard") == snapshot.get("/pokemon/6/") == {"id": 6, "name": "charizard", "note": "喷火龙"}
+        assert "evolution-chain/2" in snapshot and snapshot.get("pokemon/7") is None
+    finally:
+        snapshot.close()
+
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 1)
+    with pytest.raises(SnapshotFormatError):
+        PokeAPISnapshot(path)
+
+
+def test_client_serves_exported_snapshot_without_network(tmp_path, monkeypatch):
+    path = str(tmp_path / "pokeapi.snapshot")
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        return httpx.Response(200, json={"id": 25, "name": "pikachu"})
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            await PokemonRepository.save_pokemon(db, {"id": 6, "name": "charizard", "height": 17})
+            await PokemonRepository.save_pokemon_species(db, {"id": 6, "name": "charizard", "capture_rate": 45})
+            await EvolutionChainRepository.save_evolution_chain(db, {"id": 2, "chain": {"species": {"name": "charmander"}}})
+            counts = await export_snapshot(db, path)
+        await engine.dispose()
+
+        load_pokeapi_snapshot(path)
+        set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        client = PokeAPIClient()
+        try:
+            served = (
+                await client.get_pokemon("Charizard"),
+                await client.get_pokemon_species("6"),
+                await client.get_pokemon_evolution_chain(2),
+            )
+            fallback = await client.get_pokemon("pikachu")
+            monkeypatch.setattr(settings, "pokeapi_snapshot_only", True)
+            with pytest.raises(HTTPException) as missing:
+                await client.get_pokemon("pikachu")
+            return counts, served, fallback, missing.value.status_code
+        finally:
+            close_pokeapi_snapshot()
+            set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient())
+
+    counts, served, fallback, missing_status = asyncio.run(scenario())
+    assert counts == {"pokemon": 1, "pokemon-species": 1, "evolution-chain": 1}
+    assert served[0]["height"] == 17 and served[1]["capture_rate"] == 45 and served[2]["id"] == 2
+    assert fallback["name"] == "pikachu" and missing_status == 404
+    assert requested == ["/api/v2/pokemon/pikachu"]
+
+
+def test_snapshot_only_miss_is_reported_as_pokemon_not_found(tmp_path, monkeypatch):
+    path = str(tmp_path / "pokeapi.snapshot")
+    with SnapshotWriter(path) as writer:
+        writer.add(snapshot_keys("pokemon", {"id": 6, "name": "charizard"}), {"id": 6, "name": "charizard"})
+    monkeypatch.setattr(settings, "pokeapi_snapshot_only", True)
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        load_pokeapi_snapshot(path)
+        service = PokemonService()
+        service.invalidate()
+        try:
+            async with AsyncSession(engine) as db:
+                with pytest.raises(PokemonNotFoundError):
+                    await service.get_pokemon(db, "snapshotmissmon")
+                with pytest.raises(PokemonNotFoundError):
+                    await service.get_pokemon_species(db, "snapshotmissmon")
+        finally:
+            close_pokeapi_snapshot()
+            await engine.dispose()
+
+    asyncio.run(scenario())
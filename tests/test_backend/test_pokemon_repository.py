@@ -0,0 +1,170 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.repositories.pokemon_repository import PokemonRepository
+
+
+async def with_session(scenario):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            return await scenario(db)
+    finally:
+        await engine.dispose()
+
+
+def test_save_and_get_pokemon_roundtrip():
+    async def scenario(db):
+        assert await PokemonRepository.get_pokemon(db, "charizard") is None
+        await PokemonRepository.save_pokemon(db, {"id": 6, "name": "Charizard", "height": 17})
+        await PokemonRepository.save_pokemon(db, {"id": 6, "name": "charizard", "height": 18})
+        return await PokemonRepository.get_pokemon(db, "CHARIZARD")
+
+    assert asyncio.run(with_session(scenario)) == {"id": 6, "name": "charizard", "height": 18}
+
+
+def test_save_and_get_species_roundtrip():
+    async def scenario(db):
+        await PokemonRepository.save_pokemon_species(db, {"id": 6, "name": "charizard", "capture_rate": 45})
+        return await PokemonRepository.get_pokemon_species(db, "charizard")
+
+    assert asyncio.run(with_session(scenario))["capture_rate"] == 45
+
+
+def test_summary_projection_is_saved_and_backfilled_for_legacy_rows():
+    from sqlalchemy import text
+
+    from app.db.migrations import run_migrations
+
+    raw = {
+        "id": 6, "name": "charizard", "height": 17, "weight": 905,
+        "types": [{"type": {"name": "fire"}}, {"type": {"name": "flying"}}],
+        "stats": [{"stat": {"name": "hp"}, "base_stat": 78}],
+        "abilities": [{"ability": {"name": "blaze"}, "is_hidden": False}, {"ability": {"name": "solar-power"}, "is_hidden": True}],
+        "moves": [{"move": {"name": f"move-{i}"}, "version_group_details": [{}] * 20} for i in range(100)],
+    }
+
+    async def scenario(db):
+        await PokemonRepository.save_pokemon(db, raw)
+        saved = await PokemonRepository.get_pokemon_summary(db, "Charizard")
+
+        # 模拟迁移前写入的旧数据：summary 列为空
+        await db.execute(text("UPDATE pokemon SET summary = NULL"))
+        await db.commit()
+        async with db.bind.begin() as conn:
+            await run_migrations(conn)
+        backfilled = await PokemonRepository.get_pokemon_summary(db, "charizard")
+        return saved, backfilled, await PokemonRepository.get_pokemon(db, "charizard")
+
+    saved, backfilled, full = asyncio.run(with_session(scenario))
+    assert saved == backfilled
+    # 读取时附带记录的 updated_at，重算投影不改变它
+    assert saved["updated_at"] is not None
+    assert saved["types"] == ["fire", "flying"]
+    assert saved["stats"] == {"hp": 78}
+    assert saved["abilities"] == ["blaze"] and saved["hidden_ability"] == "solar-power"
+    assert len(saved["moves"]) == 20
+    assert len(full["moves"]) == 100
+
+
+def test_legacy_table_gains_summary_column():
+    from sqlalchemy import inspect, text
+    from sqlalchemy.ext.asyncio import create_async_engine as create_engine
+
+    from app.db.migrations import run_migrations
+
+    async def scenario():
+        engine = create_engine("sqlite+aiosqlite:///:memory:")
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE pokemon (id INTEGER PRIMARY KEY, name VARCHAR(64), data JSON, updated_at DATETIME)"))
+                await conn.execute(text("CREATE TABLE pokemon_species (id INTEGER PRIMARY KEY, name VARCHAR(64), data JSON, updated_at DATETIME)"))
+                await conn.execute(text("""INSERT INTO pokemon_species VALUES (6, 'charizard', '{"id": 6, "name": "charizard", "evolution_chain": {"url": "https://pokeapi.co/api/v2/evolution-chain/2/"}}', NULL)"""))
+                await run_migrations(conn)
+                columns = await conn.run_sync(lambda sync: {c["name"] for c in inspect(sync).get_columns("pokemon")})
+            async with AsyncSession(engine) as db:
+                return columns, await PokemonRepository.get_species_summary(db, "charizard")
+        finally:
+            await engine.dispose()
+
+    columns, species = asyncio.run(scenario())
+    assert "summary" in columns
+    assert species["evolution_chain_id"] == 2
+
+
+def test_save_many_upserts_in_batches():
+    async def scenario(db):
+        await PokemonRepository.save_many_species(db, [{"id": i, "name": f"Species-{i}", "capture_rate": 1} for i in range(1, 6)], batch_size=2)
+        saved = await PokemonRepository.save_many_species(db, [
+            {"id": 2, "name": "species-2", "capture_rate": 99},
+            {"id": 6, "name": "species-6", "capture_rate": 1},
+            {"name": "no-id"},
+        ], batch_size=2)
+        return saved, await PokemonRepository.list_species_ids(db), await PokemonRepository.get_pokemon_species(db, "species-2")
+
+    saved, ids, updated = asyncio.run(with_session(scenario))
+    assert saved == 2
+    assert ids == {1, 2, 3, 4, 5, 6}
+    assert updated["capture_rate"] == 99
+
+
+def test_save_many_treats_ids_as_authoritative_on_name_conflicts():
+    async def scenario(db):
+        await PokemonRepository.save_many_pokemon(db, [
+            {"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 4, "name": "c"},
+        ])
+        # 互换名称，且 c 改由 id 3 使用：同名的旧记录被替换，不因 name 唯一约束而失败
+        await PokemonRepository.save_many_pokemon(db, [
+            {"id": 1, "name": "b"}, {"id": 2, "name": "a"}, {"id": 3, "name": "c"},
+        ])
+        return {name: (await PokemonRepository.get_pokemon(db, name))["id"] for name in ("a", "b", "c")}, \
+            await PokemonRepository.list_pokemon_ids(db)
+
+    by_name, ids = asyncio.run(with_session(scenario))
+    assert by_name == {"a": 2, "b": 1, "c": 3}
+    assert ids == {1, 2, 3}
+
+
+def test_service_returns_projection_that_answer_prompt_consumes():
+    from app.clients.doubao_client import DoubaoClient
+    from app.services.pokemon_service import PokemonService
+
+    raw_pokemon = {
+        "id": 6, "name": "charizard", "height": 17, "weight": 905,
+        "types": [{"type": {"name": "fire"}}, {"type": {"name": "flying"}}],
+        "stats": [{"stat": {"name": "hp"}, "base_stat": 78}],
+        "abilities": [{"ability": {"name": "blaze"}, "is_hidden": False}],
+        "moves": [{"move": {"name": "ember"}, "version_group_details": [{}]}],
+        "sprites": {"front_default": "https://example.invalid/6.png"},
+    }
+    raw_species = {
+        "id": 6, "name": "charizard", "capture_rate": 45,
+        "flavor_text_entries": [{"flavor_text": "喷出灼热的火焰", "language": {"name": "zh-Hans"}}],
+        "evolution_chain": {"url": "https://pokeapi.co/api/v2/evolution-chain/2/"},
+    }
+
+    async def scenario(db):
+        await PokemonRepository.save_pokemon(db, raw_pokemon)
+        await PokemonRepository.save_pokemon_species(db, raw_species)
+        service = PokemonService()
+        service.invalidate()
+        try:
+            return await service.get_pokemon(db, "charizard"), await service.get_pokemon_species(db, "charizard")
+        finally:
+            service.invalidate()
+
+    pokemon, species = asyncio.run(with_session(scenario))
+    # 服务返回投影，不含 PokeAPI 原始结构中的字段
+    assert pokemon["types"] == ["fire", "flying"] and "sprites" not in pokemon
+    assert species["evolution_chain_id"] == 2 and "flavor_text_entries" not in species
+    system_prompt, user_prompt = DoubaoClient().build_answer_messages("喷火龙的属性？", pokemon, species)
+    prompt = system_prompt + user_prompt
+    assert "fire" in prompt and "blaze" in prompt and "喷出灼热的火焰" in prompt
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.clients.http_client import set_shared_client
+from app.core.config import settings
+from app.db.base import Base
+from app.repositories.evolution_chain_repository import EvolutionChainRepository
+from app.repositories.pokemon_repository import PokemonRepository
+from app.services.preload_service import PreloadService, parse_resource_id
+
+BASE = "https://pokeapi.co/api/v2"
+NAMES = {1: "bulbasaur", 2: "ivysaur", 3: "venusaur"}
+
+
+def pokeapi(calls, broken):
+    def handler(request):
+        parts = request.url.path.rstrip("/").split("/")
+        resource, tail = parts[-2], parts[-1]
+        if tail in ("pokemon", "pokemon-species", "evolution-chain"):
+            ids = [1] if tail == "evolution-chain" else sorted(NAMES)
+            return httpx.Response(200, json={"count": len(ids), "results": [
+                {"name": NAMES[i], "url": f"{BASE}/{tail}/{i}/"} for i in ids
+            ]})
+        calls.append(f"{resource}/{tail}")
+        if f"{resource}/{tail}" in broken:
+            return httpx.Response(500)
+        resource_id = int(tail)
+        if resource == "evolution-chain":
+            return httpx.Response(200, json={"id": resource_id, "chain": {"species": {"name": "bulbasaur"}, "evolves_to": []}})
+        return httpx.Response(200, json={"id": resource_id, "name": NAMES[resource_id]})
+    return handler
+
+
+def run_twice(broken):
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        calls = []
+        set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient(transport=httpx.MockTransport(pokeapi(calls, broken))))
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                service = PreloadService(concurrency=2, batch_size=2, max_retries=1, refresh_days=0, retry_delay=0)
+                first = await service.run(db)
+                first_calls = list(calls)
+                broken.clear()
+                calls.clear()
+                second = await service.run(db)
+                stored = (
+                    await PokemonRepository.list_pokemon_ids(db),
+                    await PokemonRepository.list_species_ids(db),
+                    await EvolutionChainRepository.get_evolution_chain(db, 1),
+                )
+            return first, first_calls, second, list(calls), stored
+        finally:
+            set_shared_client(settings.pokeapi_base_url, httpx.AsyncClient())
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def test_preload_mirrors_resources_and_resumes_only_missing_ids():
+    first, first_calls, second, second_calls, stored = run_twice({"pokemon/2"})
+
+    assert [item["saved"] for item in first] == [2, 3, 1]
+    assert first[0]["failed_ids"] == [2]
+    # 500 重试一次后放弃
+    assert first_calls.count("pokemon/2") == 2
+
+    assert [item["skipped"] for item in second] == [2, 3, 1]
+    assert second_calls == ["pokemon/2"]
+    pokemon_ids, species_ids, chain = stored
+    assert pokemon_ids == {1, 2, 3} and species_ids == {1, 2, 3}
+    assert chain["chain"]["species"]["name"] == "bulbasaur"
+
+
+def test_parse_resource_id():
+    assert parse_resource_id(f"{BASE}/pokemon/25/") == 25
+    assert parse_resource_id("") is None
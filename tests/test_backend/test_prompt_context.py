@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+
+from app.clients.doubao_client import DoubaoClient
+from app.clients.http_client import set_shared_client
+from app.core.config import settings
+from app.core.observability import LLM_TOKENS, LLM_TRUNCATED
+from app.utils import prompt_context
+from app.utils.prompt_context import pokemon_context, prompt_context_cache, select_answer_context, species_context
+
+
+def pokemon(height=17, updated_at="2026-01-01T00:00:00"):
+    return {
+        "v": 1, "id": 6, "name": "charizard", "height": height, "weight": 905, "types": ["fire", "flying"],
+        "stats": {"hp": 78}, "abilities": ["blaze"], "hidden_ability": "solar-power",
+        "moves": [f"move-{i}" for i in range(20)], "updated_at": updated_at,
+    }
+
+
+SPECIES = {"v": 1, "id": 6, "name": "charizard", "capture_rate": 45, "flavor_text": {"zh-Hans": "喷出灼热的火焰"}, "updated_at": "2026-01-01T00:00:00"}
+EVOLUTION = {"id": 2, "steps": [{"from": "charmander", "to": "charmeleon", "trigger": "level-up", "min_level": 16}], "revision": 1}
+
+
+def test_prompt_fragments_are_built_once_per_data_version(monkeypatch):
+    prompt_context_cache.clear()
+    builds = []
+    original = prompt_context.simplify_pokemon
+    monkeypatch.setattr(prompt_context, "simplify_pokemon", lambda data, *fields: builds.append(data["height"]) or original(data, *fields))
+    client = DoubaoClient()
+
+    first, _ = client.build_answer_messages("喷火龙是什么属性？", pokemon(), SPECIES, EVOLUTION)
+    second, _ = client.build_answer_messages("喷火龙有多重？", pokemon(), SPECIES, EVOLUTION)
+    # 数据刷新（updated_at 变化）后重新生成片段
+    refreshed, _ = client.build_answer_messages("喷火龙有多重？", pokemon(height=18, updated_at="2026-02-01T00:00:00"), SPECIES, EVOLUTION)
+
+    assert builds == [17, 18]
+    assert "用户问题：喷火龙是什么属性？" in first and "用户问题：喷火龙有多重？" in second
+    assert '"height": 17' in second and '"height": 18' in refreshed
+    assert '"flavor_text": "喷出灼热的火焰"' in first
+    assert '进化链数据：[{"from": "charmander", "to": "charmeleon"' in first
+
+
+def test_unversioned_data_is_not_cached():
+    prompt_context_cache.clear()
+    unversioned = pokemon(updated_at=None)
+
+    assert pokemon_context(unversioned) == pokemon_context(unversioned)
+    assert species_context({**SPECIES, "updated_at": None})
+    assert len(prompt_context_cache) == 0
+
+
+def test_answer_context_follows_intent_type_and_detail_level(monkeypatch):
+    client = DoubaoClient()
+    brief = select_answer_context({"intent_type": "basic_info", "detail_level": "low"})
+    prompt, _ = client.build_answer_messages("喷火龙是什么属性？", pokemon(), SPECIES, None, brief)
+    assert (brief.name, brief.max_chars, brief.max_completion_tokens) == ("basic_info", 80, settings.answer_max_tokens_low)
+    assert '"types": ["fire", "flying"]' in prompt and "80字以内" in prompt
+    assert "moves" not in prompt and "stats" not in prompt and "宝可梦物种数据" not in prompt
+
+    detailed = select_answer_context({"intent_type": "moves", "detail_level": "high"})
+    assert detailed.pokemon_fields == ("name", "types", "stats", "abilities", "hidden_ability", "moves")
+    assert detailed.species_fields == ("name", "flavor_text")
+    assert detailed.max_completion_tokens == settings.answer_max_tokens_high
+
+    # 其他意图类型与关闭选择时提供完整数据
+    assert select_answer_context({"intent_type": "weakness", "detail_level": "normal"}).name == "full"
+    monkeypatch.setattr(settings, "answer_context_selection_enabled", False)
+    full = select_answer_context({"intent_type": "basic_info", "detail_level": "low"})
+    assert (full.name, full.pokemon_fields, full.max_chars) == ("full", prompt_context.POKEMON_FIELDS, 200)
+
+
+def test_answer_sends_token_budget_and_records_usage():
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "喷火龙是火/飞行属性"}, "finish_reason": "length"}],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150},
+        })
+
+    prompt_tokens = LLM_TOKENS.labels("answer", "stats", "prompt")
+    count, total = prompt_tokens.count, prompt_tokens.sum
+    truncated = LLM_TRUNCATED.labels("answer", "stats").value
+
+    async def scenario():
+        set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        client = DoubaoClient()
+        client.api_key = "test"
+        try:
+            return await client.generate_answer("喷火龙的种族值？", pokemon(), SPECIES, None, {"intent_type": "stats", "detail_level": "normal"})
+        finally:
+            set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient())
+
+    answer, used_fallback = asyncio.run(scenario())
+    assert answer == "喷火龙是火/飞行属性" and not used_fallback
+    assert payloads[0]["max_completion_tokens"] == settings.answer_max_tokens_normal
+    assert "move-0" not in payloads[0]["messages"][0]["content"]
+    assert (prompt_tokens.count, prompt_tokens.sum) == (count + 1, total + 120)
+    assert LLM_TRUNCATED.labels("answer", "stats").value == truncated + 1
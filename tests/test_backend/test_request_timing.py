@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.middleware import ProfilingMiddleware, RequestIDMiddleware, ServerTimingMiddleware
+from app.utils.profiler import StackSampler
+from app.utils.request_timing import mark_handler_done, record_timing, timing_stage
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def build_app(profile_dir):
+    app = FastAPI()
+
+    @app.post("/api/v1/ask")
+    async def ask():
+        with timing_stage("intent"):
+            await asyncio.sleep(0.01)
+        record_timing("db", 0.002)
+        record_timing("db", 0.003)
+        busy_wait(0.05)
+        mark_handler_done()
+        return {"answer": "ok"}
+
+    app.add_middleware(ServerTimingMiddleware, path_prefix="/api/v1/ask")
+    app.add_middleware(ProfilingMiddleware, output_dir=str(profile_dir), admin_token="s3cret", interval_ms=1)
+    app.add_middleware(RequestIDMiddleware)
+    return app
+
+
+def test_server_timing_header_and_admin_guarded_profile(tmp_path):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app(tmp_path)), base_url="http://test") as client:
+            return (
+                await client.post("/api/v1/ask"),
+                await client.post("/api/v1/ask", headers={"X-Profile": "1", "X-Admin-Token": "wrong"}),
+                await client.post("/api/v1/ask", headers={"X-Profile": "1", "X-Admin-Token": "s3cret", "X-Request-ID": "trace-1"}),
+            )
+
+    plain, rejected, profiled = asyncio.run(scenario())
+
+    metrics = dict(item.split(";dur=") for item in plain.headers["server-timing"].split(", "))
+    assert list(metrics) == ["intent", "db", "serialize", "total"]
+    assert float(metrics["intent"]) >= 10
+    assert abs(float(metrics["db"]) - 5) < 0.01
+    assert float(metrics["total"]) >= float(metrics["intent"]) + 50
+
+    assert "x-profile-id" not in plain.headers and "x-profile-id" not in rejected.headers
+    profile_id = profiled.headers["x-profile-id"]
+    assert profile_id.endswith("-trace-1")
+    assert [path.name for path in tmp_path.iterdir()] == [f"{profile_id}.folded"]
+    folded = (tmp_path / f"{profile_id}.folded").read_text(encoding="utf-8")
+    assert "busy_wait" in folded
+    stack, count = folded.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+
+def test_stack_sampler_samples_target_thread_only():
+    sampler = StackSampler(interval=0.001).start()
+    busy_wait(0.05)
+    samples = sampler.stop()
+    assert sum(count for stack, count in samples.items() if "busy_wait" in stack) >= 5
+    assert not any("stack-sampler" in stack or "_run (" in stack for stack in samples)
+
+
+def test_profiling_stops_sampler_off_the_event_loop(tmp_path, monkeypatch):
+    stop_threads = []
+    original_stop = StackSampler.stop
+
+    def recording_stop(self):
+        stop_threads.append(threading.get_ident())
+        return original_stop(self)
+
+    monkeypatch.setattr(StackSampler, "stop", recording_stop)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app(tmp_path)), base_url="http://test") as client:
+            response = await client.post("/api/v1/ask", headers={"X-Profile": "1", "X-Admin-Token": "s3cret"})
+        return response, threading.get_ident()
+
+    response, loop_thread = asyncio.run(scenario())
+    assert "x-profile-id" in response.headers
+    assert len(stop_threads) == 1 and stop_threads[0] != loop_thread
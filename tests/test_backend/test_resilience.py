@@ -0,0 +1,239 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.clients.doubao_client import DoubaoClient
+from app.clients.http_client import HTTPClient, set_shared_client
+from app.core.config import settings
+from app.utils.resilience import (
+    Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError, LatencyWindow, UpstreamGuard, backoff_delay, upstream_registry,
+)
+from benchmarks.stubs import FaultProfile, StubArk
+from main import app
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_recovery():
+    now = [0.0]
+    breaker = CircuitBreaker("t", failure_threshold=3, recovery_seconds=10, clock=lambda: now[0])
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 10.0
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opened == 2
+
+    now[0] = 25.0
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.stats()["state"] == "closed" and breaker.rejected == 2
+
+
+def test_adaptive_timeout_and_backoff_bounds():
+    guard = UpstreamGuard("t", CircuitBreaker("t", 5, 30), LatencyWindow(10, min_samples=5), base_timeout=10, adaptive_timeout=True, min_timeout=0.5)
+    assert guard.timeout() == 10 and guard.hedge_delay(0.9) is None
+    for seconds in (0.1, 0.1, 0.2, 0.2, 0.3):
+        guard.latency.observe(seconds)
+    assert guard.timeout() == pytest.approx(1.2) and guard.timeout(1.0) == 1.0
+    assert guard.hedge_delay(0.5) == 0.2 and guard.hedge_delay(0) is None
+    assert backoff_delay(3, 0.05, 0.2, rng=lambda low, high: high) == 0.2
+    assert backoff_delay(1, 0.05, 1.0, rng=lambda low, high: high) == 0.1
+
+
+def test_bulkhead_hands_slots_over_in_order_and_times_out():
+    order = []
+
+    async def call(bulkhead, name):
+        await bulkhead.acquire()
+        order.append(name)
+        await asyncio.sleep(0.01)
+        bulkhead.release()
+
+    async def scenario():
+        bulkhead = Bulkhead("t", max_concurrency=2)
+        await asyncio.gather(*(call(bulkhead, name) for name in "abcde"))
+        assert bulkhead.try_acquire() and bulkhead.try_acquire()
+        waiting = asyncio.ensure_future(bulkhead.acquire(timeout=5))
+        await asyncio.sleep(0)
+        with pytest.raises(BulkheadFullError):
+            await bulkhead.acquire(timeout=0.01)
+        bulkhead.release()
+        assert await waiting > 0
+        for _ in range(2):
+            bulkhead.release()
+        return bulkhead.stats()
+
+    stats = asyncio.run(scenario())
+    assert order == list("abcde")
+    assert stats == {"max_concurrency": 2, "in_flight": 0, "queued": 0, "rejected": 1}
+
+
+def test_saturated_upstream_does_not_block_other_upstreams(monkeypatch):
+    monkeypatch.setattr(settings, "upstream_bulkhead_max_wait_seconds", 0.05)
+
+    async def scenario():
+        unblock = asyncio.Event()
+
+        async def slow(request):
+            await unblock.wait()
+            return httpx.Response(200, json={"upstream": "slow"})
+
+        set_shared_client("https://slow.test", httpx.AsyncClient(transport=httpx.MockTransport(slow)))
+        set_shared_client("https://fast.test", httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"upstream": "fast"}))))
+        slow_client = HTTPClient("https://slow.test", upstream="bulkhead-slow", max_concurrency=1)
+        fast_client = HTTPClient("https://fast.test", upstream="bulkhead-fast", max_concurrency=1)
+        stuck = asyncio.ensure_future(slow_client.post("v1/chat"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as full:
+            await slow_client.post("v1/chat")
+        fast = await fast_client.get("pokemon/1")
+        in_flight = slow_client.guard.bulkhead.in_flight
+        unblock.set()
+        return full.value.status_code, fast, in_flight, await stuck, slow_client.guard.stats()["bulkhead"]
+
+    full_status, fast, in_flight, stuck, stats = asyncio.run(scenario())
+    assert full_status == 503 and fast == {"upstream": "fast"}
+    assert in_flight == 1 and stuck == {"upstream": "slow"}
+    assert stats["in_flight"] == 0 and stats["rejected"] == 1
+    assert upstream_registry["bulkhead-slow"].breaker.state == "closed"
+
+
+def test_get_retries_transient_failures(monkeypatch):
+    monkeypatch.setattr(settings, "http_retry_backoff_base_ms", 0.0)
+    statuses = [503, 502, 200, 500, 500, 500]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), json={"ok": True})
+
+    async def scenario():
+        set_shared_client("https://retry.test", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        client = HTTPClient("https://retry.test", upstream="retry-test", retries=2)
+        first = await client.get("pokemon/1")
+        with pytest.raises(HTTPException) as failed:
+            await client.get("pokemon/2")
+        return first, failed.value.status_code
+
+    first, failed_status = asyncio.run(scenario())
+    assert first == {"ok": True} and failed_status == 500 and statuses == []
+
+
+def test_hedged_get_returns_the_faster_request():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            await asyncio.sleep(0.5)
+        return httpx.Response(200, json={"call": len(calls)})
+
+    async def scenario():
+        set_shared_client("https://hedge.test", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        client = HTTPClient("https://hedge.test", upstream="hedge-test", hedge_percentile=0.9)
+        for _ in range(settings.upstream_latency_min_samples):
+            client.guard.latency.observe(0.01)
+        start = asyncio.get_running_loop().time()
+        result = await client.get("pokemon/1")
+        return result, asyncio.get_running_loop().time() - start
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == {"call": 2} and len(calls) == 2
+    assert elapsed < 0.3
+
+
+async def _delayed_server(delays):
+    """本机 HTTP 桩：按请求路径等待 delays[path] 秒后返回 {}（httpx 的超时只对真实连接生效）"""
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, _, rest = head.decode().partition("\r\n")
+                length = next((int(line.split(":")[1]) for line in rest.split("\r\n") if line.lower().startswith("content-length")), 0)
+                await reader.readexactly(length)
+                await asyncio.sleep(delays[request_line.split()[1]])
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def test_adaptive_timeout_is_tracked_per_call_kind(monkeypatch):
+    monkeypatch.setattr(settings, "adaptive_timeout_min_seconds", 0.05)
+    monkeypatch.setattr(settings, "circuit_breaker_failure_threshold", 100)
+    delays = {"/intent": 0.0, "/answer": 0.3, "/slow-intent": 0.4}
+
+    async def scenario():
+        server = await _delayed_server(delays)
+        base_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        set_shared_client(base_url, httpx.AsyncClient())
+        client = HTTPClient(base_url, timeout=5, upstream="adaptive-llm")
+        try:
+            for _ in range(settings.upstream_latency_min_samples + 5):
+                await client.post("intent", call="intent")
+            intent_timeout = client.guard.timeout(5, "intent")
+            # 大量快速的意图解析之后，慢得多的回答生成不受其收紧的超时影响
+            answer = await client.post("answer", call="answer")
+            # 超时的请求按超时值记入窗口，超时随之回升
+            with pytest.raises(HTTPException):
+                await client.post("slow-intent", call="intent")
+            return intent_timeout, answer, client.guard.timeout(5, "intent"), client.guard.stats()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await client.client.aclose()
+
+    intent_timeout, answer, recovered_timeout, stats = asyncio.run(scenario())
+    assert intent_timeout == 0.05 and answer == {}
+    assert recovered_timeout == pytest.approx(0.2, abs=0.05)
+    assert set(stats["calls"]) == {"intent", "answer"} and stats["calls"]["intent"]["latency_samples"] == 26
+
+
+def test_open_breaker_fails_fast_into_fallback_answer():
+    ark = StubArk(FaultProfile(error_rate=1.0))
+    breaker = DoubaoClient().http_client.guard.breaker
+    breaker.reset()
+
+    async def scenario():
+        set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient(transport=httpx.ASGITransport(app=ark)))
+        client = DoubaoClient()
+        client.api_key = "test"
+        try:
+            return [await client.generate_answer("皮卡丘的属性？", {"name": "pikachu", "types": ["electric"], "stats": {}}, {})
+                    for _ in range(settings.circuit_breaker_failure_threshold + 3)]
+        finally:
+            set_shared_client(settings.doubao_api_base_url, httpx.AsyncClient())
+
+    try:
+        answers = asyncio.run(scenario())
+        state = TestClient(app).get("/api/v1/upstreams").json()["doubao"]["breaker"]
+        reset = TestClient(app).post("/api/v1/upstreams/doubao/reset").json()
+    finally:
+        breaker.reset()
+
+    assert all(used_fallback for _, used_fallback in answers)
+    assert sum(ark.calls.values()) == settings.circuit_breaker_failure_threshold
+    assert state["state"] == "open" and state["rejected"] == 3
+    assert reset["breaker"]["state"] == "closed"
+    assert "pokeapi" in upstream_registry
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.base import Base
+from app.services.dex_qa_service import DexQAService
+from app.services.pokemon_service import PokemonService
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"id": 6}
+
+    async def scenario():
+        flight = SingleFlight("t")
+        results = await asyncio.gather(*(flight.do("charizard", load) for _ in range(10)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "shared": 9}
+
+
+def test_waiters_share_the_exception():
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise LookupError("missing")
+
+    async def scenario():
+        flight = SingleFlight("t")
+        return await asyncio.gather(*(flight.do("x", boom) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, LookupError) for r in results)
+
+
+def test_cancelled_waiter_does_not_cancel_the_call():
+    async def load():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def scenario():
+        flight = SingleFlight("t")
+        first = asyncio.ensure_future(flight.do("x", load))
+        second = asyncio.ensure_future(flight.do("x", load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+class CountingPokeAPIClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_pokemon(self, name):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return {"id": 6, "name": name}
+
+
+def test_pokemon_service_coalesces_concurrent_misses():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        service = PokemonService()
+        service.invalidate()
+        service.pokeapi_client = CountingPokeAPIClient()
+        async with AsyncSession(engine) as db:
+            results = await asyncio.gather(*(service.get_pokemon(db, "charizard") for _ in range(8)))
+        await engine.dispose()
+        return service.pokeapi_client.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(r["id"] == 6 for r in results)
+
+
+def test_cancel_abandoned_only_cancels_calls_without_waiters():
+    async def load():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def scenario():
+        flight = SingleFlight("t")
+        waiter = asyncio.ensure_future(flight.do("x", load))
+        await asyncio.sleep(0.01)
+        kept = flight.cancel_abandoned("x")
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        cancelled = flight.cancel_abandoned("x")
+        await asyncio.sleep(0.01)
+        return kept, cancelled, flight.in_flight(), flight.cancel_abandoned("missing")
+
+    assert asyncio.run(scenario()) == (False, True, 0, False)
+
+
+def test_question_flight_survives_leader_cancellation_in_its_own_session():
+    sessions = []
+
+    async def answer(db, question):
+        sessions.append(db)
+        await asyncio.sleep(0.05)
+        await db.execute(text("select 1"))
+        return {"answer": "ok"}
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        service = DexQAService()
+        service._answer_question = answer
+        try:
+            async with AsyncSession(engine) as follower_db:
+                async with AsyncSession(engine) as leader_db:
+                    leader = asyncio.ensure_future(service.answer_question(leader_db, "皮卡丘？"))
+                    follower = asyncio.ensure_future(service.answer_question(follower_db, "皮卡丘?"))
+                    await asyncio.sleep(0.01)
+                    leader.cancel()
+                # 发起请求的会话已关闭，合并的处理仍在独立会话中完成
+                result = await follower
+                return result, sessions, (leader_db, follower_db)
+        finally:
+            await engine.dispose()
+
+    result, sessions, callers = asyncio.run(scenario())
+    assert result == {"answer": "ok"}
+    assert len(sessions) == 1 and sessions[0] not in callers
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath("backend"))
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.core.observability import SPECULATIVE_PREFETCH
+from app.db.base import Base
+from app.services.dex_qa_service import DexQAService
+from app.services.intent_parser_service import IntentParserService
+
+
+class SlowPokeAPIClient:
+    def __init__(self):
+        self.started = []
+        self.finished = []
+
+    async def _load(self, resource, name):
+        self.started.append((resource, name))
+        await asyncio.sleep(0.06)
+        self.finished.append((resource, name))
+        return {"id": 6, "name": name}
+
+    async def get_pokemon(self, name):
+        return await self._load("pokemon", name)
+
+    async def get_pokemon_species(self, name):
+        return await self._load("species", name)
+
+
+class SlowDoubaoClient:
+    def __init__(self, pokemon_name):
+        self.pokemon_name = pokemon_name
+
+    async def parse_question_to_intent(self, question):
+        # 比数据获取快，猜错的预取总在完成前被取消
+        await asyncio.sleep(0.03)
+        return {"pokemon_name": self.pokemon_name, "original_name": self.pokemon_name, "intent_type": "stats", "detail_level": "brief"}
+
+
+def run_parse(question, llm_name):
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        service = DexQAService()
+        service.pokemon_service.invalidate()
+        service.pokemon_service.pokeapi_client = SlowPokeAPIClient()
+        service.intent_parser_service.doubao_client = SlowDoubaoClient(llm_name)
+        try:
+            async with AsyncSession(engine) as db:
+                start = asyncio.get_running_loop().time()
+                intent = await service.parse_intent(db, question)
+                fetched = await service.fetch_pokemon_data(db, intent["pokemon_name"], intent)
+                elapsed = asyncio.get_running_loop().time() - start
+            await asyncio.sleep(0.08)
+            return service.pokemon_service.pokeapi_client, fetched, elapsed
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def test_guess_pokemon_name_from_question():
+    parser = IntentParserService()
+    assert parser.guess_pokemon_name("Mewtwo的种族值是多少？") == "mewtwo"
+    assert parser.guess_pokemon_name("mewtwo 的 stats") == "mewtwo"
+    assert parser.guess_pokemon_name("mewtwo 和 mew 谁更强") is None
+    assert parser.guess_pokemon_name("what are mewtwo's stats") is None
+
+
+def test_correct_guess_overlaps_fetch_with_llm_intent_parsing():
+    hits = SPECULATIVE_PREFETCH.labels("hit").value
+    client, fetched, elapsed = run_parse("prefetchmon的种族值是多少？", "prefetchmon")
+
+    assert fetched["pokemon"]["name"] == "prefetchmon" and fetched["species"]["name"] == "prefetchmon"
+    assert sorted(client.started) == [("pokemon", "prefetchmon"), ("species", "prefetchmon")]
+    # LLM 解析与数据获取重叠：总耗时约为一次 60ms 获取，而非 30ms 解析 + 60ms 获取
+    assert elapsed < 0.085
+    assert SPECULATIVE_PREFETCH.labels("hit").value == hits + 1
+
+
+def test_wrong_guess_cancels_prefetch(monkeypatch):
+    wasted = SPECULATIVE_PREFETCH.labels("wasted").value
+    client, fetched, _ = run_parse("wrongmon的种族值是多少？", "rightmon")
+
+    assert fetched["pokemon"]["name"] == "rightmon"
+    assert ("pokemon", "wrongmon") in client.started
+    assert [name for _, name in client.finished] == ["rightmon", "rightmon"]
+    assert SPECULATIVE_PREFETCH.labels("wasted").value == wasted + 1
+
+    monkeypatch.setattr(settings, "speculative_prefetch_enabled", False)
+    client, _, _ = run_parse("offmon的种族值是多少？", "offmon")
+    assert len(client.started) == 2 and client.started[0][1] == "offmon"